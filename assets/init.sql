@@ -22,6 +22,7 @@ CREATE TABLE IF NOT EXISTS models (
     accuracy FLOAT,
     metrics JSON,
     dataset_path VARCHAR(512),
+    dataset_id INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -31,9 +32,12 @@ CREATE TABLE IF NOT EXISTS datasets (
     name VARCHAR(255),
     file_path VARCHAR(512),
     row_count INT,
+    content_hash CHAR(64),
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+ALTER TABLE models ADD FOREIGN KEY (dataset_id) REFERENCES datasets(id) ON DELETE SET NULL;
+
 -- Predictions table
 CREATE TABLE IF NOT EXISTS predictions (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -41,12 +45,69 @@ CREATE TABLE IF NOT EXISTS predictions (
     input_data JSON,
     prediction VARCHAR(64),
     probability JSON,
+    confidence FLOAT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    pai FLOAT,
+    pendidikan_pancasila FLOAT,
+    bahasa_indonesia FLOAT,
+    matematika FLOAT,
+    ipa FLOAT,
+    ips FLOAT,
+    bahasa_inggris FLOAT,
+    penjas FLOAT,
+    tik FLOAT,
+    sbk FLOAT,
+    prakarya FLOAT,
+    bahasa_sunda FLOAT,
+    btq FLOAT,
+    absen FLOAT,
+    FOREIGN KEY (model_id) REFERENCES models(id) ON DELETE SET NULL
+);
+
+-- Prediction counts per model, day and label, updated with every insert
+CREATE TABLE IF NOT EXISTS prediction_summary (
+    model_id INT NOT NULL,
+    day DATE NOT NULL,
+    label VARCHAR(64) NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    probability_sum DOUBLE NOT NULL DEFAULT 0,
+    probability_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (model_id, day, label)
+);
+
+-- Background training jobs; the model row is created when a job succeeds
+CREATE TABLE IF NOT EXISTS training_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    progress FLOAT NOT NULL DEFAULT 0,
+    stage VARCHAR(64),
+    dataset_id INT,
+    dataset_file VARCHAR(512) NOT NULL,
+    dataset_path VARCHAR(512),
+    target_column VARCHAR(64) NOT NULL DEFAULT 'status',
+    tune BOOLEAN NOT NULL DEFAULT FALSE,
+    model_id INT,
+    error TEXT,
+    owner VARCHAR(128),
+    heartbeat_at TIMESTAMP NULL,
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    FOREIGN KEY (dataset_id) REFERENCES datasets(id) ON DELETE SET NULL,
     FOREIGN KEY (model_id) REFERENCES models(id) ON DELETE SET NULL
 );
 
 -- Create indexes for better performance
-CREATE INDEX idx_models_created_at ON models(created_at);
-CREATE INDEX idx_predictions_model_id ON predictions(model_id);
-CREATE INDEX idx_predictions_created_at ON predictions(created_at);
+-- (timestamp, id) composites serve keyset pagination, newest first
+CREATE INDEX idx_models_created_at_id ON models(created_at, id);
+CREATE INDEX idx_datasets_uploaded_at_id ON datasets(uploaded_at, id);
+CREATE UNIQUE INDEX idx_datasets_content_hash_unique ON datasets(content_hash);
+CREATE INDEX idx_predictions_created_at_id ON predictions(created_at, id);
+CREATE INDEX idx_predictions_model_created_at_id ON predictions(model_id, created_at, id);
+CREATE INDEX idx_predictions_label_created_at_id ON predictions(prediction, created_at, id);
+CREATE INDEX idx_prediction_summary_day ON prediction_summary(day);
+CREATE INDEX idx_training_jobs_created_at_id ON training_jobs(created_at, id);
+CREATE INDEX idx_training_jobs_status ON training_jobs(status);
 CREATE INDEX idx_users_username ON users(username);
\ No newline at end of file
@@ -3,7 +3,7 @@ Pydantic models for API request/response validation.
 """
 from typing import Optional, Dict, List, Any
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 
 
 # Feature columns for student data
@@ -68,6 +68,7 @@ class ModelMeta(BaseModel):
     accuracy: Optional[float] = None
     metrics: Optional[Dict[str, Any]] = None
     dataset_path: Optional[str] = None
+    dataset_id: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -80,9 +81,39 @@ class ModelTrainResponse(BaseModel):
     name: str
     accuracy: float
     metrics: Dict[str, Any]
+    dataset_id: Optional[int] = None
     created_at: str
 
 
+class ModelTrainFromDatasetRequest(BaseModel):
+    """Request body for training a model on a stored dataset."""
+    dataset_id: int = Field(..., description="ID dataset yang digunakan")
+    name: Optional[str] = Field(None, max_length=255, description="Nama model (opsional)")
+
+
+class TrainingJobFromDatasetRequest(ModelTrainFromDatasetRequest):
+    """Request body for queueing a training job on a stored dataset."""
+    tune: Optional[bool] = Field(None, description="Cari hyperparameter terbaik dengan validasi silang")
+
+
+class TrainingJob(BaseModel):
+    """Background training job status."""
+    id: int
+    name: str
+    status: str
+    progress: float
+    stage: Optional[str] = None
+    dataset_id: Optional[int] = None
+    tune: bool = False
+    model_id: Optional[int] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+
+
 class ModelUpdateRequest(BaseModel):
     """Request body for updating model."""
     name: str = Field(..., min_length=1, max_length=255, description="Nama model baru")
@@ -94,12 +125,32 @@ class DatasetMeta(BaseModel):
     name: Optional[str] = None
     file_path: Optional[str] = None
     row_count: Optional[int] = None
+    content_hash: Optional[str] = None
     uploaded_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class PredictionRecord(BaseModel):
+    """Saved prediction."""
+    id: int
+    model_id: Optional[int] = None
+    input_data: Optional[Dict[str, Any]] = None
+    prediction: str
+    probability: Optional[Dict[str, float]] = None
+    created_at: datetime
+
+
+class PredictionAnalyticsRow(BaseModel):
+    """Prediction counts for one model, period and label."""
+    model_id: Optional[int] = None
+    period: date
+    label: str
+    count: int
+    mean_probability: Optional[float] = None
+
+
 class DashboardSummary(BaseModel):
     """Dashboard summary response."""
     total_models: int
@@ -8,10 +8,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.services.db_service import get_db
+from app.services.executor_service import run_db, run_io
 from app.services.auth_service import (
     UserDB,
     UserRole,
-    authenticate_user,
+    verify_password,
+    get_password_hash,
     create_user,
     create_access_token,
     get_user_by_username,
@@ -99,7 +101,11 @@ async def login(
     """
     Authenticate user and return JWT token.
     """
-    user = authenticate_user(db, request.username, request.password)
+    # bcrypt runs in the I/O pool; only the lookup goes through run_db,
+    # which runs on the event loop for an async session
+    user = await run_db(db, get_user_by_username, request.username)
+    if user and not await run_io(verify_password, request.password, user.password):
+        user = None
     
     if not user:
         raise HTTPException(
@@ -130,7 +136,7 @@ async def register(
     Register a new user. Only SUPER_ADMIN can register new users.
     """
     # Check if username already exists
-    existing_user = get_user_by_username(db, request.username)
+    existing_user = await run_db(db, get_user_by_username, request.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -138,12 +144,14 @@ async def register(
         )
     
     # Create new user
-    new_user = create_user(
-        db=db,
+    password_hash = await run_io(get_password_hash, request.password)
+    new_user = await run_db(
+        db,
+        create_user,
         username=request.username,
         name=request.name,
-        password=request.password,
-        role=request.role
+        role=request.role,
+        password_hash=password_hash
     )
     
     return user_to_response(new_user)
@@ -165,7 +173,7 @@ async def list_users(
     """
     Get all users. Only SUPER_ADMIN can access this.
     """
-    users = get_all_users(db)
+    users = await run_db(db, get_all_users)
     return [user_to_response(user) for user in users]
 
 
@@ -192,11 +200,13 @@ async def update_my_profile(
             detail="Tidak ada data yang diubah"
         )
     
-    updated_user = update_user(
-        db=db,
+    password_hash = await run_io(get_password_hash, request.password) if request.password is not None else None
+    updated_user = await run_db(
+        db,
+        update_user,
         user_id=current_user.id,
         name=request.name,
-        password=request.password
+        password_hash=password_hash
     )
     
     return user_to_response(updated_user)
@@ -213,7 +223,7 @@ async def update_user_by_admin(
     Update any user. Only SUPER_ADMIN can access this.
     Special rules for superadmin account.
     """
-    target_user = get_user_by_id(db, user_id)
+    target_user = await run_db(db, get_user_by_id, user_id)
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -236,7 +246,7 @@ async def update_user_by_admin(
     
     # Check if new username already exists (if changing username)
     if request.username is not None and request.username != target_user.username:
-        existing_user = get_user_by_username(db, request.username)
+        existing_user = await run_db(db, get_user_by_username, request.username)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -249,13 +259,15 @@ async def update_user_by_admin(
             detail="Tidak ada data yang diubah"
         )
     
-    updated_user = update_user(
-        db=db,
+    password_hash = await run_io(get_password_hash, request.password) if request.password is not None else None
+    updated_user = await run_db(
+        db,
+        update_user,
         user_id=user_id,
         username=request.username,
         name=request.name,
-        password=request.password,
-        role=request.role
+        role=request.role,
+        password_hash=password_hash
     )
     
     return user_to_response(updated_user)
@@ -271,7 +283,7 @@ async def delete_user_by_admin(
     Delete a user. Only SUPER_ADMIN can access this.
     Cannot delete the main superadmin account.
     """
-    target_user = get_user_by_id(db, user_id)
+    target_user = await run_db(db, get_user_by_id, user_id)
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -292,7 +304,7 @@ async def delete_user_by_admin(
             detail="Tidak dapat menghapus akun sendiri"
         )
     
-    delete_user(db, user_id)
+    await run_db(db, delete_user, user_id)
     
     return MessageResponse(message="User berhasil dihapus")
 
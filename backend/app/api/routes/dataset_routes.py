@@ -2,91 +2,92 @@
 API routes for dataset management.
 """
 import os
-import io
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 import pandas as pd
 
 from sqlalchemy.orm import Session
 
 from app.api.models import DatasetMeta
 from app.services.db_service import (
-    get_db, create_dataset, get_dataset, get_all_datasets, delete_dataset
+    get_db, get_dataset, get_datasets_page, delete_dataset,
+    MAX_PAGE_SIZE
 )
 from app.services.ml_service import ml_service
+from app.services.executor_service import run_io, run_db
+from app.services.upload_service import receive_csv_upload, upload_openapi
+from app.services.dataset_service import store_dataset_upload
 
 
 router = APIRouter()
 
-UPLOADS_DIR = "app/uploads"
 
-
-@router.post("/datasets/upload", response_model=DatasetMeta)
+@router.post(
+    "/datasets/upload",
+    response_model=DatasetMeta,
+    openapi_extra=upload_openapi({"name": "string"})
+)
 async def upload_dataset(
-    file: UploadFile = File(...),
-    name: str = Form(None),
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Upload a dataset file (CSV).
     
-    - Validates CSV format and required columns
+    - Streams the file to disk, validating the header from the first chunk
+    - Returns the stored dataset instead if the same file was uploaded before
+    - Parses it once into a typed columnar cache for later reads
     - Saves file and metadata to database
     """
-    # Validate file type
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="File harus berformat CSV")
-    
-    # Read and validate CSV
-    try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
-    
-    # Validate columns
-    is_valid, error_msg = ml_service.validate_csv_columns(df, require_status=True)
-    if not is_valid:
-        raise HTTPException(status_code=400, detail=error_msg)
-    
-    # Generate filename and save
-    os.makedirs(UPLOADS_DIR, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"dataset_{timestamp}.csv"
-    file_path = os.path.join(UPLOADS_DIR, filename)
-    
-    with open(file_path, "wb") as f:
-        f.write(contents)
-    
-    # Save to database
-    dataset_name = name or file.filename
-    dataset = create_dataset(
-        db=db,
-        name=dataset_name,
-        file_path=file_path,
-        row_count=len(df)
+    # Stream to disk; wrong type, missing columns and oversize files fail early
+    upload = await receive_csv_upload(
+        request, lambda columns: ml_service.validate_columns(columns, require_status=True)
     )
+    dataset, _ = await store_dataset_upload(db, upload, upload.field("name"))
     
     return DatasetMeta(
         id=dataset.id,
         name=dataset.name,
         file_path=dataset.file_path,
         row_count=dataset.row_count,
+        content_hash=dataset.content_hash,
         uploaded_at=dataset.uploaded_at
     )
 
 
 @router.get("/datasets", response_model=List[DatasetMeta])
-async def list_datasets(db: Session = Depends(get_db)):
-    """Get all uploaded datasets."""
-    datasets = get_all_datasets(db)
+async def list_datasets(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    uploaded_from: Optional[datetime] = None,
+    uploaded_to: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get uploaded datasets, newest first.
+    
+    Without limit or cursor every dataset is returned, as before paging
+    was added. With either, one page is returned (DEFAULT_PAGE_SIZE if no
+    limit is given) and the cursor for the next page is in the
+    X-Next-Cursor header.
+    """
+    try:
+        datasets, next_cursor = await run_db(
+            db, get_datasets_page, limit, cursor, uploaded_from, uploaded_to
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [
         DatasetMeta(
             id=d.id,
             name=d.name,
             file_path=d.file_path,
             row_count=d.row_count,
+            content_hash=d.content_hash,
             uploaded_at=d.uploaded_at
         )
         for d in datasets
@@ -96,7 +97,7 @@ async def list_datasets(db: Session = Depends(get_db)):
 @router.get("/datasets/{dataset_id}", response_model=DatasetMeta)
 async def get_dataset_detail(dataset_id: int, db: Session = Depends(get_db)):
     """Get dataset details by ID."""
-    dataset = get_dataset(db, dataset_id)
+    dataset = await run_db(db, get_dataset, dataset_id)
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset tidak ditemukan")
     
@@ -105,6 +106,7 @@ async def get_dataset_detail(dataset_id: int, db: Session = Depends(get_db)):
         name=dataset.name,
         file_path=dataset.file_path,
         row_count=dataset.row_count,
+        content_hash=dataset.content_hash,
         uploaded_at=dataset.uploaded_at
     )
 
@@ -112,11 +114,11 @@ async def get_dataset_detail(dataset_id: int, db: Session = Depends(get_db)):
 @router.delete("/datasets/{dataset_id}")
 async def delete_dataset_endpoint(dataset_id: int, db: Session = Depends(get_db)):
     """Delete a dataset by ID."""
-    dataset = get_dataset(db, dataset_id)
+    dataset = await run_db(db, get_dataset, dataset_id)
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset tidak ditemukan")
     
-    success = delete_dataset(db, dataset_id)
+    success = await run_db(db, delete_dataset, dataset_id)
     if success:
         return {"message": "Dataset berhasil dihapus", "id": dataset_id}
     raise HTTPException(status_code=500, detail="Gagal menghapus dataset")
@@ -129,7 +131,7 @@ async def preview_dataset(
     db: Session = Depends(get_db)
 ):
     """Preview first N rows of a dataset."""
-    dataset = get_dataset(db, dataset_id)
+    dataset = await run_db(db, get_dataset, dataset_id)
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset tidak ditemukan")
     
@@ -137,7 +139,7 @@ async def preview_dataset(
         raise HTTPException(status_code=404, detail="File dataset tidak ditemukan")
     
     try:
-        df = pd.read_csv(dataset.file_path, nrows=limit)
+        df = await run_io(pd.read_csv, dataset.file_path, nrows=limit)
         return {
             "columns": df.columns.tolist(),
             "rows": df.to_dict(orient="records"),
@@ -4,30 +4,41 @@ API routes for model management.
 import os
 import json
 from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-import pandas as pd
+from typing import List, Optional, Union
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 import io
 
 from sqlalchemy.orm import Session
 
-from app.api.models import ModelMeta, ModelTrainResponse, ModelUpdateRequest, DashboardSummary, REQUIRED_COLUMNS
+from app.api.models import (
+    ModelMeta, ModelTrainResponse, ModelTrainFromDatasetRequest, ModelUpdateRequest,
+    DashboardSummary, TrainingJob, TrainingJobFromDatasetRequest, REQUIRED_COLUMNS
+)
 from app.services.db_service import (
-    get_db, create_model, get_model, get_all_models, update_model, delete_model,
-    get_latest_model, get_all_datasets, get_prediction_stats, get_status_distribution
+    TrainingJobDB, get_db, get_model, get_models_page, update_model, delete_model,
+    get_dataset, get_dashboard_summary, get_cached_dashboard_summary, create_training_job, get_training_job,
+    get_training_jobs_page, TRAINING_JOB_FINISHED, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 )
-from app.services.ml_service import ml_service
+from app.services.ml_service import ml_service, TRAINING_TUNE
+from app.services.executor_service import run_io, run_db
+from app.services.upload_service import SpooledUpload, receive_csv_upload, upload_openapi
+from app.services.dataset_service import find_stored_dataset, store_dataset_upload
+from app.services.training_jobs import training_jobs, TRAINING_SYNC_WAIT_S
 
 
 router = APIRouter()
 
 
-@router.post("/models/train", response_model=ModelTrainResponse)
+@router.post(
+    "/models/train",
+    response_model=ModelTrainResponse,
+    responses={202: {"model": TrainingJob, "description": "Training still running; poll the job"}},
+    openapi_extra=upload_openapi({"name": "string", "target_column": "string", "keep_dataset": "boolean"})
+)
 async def train_model(
-    file: UploadFile = File(...),
-    name: Optional[str] = Form(None),
-    target_column: str = Form("status"),
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -35,75 +46,313 @@ async def train_model(
     
     - Upload CSV file with required columns
     - Optionally provide model name
+    - An upload identical to a stored dataset trains on that dataset
+    - Otherwise the file is deleted after training, unless keep_dataset=true
+      stores it as a dataset for reuse with /models/train/dataset
     - Returns trained model metadata with accuracy metrics
+    - Training runs as a job in the training queue; if it takes longer
+      than TRAINING_SYNC_WAIT_S, the job is returned with 202 to poll at
+      /models/train/jobs/{job_id}
     """
-    # Validate file type
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="File harus berformat CSV")
-    
-    # Read CSV
+    # Stream to disk; wrong type, missing columns and oversize files fail early
+    upload = await receive_csv_upload(
+        request, lambda columns: ml_service.validate_columns(columns, require_status=True)
+    )
+    name = upload.field("name")
+    target_column = upload.field("target_column", "status")
+    filename = upload.filename
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
+        keep_dataset = upload.bool_field("keep_dataset")
+        dataset = await find_stored_dataset(db, upload.sha256)
+    except BaseException:
+        upload.remove()
+        raise
+    
+    if keep_dataset or dataset is not None:
+        # An identical stored dataset is used as is; otherwise keep_dataset stores the upload
+        if dataset is None:
+            dataset, _ = await store_dataset_upload(db, upload)
+        else:
+            upload.remove()
+        return await _train_as_job(db, dataset.file_path, dataset.id, name, target_column, filename)
+    
+    # The queue deletes the upload once the job is finished
+    return await _train_as_job(db, upload.path, None, name, target_column, filename, upload=upload)
+
+
+@router.post(
+    "/models/train/dataset",
+    response_model=ModelTrainResponse,
+    responses={202: {"model": TrainingJob, "description": "Training still running; poll the job"}}
+)
+async def train_model_from_dataset(
+    request: ModelTrainFromDatasetRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Train a new CART model on a stored dataset.
     
-    # Validate columns
-    is_valid, error_msg = ml_service.validate_csv_columns(df, require_status=True)
-    if not is_valid:
-        raise HTTPException(status_code=400, detail=error_msg)
+    The dataset is read from its columnar cache, so nothing is uploaded
+    or parsed again. Like /models/train, this waits for a training job.
+    """
+    dataset = await run_db(db, get_dataset, request.dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset tidak ditemukan")
+    if not dataset.file_path or not os.path.exists(dataset.file_path):
+        raise HTTPException(status_code=404, detail="File dataset tidak ditemukan")
     
-    # Generate model name if not provided
-    if not name:
-        name = f"model-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    return await _train_as_job(db, dataset.file_path, dataset.id, request.name, "status", dataset.name)
+
+
+async def _train_as_job(
+    db: Session,
+    csv_path: str,
+    dataset_id: Optional[int],
+    name: Optional[str],
+    target_column: str,
+    dataset_path: Optional[str],
+    upload: Optional[SpooledUpload] = None
+) -> Union[ModelTrainResponse, JSONResponse]:
+    """
+    Train on a CSV file through the training job queue and wait for the model.
     
-    # Train model
+    The fit counts against the same concurrency cap as jobs submitted to
+    /models/train/jobs; the request only waits for it. A fit that takes
+    longer than TRAINING_SYNC_WAIT_S keeps running, and its job is
+    returned with 202 instead of the model.
+    
+    Args:
+        upload: Upload not kept as a dataset, deleted once the job is finished
+    """
     try:
-        result = ml_service.train_model(df, name, target_column)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gagal melatih model: {str(e)}")
-    
-    # Save to database
-    model_record = create_model(
-        db=db,
-        name=name,
-        file_path=result["file_path"],
-        accuracy=result["accuracy"],
-        metrics=result["metrics"],
-        dataset_path=file.filename
-    )
+        job = await run_db(
+            db, create_training_job, name or _default_model_name(), csv_path,
+            dataset_id=dataset_id, dataset_path=dataset_path, target_column=target_column
+        )
+    except BaseException:
+        if upload is not None:
+            upload.remove()
+        raise
+    training_jobs.submit(job.id, remove_file=upload.path if upload is not None else None)
+    
+    job = await training_jobs.wait(job.id, TRAINING_SYNC_WAIT_S)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error or "Gagal melatih model")
+    if job.status == "cancelled":
+        raise HTTPException(status_code=409, detail="Job pelatihan dibatalkan")
+    if job.status != "succeeded":
+        return JSONResponse(status_code=202, content=jsonable_encoder(_training_job_response(job)))
     
+    model_record = await run_db(db, get_model, job.model_id)
+    if not model_record:
+        raise HTTPException(status_code=404, detail="Model tidak ditemukan")
     return ModelTrainResponse(
         id=model_record.id,
         name=model_record.name,
-        accuracy=result["accuracy"],
-        metrics=result["metrics"],
+        accuracy=model_record.accuracy,
+        metrics=json.loads(model_record.metrics) if model_record.metrics else {},
+        dataset_id=model_record.dataset_id,
         created_at=model_record.created_at.strftime("%Y-%m-%d %H:%M:%S")
     )
 
 
+def _default_model_name() -> str:
+    """Generate a model name from the current time."""
+    return f"model-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+
+def _training_job_response(job: TrainingJobDB) -> TrainingJob:
+    """Build the API view of a training job."""
+    duration = None
+    if job.started_at:
+        duration = round(((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds(), 3)
+    return TrainingJob(
+        id=job.id,
+        name=job.name,
+        status=job.status,
+        progress=job.progress,
+        stage=job.stage,
+        dataset_id=job.dataset_id,
+        tune=bool(job.tune),
+        model_id=job.model_id,
+        error=job.error,
+        cancel_requested=bool(job.cancel_requested),
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        duration_seconds=duration
+    )
+
+
+@router.post(
+    "/models/train/jobs",
+    response_model=TrainingJob,
+    status_code=202,
+    openapi_extra=upload_openapi({"name": "string", "target_column": "string", "tune": "boolean"})
+)
+async def submit_training_job(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a training job on an uploaded CSV dataset.
+    
+    Returns immediately with the job; poll /models/train/jobs/{job_id}
+    for its progress. Set tune=true to pick hyperparameters by
+    cross-validated search; the search report is saved in the model's
+    metrics. The model is saved once the job succeeds and its
+    ID is reported as model_id.
+    """
+    upload = await receive_csv_upload(
+        request, lambda columns: ml_service.validate_columns(columns, require_status=True)
+    )
+    name = upload.field("name") or _default_model_name()
+    target_column = upload.field("target_column", "status")
+    tune = upload.bool_field("tune", TRAINING_TUNE)
+    filename = upload.filename
+    
+    dataset, _ = await store_dataset_upload(db, upload)
+    job = await run_db(
+        db, create_training_job, name, dataset.file_path,
+        dataset_id=dataset.id, dataset_path=filename, target_column=target_column, tune=tune
+    )
+    training_jobs.submit(job.id)
+    return _training_job_response(job)
+
+
+@router.post("/models/train/jobs/dataset", response_model=TrainingJob, status_code=202)
+async def submit_training_job_from_dataset(
+    request: TrainingJobFromDatasetRequest,
+    db: Session = Depends(get_db)
+):
+    """Queue a training job on a stored dataset."""
+    dataset = await run_db(db, get_dataset, request.dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset tidak ditemukan")
+    if not dataset.file_path or not os.path.exists(dataset.file_path):
+        raise HTTPException(status_code=404, detail="File dataset tidak ditemukan")
+    
+    job = await run_db(
+        db, create_training_job, request.name or _default_model_name(), dataset.file_path,
+        dataset_id=dataset.id, dataset_path=dataset.name,
+        tune=TRAINING_TUNE if request.tune is None else request.tune
+    )
+    training_jobs.submit(job.id)
+    return _training_job_response(job)
+
+
+@router.get("/models/train/jobs", response_model=List[TrainingJob])
+async def list_training_jobs(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get training jobs, newest first, one page at a time.
+    
+    The cursor for the next page is returned in the X-Next-Cursor header;
+    it is absent on the last page.
+    """
+    try:
+        jobs, next_cursor = await run_db(db, get_training_jobs_page, limit, cursor, status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_training_job_response(job) for job in jobs]
+
+
+@router.get("/models/train/jobs/stats")
+async def get_training_job_stats():
+    """Get training queue counters for this worker."""
+    return training_jobs.stats()
+
+
+@router.get("/models/train/jobs/{job_id}", response_model=TrainingJob)
+async def get_training_job_detail(job_id: int, db: Session = Depends(get_db)):
+    """Get a training job's status, progress and timing."""
+    job = await run_db(db, get_training_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job pelatihan tidak ditemukan")
+    return _training_job_response(job)
+
+
+@router.post("/models/train/jobs/{job_id}/cancel", response_model=TrainingJob)
+async def cancel_training_job(job_id: int, response: Response, db: Session = Depends(get_db)):
+    """
+    Cancel a queued or running training job.
+    
+    Returns 200 once the job is cancelled, or 202 if the worker running it
+    has not stopped it yet; it will, and the job can be polled meanwhile.
+    """
+    job = await run_db(db, get_training_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job pelatihan tidak ditemukan")
+    if job.status in TRAINING_JOB_FINISHED:
+        raise HTTPException(status_code=409, detail="Job pelatihan sudah selesai")
+    
+    cancelled = await training_jobs.cancel(job_id)
+    if cancelled is None:
+        raise HTTPException(status_code=409, detail="Job pelatihan sudah selesai")
+    if cancelled.status == "running":
+        response.status_code = 202
+    return _training_job_response(cancelled)
+
+
 @router.get("/models", response_model=List[ModelMeta])
-async def list_models(db: Session = Depends(get_db)):
-    """Get all trained models."""
-    models = get_all_models(db)
+async def list_models(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    include_metrics: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Get trained models, newest first.
+    
+    Without limit or cursor every model is returned, as before paging was
+    added. With either, one page is returned (DEFAULT_PAGE_SIZE if no limit
+    is given) and the cursor for the next page is in the X-Next-Cursor
+    header; it is absent on the last page.
+    """
+    try:
+        models, next_cursor = await run_db(
+            db, get_models_page, limit, cursor, created_from, created_to, include_metrics
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
     result = []
     for model in models:
-        metrics = json.loads(model.metrics) if model.metrics else None
+        metrics = json.loads(model.metrics) if include_metrics and model.metrics else None
         result.append(ModelMeta(
             id=model.id,
             name=model.name,
             accuracy=model.accuracy,
             metrics=metrics,
             dataset_path=model.dataset_path,
+            dataset_id=model.dataset_id,
             created_at=model.created_at
         ))
     return result
 
 
+@router.get("/models/cache/stats")
+async def get_model_cache_stats():
+    """Get model cache hit/miss/eviction and load-time counters."""
+    return ml_service.get_cache_stats()
+
+
 @router.get("/models/{model_id}", response_model=ModelMeta)
 async def get_model_detail(model_id: int, db: Session = Depends(get_db)):
     """Get model details by ID."""
-    model = get_model(db, model_id)
+    model = await run_db(db, get_model, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model tidak ditemukan")
     
@@ -111,7 +360,7 @@ async def get_model_detail(model_id: int, db: Session = Depends(get_db)):
     
     # Get feature importance
     try:
-        feature_importance = ml_service.get_feature_importance(model_id, model.file_path)
+        feature_importance = await run_io(ml_service.get_feature_importance, model_id, model.file_path)
         if metrics:
             metrics["feature_importance"] = feature_importance
     except:
@@ -123,6 +372,7 @@ async def get_model_detail(model_id: int, db: Session = Depends(get_db)):
         accuracy=model.accuracy,
         metrics=metrics,
         dataset_path=model.dataset_path,
+        dataset_id=model.dataset_id,
         created_at=model.created_at
     )
 
@@ -134,13 +384,14 @@ async def update_model_endpoint(
     db: Session = Depends(get_db)
 ):
     """Update a model's name."""
-    model = get_model(db, model_id)
+    model = await run_db(db, get_model, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model tidak ditemukan")
     
-    updated_model = update_model(db, model_id, request.name)
+    updated_model = await run_db(db, update_model, model_id, request.name)
     if not updated_model:
         raise HTTPException(status_code=500, detail="Gagal memperbarui model")
+    ml_service.invalidate_model(model_id)
     
     metrics = json.loads(updated_model.metrics) if updated_model.metrics else None
     
@@ -150,6 +401,7 @@ async def update_model_endpoint(
         accuracy=updated_model.accuracy,
         metrics=metrics,
         dataset_path=updated_model.dataset_path,
+        dataset_id=updated_model.dataset_id,
         created_at=updated_model.created_at
     )
 
@@ -157,11 +409,12 @@ async def update_model_endpoint(
 @router.delete("/models/{model_id}")
 async def delete_model_endpoint(model_id: int, db: Session = Depends(get_db)):
     """Delete a model by ID."""
-    model = get_model(db, model_id)
+    model = await run_db(db, get_model, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model tidak ditemukan")
     
-    success = delete_model(db, model_id)
+    success = await run_db(db, delete_model, model_id)
+    ml_service.invalidate_model(model_id)
     if success:
         return {"message": "Model berhasil dihapus", "id": model_id}
     raise HTTPException(status_code=500, detail="Gagal menghapus model")
@@ -184,22 +437,10 @@ async def download_csv_template():
 
 
 @router.get("/dashboard/summary", response_model=DashboardSummary)
-async def get_dashboard_summary(db: Session = Depends(get_db)):
+async def get_dashboard_summary_endpoint(db: Session = Depends(get_db)):
     """Get dashboard summary statistics."""
-    # Get counts
-    models = get_all_models(db)
-    datasets = get_all_datasets(db)
-    latest_model = get_latest_model(db)
-    
-    # Get prediction stats
-    prediction_stats = get_prediction_stats(db)
-    status_distribution = get_status_distribution(db)
-    
-    return DashboardSummary(
-        total_models=len(models),
-        total_datasets=len(datasets),
-        latest_model_accuracy=latest_model.accuracy if latest_model else None,
-        status_distribution=status_distribution,
-        prediction_stats=prediction_stats
-    )
-
+    # A fresh cached summary is served without a trip to the I/O pool
+    summary = get_cached_dashboard_summary()
+    if summary is None:
+        summary = await run_db(db, get_dashboard_summary)
+    return DashboardSummary(**summary)
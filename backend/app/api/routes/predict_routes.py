@@ -1,9 +1,10 @@
 """
 API routes for predictions.
 """
-import io
-from typing import Optional
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Query
+import json
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from fastapi.responses import StreamingResponse
 import pandas as pd
 
@@ -11,15 +12,180 @@ from sqlalchemy.orm import Session
 
 from app.api.models import (
     PredictRequest, PredictResponse, BatchPredictResponse,
-    BatchPredictResult, FEATURE_COLUMNS
+    BatchPredictResult, PredictionRecord, PredictionAnalyticsRow, FEATURE_COLUMNS
+)
+from app.services.db_service import (
+    get_db, get_model, create_predictions_bulk, get_predictions_page, prediction_input, SessionLocal,
+    get_prediction_analytics, ANALYTICS_BUCKETS,
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+from app.services.ml_service import ml_service, predict_batch_task, PREDICT_CHUNK_ROWS
+from app.services.prediction_batcher import prediction_batcher
+from app.services.prediction_log import prediction_log
+from app.services.executor_service import run_io, run_db, run_cpu, CPU_OFFLOAD_MIN_ROWS
+from app.services.upload_service import (
+    PREDICT_UPLOAD_MAX_MB, SpooledUpload, receive_csv_upload, upload_openapi
 )
-from app.services.db_service import get_db, get_model, create_prediction
-from app.services.ml_service import ml_service
 
 
 router = APIRouter()
 
 
+def _validate_batch_columns(columns: List[str]) -> Tuple[bool, str]:
+    """Validate a batch CSV header: nama plus every feature column."""
+    if "nama" not in columns:
+        return False, "Kolom 'nama' tidak ditemukan. Pastikan file CSV memiliki kolom 'nama' untuk identifikasi siswa"
+    
+    # Status is not required for prediction
+    return ml_service.validate_columns(columns, require_status=False)
+
+
+async def _whole_file_medians(
+    medians: Optional[Dict[str, float]],
+    df: pd.DataFrame,
+    csv_path: str
+) -> Optional[Dict[str, float]]:
+    """
+    Get the fill medians of the whole file once a chunk has gaps to fill.
+    
+    The medians pass reads the entire file, so it only runs when a chunk
+    actually needs filling; files without gaps stream with no extra pass.
+    """
+    if medians is None and await run_io(ml_service.has_feature_gaps, df):
+        medians = await run_io(ml_service.feature_medians, csv_path)
+    return medians
+
+
+def _prediction_csv(
+    model_id: int,
+    file_path: str,
+    df: pd.DataFrame,
+    header: bool,
+    medians: Optional[Dict[str, float]]
+) -> bytes:
+    """Score one CSV chunk and render it with the prediction columns."""
+    labels, probabilities = ml_service.score_frame(model_id, file_path, df, medians)
+    
+    # Reorder columns: nama, kode_unik (if exists), then other columns
+    cols_order = ["nama"]
+    if "kode_unik" in df.columns:
+        cols_order.append("kode_unik")
+    
+    # Add predictions to dataframe
+    df["prediksi"] = labels
+    df["probabilitas_berprestasi"] = [p.get("berprestasi", 0) for p in probabilities]
+    df["probabilitas_tidak_berprestasi"] = [p.get("tidak_berprestasi", 0) for p in probabilities]
+    
+    # Reorder columns for better readability
+    other_cols = [c for c in df.columns if c not in cols_order]
+    return df[cols_order + other_cols].to_csv(index=False, header=header).encode("utf-8")
+
+
+async def _stream_prediction_csv(
+    reader,
+    first_chunk: bytes,
+    model_id: int,
+    file_path: str,
+    medians: Optional[Dict[str, float]],
+    upload: SpooledUpload
+):
+    """Yield the scored CSV chunk by chunk, parsing each next chunk off the event loop."""
+    try:
+        yield first_chunk
+        while True:
+            df = await run_io(next, reader, None)
+            if df is None:
+                break
+            medians = await _whole_file_medians(medians, df, upload.path)
+            yield await run_io(_prediction_csv, model_id, file_path, df, False, medians)
+    finally:
+        reader.close()
+        upload.remove()
+
+
+async def _score_batch(
+    model_id: int,
+    file_path: str,
+    df: pd.DataFrame,
+    offset: int = 0,
+    medians: Optional[Dict[str, float]] = None
+) -> list:
+    """Score a batch DataFrame and attach the student identity to each result."""
+    # Extract nama and kode_unik (opsional) before prediction
+    nama_list = df["nama"].fillna("").astype(str).tolist()
+    kode_unik_list = df["kode_unik"].fillna("").astype(str).tolist() if "kode_unik" in df.columns else [""] * len(df)
+    
+    # Large batches are scored in the process pool
+    if len(df) >= CPU_OFFLOAD_MIN_ROWS:
+        results = await run_cpu(predict_batch_task, model_id, file_path, df, medians)
+    else:
+        results = await run_io(ml_service.predict_batch, model_id, file_path, df, medians)
+    
+    # Same field order as BatchPredictResult
+    return [
+        {
+            "row_index": offset + i,
+            "nama": nama_list[i],
+            "kode_unik": kode_unik_list[i],
+            "input_data": result["input_data"],
+            "prediction": result["prediction"],
+            "probability": result["probability"]
+        }
+        for i, result in enumerate(results)
+    ]
+
+
+def _ndjson_lines(records: list) -> bytes:
+    """Render records as newline-delimited JSON."""
+    return "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+
+
+async def _stream_batch_ndjson(
+    reader,
+    results: list,
+    model_id: int,
+    file_path: str,
+    medians: Optional[Dict[str, float]],
+    upload: SpooledUpload
+):
+    """
+    Yield scored batch results chunk by chunk as NDJSON, ending with a summary line.
+    
+    Each chunk is saved before it is sent, so every row a client has
+    received is in the prediction log. A client that disconnects mid-stream
+    leaves the chunks it received saved and the rest of the file unscored.
+    """
+    # The request session may already be closed while the body streams
+    db = SessionLocal()
+    total_count = 0
+    berprestasi_count = 0
+    try:
+        while True:
+            await run_db(db, create_predictions_bulk, model_id, results)
+            yield await run_io(_ndjson_lines, results)
+            total_count += len(results)
+            berprestasi_count += sum(1 for r in results if r["prediction"] == "berprestasi")
+            
+            df = await run_io(next, reader, None)
+            if df is None:
+                break
+            medians = await _whole_file_medians(medians, df, upload.path)
+            results = await _score_batch(model_id, file_path, df, offset=total_count, medians=medians)
+        
+        yield _ndjson_lines([{
+            "type": "summary",
+            "total_count": total_count,
+            "berprestasi_count": berprestasi_count,
+            "tidak_berprestasi_count": total_count - berprestasi_count
+        }])
+    except Exception as e:
+        yield _ndjson_lines([{"type": "error", "detail": f"Gagal melakukan prediksi batch: {str(e)}"}])
+    finally:
+        reader.close()
+        upload.remove()
+        db.close()
+
+
 @router.post("/predict", response_model=PredictResponse)
 async def predict_single(
     request: PredictRequest,
@@ -32,7 +198,7 @@ async def predict_single(
     Returns prediction label and probabilities.
     """
     # Get model
-    model = get_model(db, request.model_id)
+    model = await run_db(db, get_model, request.model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model tidak ditemukan")
     
@@ -56,15 +222,14 @@ async def predict_single(
     
     # Make prediction
     try:
-        result = ml_service.predict(request.model_id, model.file_path, features)
+        result = await prediction_batcher.predict(request.model_id, model.file_path, features)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File model tidak ditemukan")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gagal melakukan prediksi: {str(e)}")
     
-    # Save prediction to database
-    create_prediction(
-        db=db,
+    # Queue the prediction for saving; the response does not wait on the database
+    await prediction_log.submit(
         model_id=request.model_id,
         input_data=features,
         prediction=result["prediction"],
@@ -78,10 +243,76 @@ async def predict_single(
     )
 
 
-@router.post("/predict/batch", response_model=BatchPredictResponse)
+@router.get("/predictions", response_model=List[PredictionRecord])
+async def list_predictions(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    model_id: Optional[int] = None,
+    label: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    include_input: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Get saved predictions, newest first, one page at a time.
+    
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        predictions, next_cursor = await run_db(
+            db, get_predictions_page, limit, cursor, model_id, label,
+            created_from, created_to, include_input
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return [
+        PredictionRecord(
+            id=p.id,
+            model_id=p.model_id,
+            input_data=prediction_input(p) if include_input else None,
+            prediction=p.prediction,
+            probability=json.loads(p.probability) if p.probability else None,
+            created_at=p.created_at
+        )
+        for p in predictions
+    ]
+
+
+@router.get("/predictions/analytics", response_model=List[PredictionAnalyticsRow])
+async def get_predictions_analytics(
+    bucket: str = Query("week", pattern=f"^({'|'.join(ANALYTICS_BUCKETS)})$"),
+    model_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Get prediction counts and mean probability per model, day/week/month and label."""
+    return await run_db(db, get_prediction_analytics, bucket, model_id, date_from, date_to)
+
+
+@router.get("/predict/stats")
+async def get_predict_stats():
+    """Get prediction batching, result cache and write-behind log counters."""
+    return {
+        "batcher": prediction_batcher.stats(),
+        "prediction_cache": ml_service.get_prediction_cache_stats(),
+        "prediction_log": prediction_log.stats()
+    }
+
+
+@router.post(
+    "/predict/batch",
+    response_model=BatchPredictResponse,
+    openapi_extra=upload_openapi({"model_id": "integer"}, required=("model_id",))
+)
 async def predict_batch(
-    file: UploadFile = File(...),
-    model_id: int = Form(...),
+    request: Request,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
     db: Session = Depends(get_db)
 ):
     """
@@ -90,61 +321,47 @@ async def predict_batch(
     - Upload CSV with feature columns (status column optional)
     - Requires 'nama' and 'kode_unik' columns for student identification
     - Returns list of predictions for each row
+    
+    With ?format=ndjson the results are streamed as newline-delimited JSON,
+    one result object per line as soon as its chunk is scored and saved,
+    followed by a {"type": "summary", ...} line with the counts. A failure
+    after the stream has started ends it with a {"type": "error", "detail": ...}
+    line. Missing grades are filled with whole-file medians in both formats;
+    when streaming, the pass that takes them runs only once a chunk with
+    gaps is reached.
     """
-    # Validate file type
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="File harus berformat CSV")
+    # Stream to disk; wrong type, missing columns and oversize files fail early
+    upload = await receive_csv_upload(request, _validate_batch_columns, max_mb=PREDICT_UPLOAD_MAX_MB)
     
-    # Get model
-    model = get_model(db, model_id)
-    if not model:
-        raise HTTPException(status_code=404, detail="Model tidak ditemukan")
+    if response_format == "ndjson":
+        return await _predict_batch_ndjson(upload, db)
     
-    # Read CSV
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
-    
-    # Validate required identity columns (nama wajib, kode_unik opsional)
-    if "nama" not in df.columns:
-        raise HTTPException(
-            status_code=400, 
-            detail="Kolom 'nama' tidak ditemukan. Pastikan file CSV memiliki kolom 'nama' untuk identifikasi siswa"
-        )
-    
-    # Validate feature columns (status not required for prediction)
-    is_valid, error_msg = ml_service.validate_csv_columns(df, require_status=False)
-    if not is_valid:
-        raise HTTPException(status_code=400, detail=error_msg)
-    
-    # Extract nama and kode_unik (opsional) before prediction
-    nama_list = df["nama"].fillna("").astype(str).tolist()
-    kode_unik_list = df["kode_unik"].fillna("").astype(str).tolist() if "kode_unik" in df.columns else [""] * len(df)
+        model_id = upload.int_field("model_id")
+        
+        # Get model
+        model = await run_db(db, get_model, model_id)
+        if not model:
+            raise HTTPException(status_code=404, detail="Model tidak ditemukan")
+        
+        # Read CSV
+        try:
+            df = await run_io(pd.read_csv, upload.path)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
+    finally:
+        upload.remove()
     
     # Make predictions
     try:
-        results = ml_service.predict_batch(model_id, model.file_path, df)
+        results = await _score_batch(model_id, model.file_path, df)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File model tidak ditemukan")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gagal melakukan prediksi batch: {str(e)}")
     
-    # Add nama and kode_unik to results
-    for i, result in enumerate(results):
-        result["nama"] = nama_list[i]
-        result["kode_unik"] = kode_unik_list[i]
-    
     # Save predictions to database
-    for result in results:
-        create_prediction(
-            db=db,
-            model_id=model_id,
-            input_data=result["input_data"],
-            prediction=result["prediction"],
-            probability=result["probability"]
-        )
+    await run_db(db, create_predictions_bulk, model_id, results)
     
     # Calculate statistics
     berprestasi_count = sum(1 for r in results if r["prediction"] == "berprestasi")
@@ -158,72 +375,106 @@ async def predict_batch(
     )
 
 
-@router.post("/predict/batch/download")
+async def _predict_batch_ndjson(upload: SpooledUpload, db: Session) -> StreamingResponse:
+    """Validate and score the first chunk of a batch, then stream the rest as NDJSON."""
+    reader = None
+    try:
+        model_id = upload.int_field("model_id")
+        
+        # Get model
+        model = await run_db(db, get_model, model_id)
+        if not model:
+            raise HTTPException(status_code=404, detail="Model tidak ditemukan")
+        
+        # Read CSV in chunks; only the first chunk (and the fill medians,
+        # if it has gaps) is computed before responding
+        try:
+            reader = await run_io(pd.read_csv, upload.path, chunksize=PREDICT_CHUNK_ROWS)
+            df = await run_io(next, reader, None)
+            if df is not None:
+                medians = await _whole_file_medians(None, df, upload.path)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
+        if df is None:
+            raise HTTPException(status_code=400, detail="File CSV tidak berisi data")
+        
+        # Score the first chunk up front so model errors still get a proper status
+        try:
+            results = await _score_batch(model_id, model.file_path, df, medians=medians)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="File model tidak ditemukan")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Gagal melakukan prediksi batch: {str(e)}")
+    except BaseException:
+        if reader is not None:
+            reader.close()
+        upload.remove()
+        raise
+    
+    return StreamingResponse(
+        _stream_batch_ndjson(reader, results, model_id, model.file_path, medians, upload),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post(
+    "/predict/batch/download",
+    openapi_extra=upload_openapi({"model_id": "integer"}, required=("model_id",))
+)
 async def predict_batch_download(
-    file: UploadFile = File(...),
-    model_id: int = Form(...),
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Make batch predictions and return results as CSV download.
     Requires 'nama' column, 'kode_unik' is optional.
-    """
-    # Validate file type
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="File harus berformat CSV")
     
-    # Get model
-    model = get_model(db, model_id)
-    if not model:
-        raise HTTPException(status_code=404, detail="Model tidak ditemukan")
+    The CSV is parsed, scored and streamed in chunks of PREDICT_CHUNK_ROWS
+    rows, so the first rows go out once the first chunk is scored. Missing
+    grades are filled with the median of the whole column, so the output
+    matches /predict/batch. Taking those medians reads the whole file once
+    more, so it is done only when the first chunk with gaps is reached,
+    and that chunk waits for it; files without gaps need no extra pass.
+    """
+    # Stream to disk; wrong type, missing columns and oversize files fail early
+    upload = await receive_csv_upload(request, _validate_batch_columns, max_mb=PREDICT_UPLOAD_MAX_MB)
     
-    # Read CSV
+    reader = None
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
-    
-    # Validate required identity columns (nama wajib)
-    if "nama" not in df.columns:
-        raise HTTPException(
-            status_code=400, 
-            detail="Kolom 'nama' tidak ditemukan. Pastikan file CSV memiliki kolom 'nama' untuk identifikasi siswa"
-        )
-    
-    # Validate columns
-    is_valid, error_msg = ml_service.validate_csv_columns(df, require_status=False)
-    if not is_valid:
-        raise HTTPException(status_code=400, detail=error_msg)
-    
-    # Make predictions
-    try:
-        results = ml_service.predict_batch(model_id, model.file_path, df)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gagal melakukan prediksi: {str(e)}")
-    
-    # Reorder columns: nama, kode_unik (if exists), then other columns
-    cols_order = ["nama"]
-    if "kode_unik" in df.columns:
-        cols_order.append("kode_unik")
-    
-    # Add predictions to dataframe
-    df["prediksi"] = [r["prediction"] for r in results]
-    df["probabilitas_berprestasi"] = [r["probability"].get("berprestasi", 0) for r in results]
-    df["probabilitas_tidak_berprestasi"] = [r["probability"].get("tidak_berprestasi", 0) for r in results]
-    
-    # Reorder columns for better readability
-    other_cols = [c for c in df.columns if c not in cols_order]
-    df = df[cols_order + other_cols]
-    
-    # Convert to CSV
-    output = io.BytesIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
+        model_id = upload.int_field("model_id")
+        
+        # Get model
+        model = await run_db(db, get_model, model_id)
+        if not model:
+            raise HTTPException(status_code=404, detail="Model tidak ditemukan")
+        
+        # Read CSV in chunks; only the first chunk (and the fill medians,
+        # if it has gaps) is computed before responding
+        try:
+            reader = await run_io(pd.read_csv, upload.path, chunksize=PREDICT_CHUNK_ROWS)
+            df = await run_io(next, reader, None)
+            if df is not None:
+                medians = await _whole_file_medians(None, df, upload.path)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
+        if df is None:
+            raise HTTPException(status_code=400, detail="File CSV tidak berisi data")
+        
+        # Score the first chunk up front so model errors still get a proper status
+        try:
+            first_chunk = await run_io(_prediction_csv, model_id, model.file_path, df, True, medians)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Gagal melakukan prediksi: {str(e)}")
+    except BaseException:
+        if reader is not None:
+            reader.close()
+        upload.remove()
+        raise
     
+    # Later chunks are parsed, scored and sent one at a time, so memory
+    # stays bounded by the chunk size instead of the file size
     return StreamingResponse(
-        output,
+        _stream_prediction_csv(reader, first_chunk, model_id, model.file_path, medians, upload),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=hasil_prediksi.csv"}
     )
-
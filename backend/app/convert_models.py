@@ -0,0 +1,128 @@
+"""
+Convert existing .joblib models to side-car artifacts and compare formats.
+
+Usage (from the backend directory):
+    python -m app.convert_models                 # convert models missing a side-car
+    python -m app.convert_models --force         # rewrite every side-car
+    python -m app.convert_models --benchmark     # also compare size and load time
+"""
+import os
+import glob
+import time
+import argparse
+import tempfile
+import statistics
+from typing import Any, Callable, Dict, List
+
+import joblib
+
+from app.services.ml_service import ml_service
+from app.services.model_artifact import artifact_path_for, load_artifact
+from app.services.tree_engine import CompiledTree
+
+
+def _median_seconds(func: Callable[[], Any], repeat: int) -> float:
+    """Median wall time of several calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def _open_artifact(path: str) -> CompiledTree:
+    """Load an artifact the way the inference path does."""
+    arrays, meta = load_artifact(path)
+    return CompiledTree(
+        feature=arrays["feature"],
+        threshold=arrays["threshold"],
+        children_left=arrays["children_left"],
+        children_right=arrays["children_right"],
+        proba=arrays["proba"],
+        classes=meta["classes"]
+    )
+
+
+def benchmark_model(file_path: str, repeat: int = 20) -> Dict[str, Any]:
+    """
+    Compare file size and load time of a model in each format.
+
+    Args:
+        file_path: Path to a .joblib model with a current side-car
+        repeat: Loads per format; the median is reported
+
+    Returns:
+        Sizes in bytes and load times in milliseconds
+    """
+    artifact_path = artifact_path_for(file_path)
+    model_data = joblib.load(file_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compressed_path = os.path.join(tmp, "model.joblib")
+        joblib.dump(model_data, compressed_path, compress=3)
+        compressed_size = os.path.getsize(compressed_path)
+        compressed_seconds = _median_seconds(lambda: joblib.load(compressed_path), repeat)
+
+    return {
+        "model": os.path.basename(file_path),
+        "nodes": int(model_data["model"].tree_.node_count),
+        "joblib_bytes": os.path.getsize(file_path),
+        "joblib_ms": _median_seconds(lambda: joblib.load(file_path), repeat) * 1000,
+        "joblib_compressed_bytes": compressed_size,
+        "joblib_compressed_ms": compressed_seconds * 1000,
+        "artifact_bytes": os.path.getsize(artifact_path),
+        "artifact_ms": _median_seconds(lambda: _open_artifact(artifact_path), repeat) * 1000
+    }
+
+
+def _print_report(rows: List[Dict[str, Any]]) -> None:
+    """Print benchmark rows as a table."""
+    header = (
+        f"{'model':<40} {'nodes':>6} {'joblib':>16} {'joblib (zlib 3)':>18} {'artifact':>16}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['model'][:40]:<40} {row['nodes']:>6} "
+            f"{row['joblib_bytes'] / 1024:>6.1f}K {row['joblib_ms']:>6.2f}ms "
+            f"{row['joblib_compressed_bytes'] / 1024:>8.1f}K {row['joblib_compressed_ms']:>6.2f}ms "
+            f"{row['artifact_bytes'] / 1024:>6.1f}K {row['artifact_ms']:>6.3f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write side-car artifacts for existing models.")
+    parser.add_argument("models_dir", nargs="?", default=ml_service.models_dir, help="Directory with .joblib models")
+    parser.add_argument("--force", action="store_true", help="Rewrite side-cars that are already current")
+    parser.add_argument("--benchmark", action="store_true", help="Compare size and load time per format")
+    parser.add_argument("--repeat", type=int, default=20, help="Loads per format when benchmarking")
+    args = parser.parse_args()
+
+    rows = []
+    for file_path in sorted(glob.glob(os.path.join(args.models_dir, "*.joblib"))):
+        name = os.path.basename(file_path)
+        if args.force or not ml_service.has_current_artifact(file_path):
+            try:
+                artifact_path = ml_service.convert_model(file_path)
+            except Exception as e:
+                print(f"{name}: failed ({e})")
+                continue
+            if artifact_path is None:
+                print(f"{name}: skipped, compiled tree does not match sklearn")
+                continue
+            print(f"{name}: wrote {os.path.basename(artifact_path)}")
+        else:
+            print(f"{name}: up to date")
+
+        if args.benchmark:
+            rows.append(benchmark_model(file_path, args.repeat))
+
+    if rows:
+        print()
+        _print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
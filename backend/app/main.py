@@ -2,16 +2,25 @@
 Main FastAPI application for CART-based student achievement prediction.
 """
 import os
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
 from app.api.routes import model_routes, predict_routes, dataset_routes, auth_routes
-from app.services.db_service import init_db
+from app.services.db_service import init_db, async_engine
 from app.services.auth_service import seed_super_admin, UserDB
+from app.services.warmup_service import warm_up_models, warmup_state
+from app.services.executor_service import run_io, shutdown_executors
+from app.services.prediction_log import prediction_log
+from app.services.training_jobs import training_jobs
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="CART Student Achievement Prediction API",
     description="API untuk menentukan siswa berprestasi menggunakan metode CART",
@@ -25,6 +34,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -43,6 +53,34 @@ async def startup_event():
     os.makedirs("app/uploads", exist_ok=True)
     # Seed super admin user
     seed_super_admin()
+    # Start the write-behind prediction log
+    prediction_log.start()
+    # Resume training jobs left queued by the last shutdown
+    await training_jobs.start()
+    # Warm models in the background; /ready reports when this is done
+    app.state.warmup_task = asyncio.ensure_future(run_io(warm_up_models))
+    app.state.warmup_task.add_done_callback(_warmup_done)
+
+
+def _warmup_done(task: asyncio.Future) -> None:
+    """Log a warm-up that failed outright; the service still becomes ready."""
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.error("Model warm-up failed", exc_info=error)
+        warmup_state.record({"model_id": None, "ok": False, "error": str(error)})
+        warmup_state.finish()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued predictions and stop training jobs, then stop the worker pools."""
+    await run_io(prediction_log.stop)
+    await training_jobs.stop()
+    shutdown_executors()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 @app.get("/")
@@ -60,3 +98,12 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint; returns 503 until model warm-up has finished."""
+    state = warmup_state.to_dict()
+    if not warmup_state.is_ready:
+        return JSONResponse(status_code=503, content=state)
+    return state
+
@@ -0,0 +1,37 @@
+"""
+Move saved prediction inputs from JSON text into the typed feature columns.
+
+Usage (from the backend directory):
+    python -m app.migrate_predictions                # migrate every legacy row
+    python -m app.migrate_predictions --chunk 5000   # rows per transaction
+"""
+import time
+import argparse
+
+from app.services.db_service import (
+    PredictionDB, init_db, migrate_prediction_inputs, backfill_prediction_summary,
+    PREDICTION_INSERT_CHUNK
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate prediction inputs to typed columns.")
+    parser.add_argument("--chunk", type=int, default=PREDICTION_INSERT_CHUNK, help="Rows per transaction")
+    args = parser.parse_args()
+
+    # Adds the feature columns to an existing predictions table
+    init_db()
+
+    start = time.perf_counter()
+    count = migrate_prediction_inputs(args.chunk)
+    print(
+        f"{PredictionDB.__tablename__}: migrated {count} rows "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    if count:
+        # Migrated rows now have a confidence to add to the analytics sums
+        backfill_prediction_summary()
+
+
+if __name__ == "__main__":
+    main()
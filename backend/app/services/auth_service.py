@@ -10,11 +10,13 @@ from enum import Enum
 import bcrypt
 from jose import JWTError, jwt
 from sqlalchemy import Column, String, DateTime, Enum as SQLEnum
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.services.db_service import Base, get_db, SessionLocal
+from app.services.executor_service import run_db
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -96,11 +98,17 @@ def create_user(
     db: Session,
     username: str,
     name: str,
-    password: str,
-    role: UserRole = UserRole.USER
+    password: Optional[str] = None,
+    role: UserRole = UserRole.USER,
+    password_hash: Optional[str] = None
 ) -> UserDB:
-    """Create a new user."""
-    hashed_password = get_password_hash(password)
+    """
+    Create a new user.
+    
+    Pass password_hash (from get_password_hash) instead of password when
+    the caller has already hashed it, e.g. off the event loop.
+    """
+    hashed_password = password_hash or get_password_hash(password)
     user = UserDB(
         id=str(uuid.uuid4()),
         username=username,
@@ -135,16 +143,19 @@ def update_user(
     name: Optional[str] = None,
     password: Optional[str] = None,
     username: Optional[str] = None,
-    role: Optional[UserRole] = None
+    role: Optional[UserRole] = None,
+    password_hash: Optional[str] = None
 ) -> Optional[UserDB]:
-    """Update a user's information."""
+    """Update a user's information; password_hash replaces an already hashed password."""
     user = get_user_by_id(db, user_id)
     if not user:
         return None
     
     if name is not None:
         user.name = name
-    if password is not None:
+    if password_hash is not None:
+        user.password = password_hash
+    elif password is not None:
         user.password = get_password_hash(password)
     if username is not None:
         user.username = username
@@ -188,7 +199,7 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    user = get_user_by_id(db, user_id)
+    user = await run_db(db, get_user_by_id, user_id)
     if user is None:
         raise credentials_exception
     
@@ -219,14 +230,19 @@ def seed_super_admin():
     try:
         existing_user = get_user_by_username(db, "superadmin")
         if not existing_user:
-            create_user(
-                db=db,
-                username="superadmin",
-                name="Super Admin",
-                password=os.getenv("SUPER_ADMIN_PASSWORD"),
-                role=UserRole.SUPER_ADMIN
-            )
-            print("Super admin user created successfully!")
+            try:
+                create_user(
+                    db=db,
+                    username="superadmin",
+                    name="Super Admin",
+                    password=os.getenv("SUPER_ADMIN_PASSWORD"),
+                    role=UserRole.SUPER_ADMIN
+                )
+                print("Super admin user created successfully!")
+            except IntegrityError:
+                # Another worker starting at the same time created it first
+                db.rollback()
+                print("Super admin user already exists.")
         else:
             print("Super admin user already exists.")
     finally:
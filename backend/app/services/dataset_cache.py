@@ -0,0 +1,199 @@
+"""
+Columnar cache of uploaded datasets, memory-mapped on load.
+
+Next to each dataset CSV a directory holds one raw .npy file per feature
+column and for the status column, plus a small JSON header:
+
+    dataset_20240101_120000.csv
+    dataset_20240101_120000.cols/
+        meta.json        row count, column dtypes, status classes, source stamp
+        pai.npy          compact dtype: uint8/int16/int32 when every value
+        ...              is a whole number in range, else float32/float64
+        status.npy       int8 codes into the class list (-1 for missing),
+                         or the values themselves if labels are numeric
+
+The CSV is parsed once at upload time; later reads map the arrays instead
+of parsing text again. The CSV stays the source of truth: a cache whose
+stamp no longer matches the file is rebuilt on the next read.
+"""
+import os
+import json
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.api.models import FEATURE_COLUMNS
+
+
+DATASET_CACHE_SUFFIX = ".cols"
+DATASET_CACHE_VERSION = 1
+_META_FILE = "meta.json"
+
+# Smallest integer dtypes tried for whole-number columns, in order
+_INT_DTYPES = (np.uint8, np.int16, np.int32)
+
+
+def cache_path_for(csv_path: str) -> str:
+    """Get the columnar cache directory for a dataset CSV."""
+    root, _ = os.path.splitext(csv_path)
+    return root + DATASET_CACHE_SUFFIX
+
+
+def _source_stamp(csv_path: str) -> Dict[str, int]:
+    """Size and modification time identifying the CSV a cache was built from."""
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _compact(values: np.ndarray) -> np.ndarray:
+    """Store a float64 column in the smallest dtype that keeps every value exact."""
+    finite = values[~np.isnan(values)]
+    if len(finite) == len(values) and np.array_equal(finite, np.round(finite)):
+        low, high = (finite.min(), finite.max()) if len(finite) else (0, 0)
+        for dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return values.astype(dtype)
+    as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32.astype(np.float64), values, equal_nan=True):
+        return as_float32
+    return values
+
+
+def build_dataset_cache(csv_path: str, chunk_rows: int = 50000) -> int:
+    """
+    Parse a dataset CSV chunk by chunk and write its columnar cache.
+
+    The cache is written to a temporary directory and renamed into place,
+    so readers never see a partial cache.
+
+    Args:
+        csv_path: Dataset CSV
+        chunk_rows: Rows parsed per chunk
+
+    Returns:
+        Number of data rows
+    """
+    features: Dict[str, List[np.ndarray]] = {col: [] for col in FEATURE_COLUMNS}
+    statuses: List[pd.Series] = []
+    row_count = 0
+    with pd.read_csv(csv_path, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            row_count += len(chunk)
+            for col in FEATURE_COLUMNS:
+                if col in chunk.columns:
+                    features[col].append(
+                        pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64)
+                    )
+            if "status" in chunk.columns:
+                statuses.append(chunk["status"])
+
+    arrays: Dict[str, np.ndarray] = {}
+    for col, parts in features.items():
+        if parts:
+            arrays[col] = _compact(np.concatenate(parts))
+
+    classes: Optional[List[Any]] = None
+    if statuses and all(pd.api.types.is_numeric_dtype(part) for part in statuses):
+        # Already-encoded labels are stored like a feature column
+        arrays["status"] = _compact(np.concatenate([part.to_numpy(dtype=np.float64) for part in statuses]))
+    elif statuses:
+        status = np.concatenate([part.to_numpy(dtype=object) for part in statuses])
+        missing = pd.isna(status)
+        classes = sorted({value for value in status[~missing].tolist()}, key=str)
+        lookup = {value: code for code, value in enumerate(classes)}
+        codes = np.fromiter(
+            (-1 if is_missing else lookup[value] for value, is_missing in zip(status.tolist(), missing)),
+            dtype=np.int8 if len(classes) < 128 else np.int32,
+            count=len(status)
+        )
+        arrays["status"] = codes
+        # numpy scalars are not JSON serializable
+        classes = [value.item() if isinstance(value, np.generic) else value for value in classes]
+
+    meta = {
+        "version": DATASET_CACHE_VERSION,
+        "rows": row_count,
+        "columns": {name: arr.dtype.str for name, arr in arrays.items()},
+        "status_classes": classes,
+        "source": _source_stamp(csv_path)
+    }
+
+    cache_path = cache_path_for(csv_path)
+    tmp_path = tempfile.mkdtemp(dir=os.path.dirname(cache_path) or ".", suffix=".tmp")
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp_path, name + ".npy"), arr, allow_pickle=False)
+        with open(os.path.join(tmp_path, _META_FILE), "w") as f:
+            json.dump(meta, f)
+        remove_dataset_cache(csv_path)
+        try:
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Another reader rebuilt the cache first
+            if not has_current_cache(csv_path):
+                raise
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return row_count
+
+
+def _read_meta(cache_path: str) -> Optional[Dict[str, Any]]:
+    """Read a cache header, or None if there is no readable cache."""
+    try:
+        with open(os.path.join(cache_path, _META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def has_current_cache(csv_path: str) -> bool:
+    """Whether a cache exists and was built from the CSV as it is now."""
+    meta = _read_meta(cache_path_for(csv_path))
+    return (
+        meta is not None
+        and meta.get("version") == DATASET_CACHE_VERSION
+        and meta.get("source") == _source_stamp(csv_path)
+    )
+
+
+def load_dataset(csv_path: str, chunk_rows: int = 50000) -> pd.DataFrame:
+    """
+    Load the feature and status columns of a dataset from its cache.
+
+    Feature columns are memory-mapped read-only in their compact dtype, so
+    loading costs little more than opening the files. The status column
+    is rebuilt with its original values, as pd.read_csv would return them.
+    A missing or stale cache is rebuilt from the CSV first.
+
+    Args:
+        csv_path: Dataset CSV
+        chunk_rows: Rows parsed per chunk if the cache must be rebuilt
+
+    Returns:
+        DataFrame with the cached columns
+    """
+    if not has_current_cache(csv_path):
+        build_dataset_cache(csv_path, chunk_rows)
+
+    cache_path = cache_path_for(csv_path)
+    meta = _read_meta(cache_path)
+    columns = {}
+    for name in meta["columns"]:
+        arr = np.load(os.path.join(cache_path, name + ".npy"), mmap_mode="r", allow_pickle=False)
+        if name == "status" and meta["status_classes"] is not None:
+            # Code -1 picks the trailing NaN
+            lookup = np.array(meta["status_classes"] + [np.nan], dtype=object)
+            arr = lookup[arr]
+        columns[name] = arr
+    return pd.DataFrame(columns, copy=False)
+
+
+def remove_dataset_cache(csv_path: str) -> None:
+    """Delete the columnar cache of a dataset if it exists."""
+    shutil.rmtree(cache_path_for(csv_path), ignore_errors=True)
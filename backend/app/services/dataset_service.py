@@ -0,0 +1,107 @@
+"""
+Storage of uploaded datasets, deduplicated by content hash.
+"""
+import os
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.services.db_service import DatasetDB, create_dataset, get_dataset_by_hash, update_dataset
+from app.services.dataset_cache import build_dataset_cache, remove_dataset_cache
+from app.services.executor_service import run_io, run_db
+from app.services.ml_service import PREDICT_CHUNK_ROWS
+from app.services.upload_service import UPLOADS_DIR, SpooledUpload
+
+
+async def find_stored_dataset(db: Session, content_hash: str) -> Optional[DatasetDB]:
+    """Get the stored dataset with this content hash, if its file still exists."""
+    existing = await run_db(db, get_dataset_by_hash, content_hash)
+    if existing is not None and existing.file_path and os.path.exists(existing.file_path):
+        return existing
+    return None
+
+
+async def _reuse_dataset(db: Session, dataset: DatasetDB, name: Optional[str]) -> DatasetDB:
+    """Return a matched dataset, renamed if the upload gave it a new name."""
+    if name and name != dataset.name:
+        dataset = await run_db(db, update_dataset, dataset.id, name=name)
+    return dataset
+
+
+async def store_dataset_upload(
+    db: Session,
+    upload: SpooledUpload,
+    name: Optional[str] = None
+) -> Tuple[DatasetDB, bool]:
+    """
+    Keep an uploaded CSV as a dataset, or reuse a stored one with the same content.
+    
+    A new file is parsed once, in chunks, which rejects malformed rows,
+    counts them and writes the columnar cache in the same pass. A matched
+    dataset takes the name given with the upload, if any; one whose file
+    has gone missing gets the new file.
+    
+    Args:
+        db: Database session
+        upload: Spooled CSV upload; it is kept or removed here
+        name: Dataset name, defaulting to the uploaded file name
+        
+    Returns:
+        Tuple of (dataset, whether a new dataset was created)
+    """
+    try:
+        existing = await run_db(db, get_dataset_by_hash, upload.sha256)
+        if existing is not None and existing.file_path and os.path.exists(existing.file_path):
+            upload.remove()
+            return await _reuse_dataset(db, existing, name), False
+        
+        # The random suffix keeps uploads within the same second apart, even
+        # concurrent uploads of the same file
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"dataset_{timestamp}_{upload.sha256[:8]}_{uuid.uuid4().hex[:8]}.csv"
+        file_path = upload.keep(os.path.join(UPLOADS_DIR, filename))
+        
+        try:
+            row_count = await run_io(build_dataset_cache, file_path, PREDICT_CHUNK_ROWS)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
+    except BaseException:
+        upload.remove()
+        raise
+    
+    try:
+        if existing is not None:
+            # The hash is unique, so the row that lost its file takes this one
+            if existing.file_path:
+                await run_io(remove_dataset_cache, existing.file_path)
+            dataset = await run_db(
+                db, update_dataset, existing.id,
+                name=name or existing.name, file_path=file_path, row_count=row_count
+            )
+            return dataset, True
+        dataset = await run_db(
+            db,
+            create_dataset,
+            name=name or upload.filename,
+            file_path=file_path,
+            row_count=row_count,
+            content_hash=upload.sha256
+        )
+    except IntegrityError:
+        # A concurrent upload of the same file was stored first; drop this
+        # copy and use that row
+        upload.remove()
+        remove_dataset_cache(file_path)
+        existing = await run_db(db, get_dataset_by_hash, upload.sha256)
+        if existing is None:
+            raise
+        return await _reuse_dataset(db, existing, name), False
+    except BaseException:
+        upload.remove()
+        remove_dataset_cache(file_path)
+        raise
+    return dataset, True
@@ -1,27 +1,139 @@
 """
-Database service for MySQL operations.
+Database service for MySQL or embedded SQLite operations.
 """
 import os
 import json
-from typing import Optional, List, Dict, Any
+import time
+import base64
+import threading
+from typing import Optional, List, Dict, Any, Callable, Iterable, Set, Tuple
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime, ForeignKey, text
+from sqlalchemy import (
+    create_engine, Column, Integer, BigInteger, Boolean, String, Float, Double, Text, Date, DateTime, ForeignKey, Index,
+    event, text, insert, select, bindparam, cast, func, inspect, literal_column, and_, or_
+)
+from sqlalchemy.dialects import mysql, sqlite, postgresql
+from sqlalchemy.exc import DBAPIError, OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, Session, Query, defer
 from dotenv import load_dotenv
 
+from app.api.models import FEATURE_COLUMNS
+from app.services.model_artifact import artifact_path_for
+from app.services.dataset_cache import remove_dataset_cache
+
 load_dotenv()
 
-# Database configuration
+# Database configuration. The embedded SQLite database is opt-in, with a
+# sqlite:/// DATABASE_URL or DB_BACKEND=sqlite (file at SQLITE_PATH); a
+# missing DATABASE_URL is an error rather than a silent empty database
+DB_BACKEND = os.getenv("DB_BACKEND", "").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "app/data/kkp.db")
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-if DATABASE_URL and DATABASE_URL.startswith("mysql://"):
+if DB_BACKEND not in ("", "sqlite"):
+    raise RuntimeError(f"Unknown DB_BACKEND: {DB_BACKEND} (use 'sqlite', or set DATABASE_URL)")
+if DB_BACKEND == "sqlite":
+    if DATABASE_URL and not DATABASE_URL.startswith("sqlite"):
+        raise RuntimeError("DB_BACKEND=sqlite conflicts with a non-SQLite DATABASE_URL")
+    DATABASE_URL = DATABASE_URL or f"sqlite:///{SQLITE_PATH}"
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL is not set (set DB_BACKEND=sqlite to use the embedded SQLite database)")
+
+if DATABASE_URL.startswith("mysql://"):
     DATABASE_URL = DATABASE_URL.replace("mysql://", "mysql+pymysql://", 1)
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# SQLite tuning: WAL lets readers run alongside the single writer, and
+# synchronous=NORMAL is crash-safe under WAL while fsyncing only at checkpoints
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Serve request sessions from an async engine (aiomysql/aiosqlite) instead
+# of running sync sessions in the I/O thread pool
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Async driver for each sync driver URL prefix
+ASYNC_DRIVERS = {
+    "mysql+pymysql://": "mysql+aiomysql://",
+    "sqlite://": "sqlite+aiosqlite://",
+    "postgresql://": "postgresql+asyncpg://",
+}
+
+# Rows per executemany call when saving predictions in bulk; pymysql turns
+# each call into multi-row INSERTs, so this keeps statements well under
+# max_allowed_packet
+PREDICTION_INSERT_CHUNK = int(os.getenv("PREDICTION_INSERT_CHUNK", "1000"))
+
+# Page size limits for list endpoints
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+# How long a computed dashboard summary may be served from memory
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "5"))
+
+
+def async_database_url(url: str) -> str:
+    """Get the async driver URL for a sync database URL."""
+    for prefix, async_prefix in ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    raise ValueError(f"No async driver known for database URL: {url.split(':', 1)[0]}")
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Engine keyword arguments for a database URL."""
+    if not _is_sqlite(url):
+        return {"pool_pre_ping": True}
+    
+    path = url.split(":///", 1)[-1]
+    if path and path != ":memory:":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Sessions move between the I/O pool threads, so connections must too;
+    # SQLite serializes the actual access itself
+    return {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0}}
+
+
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    """Apply the embedded-mode pragmas to every new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        # Needed for ON DELETE SET NULL on predictions.model_id
+        cursor.execute("PRAGMA foreign_keys=ON")
+    finally:
+        cursor.close()
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+if _is_sqlite(DATABASE_URL):
+    event.listen(engine, "connect", _set_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Startup, migrations and background writers always use the sync engine
+async_engine = None
+AsyncSessionLocal = None
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(async_database_url(DATABASE_URL), **_engine_options(DATABASE_URL))
+    if _is_sqlite(DATABASE_URL):
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    # Objects returned to routes must stay readable after commit without lazy loads
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
 
 class ModelDB(Base):
     """SQLAlchemy model for models table."""
@@ -33,8 +145,13 @@ class ModelDB(Base):
     accuracy = Column(Float)
     metrics = Column(Text)  # JSON stored as text
     dataset_path = Column(String(512))
+    dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="SET NULL"))
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("idx_models_created_at_id", "created_at", "id"),
+    )
+
 
 class DatasetDB(Base):
     """SQLAlchemy model for datasets table."""
@@ -44,8 +161,15 @@ class DatasetDB(Base):
     name = Column(String(255))
     file_path = Column(String(512))
     row_count = Column(Integer)
+    content_hash = Column(String(64))  # SHA-256 of the file, for deduplication
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("idx_datasets_uploaded_at_id", "uploaded_at", "id"),
+        # One dataset per file content; rows without a hash are not constrained
+        Index("idx_datasets_content_hash_unique", "content_hash", unique=True),
+    )
+
 
 class PredictionDB(Base):
     """SQLAlchemy model for predictions table."""
@@ -53,18 +177,226 @@ class PredictionDB(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     model_id = Column(Integer, ForeignKey("models.id", ondelete="SET NULL"))
-    input_data = Column(Text)  # JSON stored as text
+    input_data = Column(Text)  # Legacy JSON inputs, NULL once migrated to the feature columns
     prediction = Column(String(64))
     probability = Column(Text)  # JSON stored as text
+    confidence = Column(Float)  # Probability of the predicted label
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Inputs, one single-precision column per feature
+    pai = Column(Float)
+    pendidikan_pancasila = Column(Float)
+    bahasa_indonesia = Column(Float)
+    matematika = Column(Float)
+    ipa = Column(Float)
+    ips = Column(Float)
+    bahasa_inggris = Column(Float)
+    penjas = Column(Float)
+    tik = Column(Float)
+    sbk = Column(Float)
+    prakarya = Column(Float)
+    bahasa_sunda = Column(Float)
+    btq = Column(Float)
+    absen = Column(Float)
+
+    # Keyset pagination, alone or filtered by model or label
+    __table_args__ = (
+        Index("idx_predictions_created_at_id", "created_at", "id"),
+        Index("idx_predictions_model_created_at_id", "model_id", "created_at", "id"),
+        Index("idx_predictions_label_created_at_id", "prediction", "created_at", "id"),
+    )
+
+
+class PredictionSummaryDB(Base):
+    """
+    SQLAlchemy model for per-model, per-day prediction counts.
+    
+    Kept up to date in the same transaction as every prediction insert,
+    so dashboard statistics and analytics read a few rows instead of
+    scanning predictions.
+    """
+    __tablename__ = "prediction_summary"
+
+    # 0 stands for predictions saved without a model
+    model_id = Column(Integer, primary_key=True, autoincrement=False)
+    day = Column(Date, primary_key=True)
+    label = Column(String(64), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    # Sum of the predicted label's probability, for mean confidence, and the
+    # number of predictions it covers (legacy rows may have no confidence)
+    probability_sum = Column(Double, nullable=False, default=0)
+    probability_count = Column(BigInteger, nullable=False, default=0)
+
+    # Analytics over a date range across all models
+    __table_args__ = (
+        Index("idx_prediction_summary_day", "day"),
+    )
+
+
+class TrainingJobDB(Base):
+    """SQLAlchemy model for background training jobs."""
+    __tablename__ = "training_jobs"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    name = Column(String(255), nullable=False)
+    status = Column(String(16), nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    progress = Column(Float, nullable=False, default=0.0)
+    stage = Column(String(64))
+    dataset_id = Column(Integer, ForeignKey("datasets.id", ondelete="SET NULL"))
+    dataset_file = Column(String(512), nullable=False)
+    dataset_path = Column(String(512))  # Original file name, copied to the model
+    target_column = Column(String(64), nullable=False, default="status")
+    tune = Column(Boolean, nullable=False, default=False)  # Hyperparameter search
+    model_id = Column(Integer, ForeignKey("models.id", ondelete="SET NULL"))
+    error = Column(Text)
+    owner = Column(String(128))  # "host:pid" of the API process running the job
+    heartbeat_at = Column(DateTime)  # Refreshed by the owner while the job runs
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("idx_training_jobs_created_at_id", "created_at", "id"),
+        Index("idx_training_jobs_status", "status"),
+    )
+
 
 def init_db():
-    """Initialize database tables."""
-    Base.metadata.create_all(bind=engine)
+    """
+    Initialize database tables.
+    
+    Every uvicorn worker runs this at startup. A schema change another
+    worker makes between this worker's check and its own change is
+    accepted, and the step is re-checked.
+    """
+    had_summary = inspect(engine).has_table(PredictionSummaryDB.__tablename__)
+    _schema_step(Base.metadata.create_all, bind=engine)
+    for model in (ModelDB, DatasetDB, PredictionDB, TrainingJobDB):
+        _schema_step(add_missing_columns, model.__table__)
+    summary_outdated = bool(_schema_step(add_missing_columns, PredictionSummaryDB.__table__))
+    clear_duplicate_dataset_hashes()
+    # create_all only indexes new tables; add indexes missing from existing ones
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            _schema_step(index.create, bind=engine, checkfirst=True)
+    if not had_summary or summary_outdated:
+        backfill_prediction_summary()
+
 
+# Tries per schema step; each retry can only meet objects created since
+# the previous one, so a few cover any number of workers starting together
+SCHEMA_STEP_ATTEMPTS = 5
 
-def get_db():
+# MySQL errors for a table, column or index that already exists
+_MYSQL_ALREADY_EXISTS = {1050, 1060, 1061}
+
+
+def _already_exists(error: DBAPIError) -> bool:
+    """Whether a DDL statement failed only because its object already exists."""
+    code = error.orig.args[0] if getattr(error.orig, "args", None) else None
+    if code in _MYSQL_ALREADY_EXISTS:
+        return True
+    message = str(error.orig).lower()
+    return "already exists" in message or "duplicate column" in message
+
+
+def _schema_step(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a check-then-change schema step, tolerating a concurrent worker.
+    
+    Two workers starting together can both see a table, column or index
+    missing; the slower one's CREATE or ALTER then fails. The step is run
+    again, and its check now finds what the other worker made.
+    """
+    for attempt in range(SCHEMA_STEP_ATTEMPTS):
+        try:
+            return func(*args, **kwargs)
+        except DBAPIError as e:
+            if attempt == SCHEMA_STEP_ATTEMPTS - 1 or not _already_exists(e):
+                raise
+
+
+def add_missing_columns(table: Any) -> List[str]:
+    """
+    Add columns declared on a model but missing from its existing table.
+    
+    create_all never alters existing tables; new columns are added as
+    nullable so rows written before the change stay valid.
+    
+    Args:
+        table: SQLAlchemy Table to bring up to date
+        
+    Returns:
+        Names of the columns that were added
+    """
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    missing = [column for column in table.columns if column.name not in existing]
+    if not missing:
+        return []
+    
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for column in missing:
+            conn.execute(text(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)} NULL"
+            ))
+    return [column.name for column in missing]
+
+
+def clear_duplicate_dataset_hashes() -> int:
+    """
+    Keep the content hash only on the oldest of datasets sharing one.
+    
+    Concurrent uploads could store the same file twice before the hash
+    was unique; the copies stay as datasets but no longer match uploads,
+    so the unique index can be created.
+    
+    Returns:
+        Number of datasets whose hash was cleared
+    """
+    keep = (
+        select(func.min(DatasetDB.id).label("id"))
+        .where(DatasetDB.content_hash.isnot(None))
+        .group_by(DatasetDB.content_hash)
+        .subquery()
+    )
+    # The derived table lets MySQL read the table it updates
+    with engine.begin() as conn:
+        result = conn.execute(
+            DatasetDB.__table__.update()
+            .where(DatasetDB.content_hash.isnot(None))
+            .where(DatasetDB.id.notin_(select(keep.c.id)))
+            .values(content_hash=None)
+        )
+    return result.rowcount
+
+
+def backfill_prediction_summary() -> None:
+    """Rebuild the summary table from the predictions table in one GROUP BY."""
+    # Literal defaults keep the SELECT and GROUP BY expressions identical,
+    # which MySQL's ONLY_FULL_GROUP_BY requires
+    keys = [
+        func.coalesce(PredictionDB.model_id, literal_column("0")),
+        func.date(PredictionDB.created_at),
+        func.coalesce(PredictionDB.prediction, literal_column("''"))
+    ]
+    grouped = select(
+        *keys,
+        func.count(),
+        func.coalesce(func.sum(PredictionDB.confidence), literal_column("0")),
+        func.count(PredictionDB.confidence)
+    ).group_by(*keys)
+    table = PredictionSummaryDB.__table__
+    with engine.begin() as conn:
+        conn.execute(table.delete())
+        conn.execute(table.insert().from_select(
+            ["model_id", "day", "label", "count", "probability_sum", "probability_count"], grouped
+        ))
+
+
+def get_sync_db():
     """Get database session."""
     db = SessionLocal()
     try:
@@ -73,6 +405,89 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Request dependency; run_db accepts either kind of session
+get_db = get_async_db if DATABASE_ASYNC else get_sync_db
+
+
+# Pagination helpers
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Encode the position after a row as an opaque cursor."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _keyset_page(
+    query: Query,
+    timestamp_col: Any,
+    id_col: Any,
+    limit: Optional[int],
+    cursor: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime]
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page, newest first, using keyset pagination on (timestamp, id).
+    
+    Args:
+        query: Base query, already filtered
+        timestamp_col: Timestamp column to order by
+        id_col: Primary key column used as tie-breaker
+        limit: Page size, clamped to MAX_PAGE_SIZE. None with no cursor
+            returns every row, as the unpaged list endpoints did; None
+            with a cursor uses DEFAULT_PAGE_SIZE
+        cursor: Cursor from the previous page, if any
+        created_from: Only rows at or after this time
+        created_to: Only rows before this time
+        
+    Returns:
+        Tuple of (rows, cursor for the next page or None on the last page)
+    """
+    if limit is None and not cursor:
+        limit = 0
+    elif limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if created_from is not None:
+        query = query.filter(timestamp_col >= created_from)
+    if created_to is not None:
+        query = query.filter(timestamp_col < created_to)
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            timestamp_col < timestamp,
+            and_(timestamp_col == timestamp, id_col < row_id)
+        ))
+    
+    query = query.order_by(timestamp_col.desc(), id_col.desc())
+    if not limit:
+        return query.all(), None
+    
+    # One extra row tells whether another page follows
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, timestamp_col.key), last.id)
+
+
 # Model operations
 def create_model(
     db: Session,
@@ -80,7 +495,8 @@ def create_model(
     file_path: str,
     accuracy: float,
     metrics: Dict[str, Any],
-    dataset_path: Optional[str] = None
+    dataset_path: Optional[str] = None,
+    dataset_id: Optional[int] = None
 ) -> ModelDB:
     """Create a new model record."""
     model = ModelDB(
@@ -88,11 +504,13 @@ def create_model(
         file_path=file_path,
         accuracy=accuracy,
         metrics=json.dumps(metrics),
-        dataset_path=dataset_path
+        dataset_path=dataset_path,
+        dataset_id=dataset_id
     )
     db.add(model)
     db.commit()
     db.refresh(model)
+    invalidate_dashboard_summary()
     return model
 
 
@@ -101,9 +519,27 @@ def get_model(db: Session, model_id: int) -> Optional[ModelDB]:
     return db.query(ModelDB).filter(ModelDB.id == model_id).first()
 
 
-def get_all_models(db: Session) -> List[ModelDB]:
-    """Get all models."""
-    return db.query(ModelDB).order_by(ModelDB.created_at.desc()).all()
+def get_existing_model_ids(db: Session, model_ids: Iterable[int]) -> Set[int]:
+    """Get which of the given model IDs still exist."""
+    model_ids = list(model_ids)
+    if not model_ids:
+        return set()
+    return {row[0] for row in db.query(ModelDB.id).filter(ModelDB.id.in_(model_ids))}
+
+
+def get_models_page(
+    db: Session,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    include_metrics: bool = True
+) -> Tuple[List[ModelDB], Optional[str]]:
+    """Get one page of models, newest first, and the cursor for the next page."""
+    query = db.query(ModelDB)
+    if not include_metrics:
+        query = query.options(defer(ModelDB.metrics))
+    return _keyset_page(query, ModelDB.created_at, ModelDB.id, limit, cursor, created_from, created_to)
 
 
 def update_model(db: Session, model_id: int, name: str) -> Optional[ModelDB]:
@@ -118,14 +554,31 @@ def update_model(db: Session, model_id: int, name: str) -> Optional[ModelDB]:
 
 
 def delete_model(db: Session, model_id: int) -> bool:
-    """Delete a model by ID."""
+    """
+    Delete a model by ID.
+    
+    Its predictions are kept without a model (ON DELETE SET NULL), so its
+    summary counters move to model_id 0 in the same transaction. Left
+    under the old ID, they would be reported for a later model that
+    reuses it.
+    """
     model = db.query(ModelDB).filter(ModelDB.id == model_id).first()
     if model:
-        # Delete the model file if exists
-        if model.file_path and os.path.exists(model.file_path):
-            os.remove(model.file_path)
+        # Delete the model file and its side-car array file if they exist
+        if model.file_path:
+            for path in (model.file_path, artifact_path_for(model.file_path)):
+                if os.path.exists(path):
+                    os.remove(path)
+        summary = PredictionSummaryDB.__table__
+        moved = [
+            dict(row._mapping, model_id=0)
+            for row in db.execute(select(summary).where(summary.c.model_id == model_id))
+        ]
+        db.execute(summary.delete().where(summary.c.model_id == model_id))
+        _merge_into_prediction_summary(db, moved)
         db.delete(model)
         db.commit()
+        invalidate_dashboard_summary()
         return True
     return False
 
@@ -135,22 +588,50 @@ def get_latest_model(db: Session) -> Optional[ModelDB]:
     return db.query(ModelDB).order_by(ModelDB.created_at.desc()).first()
 
 
+def get_latest_models(db: Session, limit: int) -> List[ModelDB]:
+    """Get the N most recently created models."""
+    return db.query(ModelDB).order_by(ModelDB.created_at.desc()).limit(limit).all()
+
+
+def get_models_by_ids(db: Session, model_ids: List[int]) -> List[ModelDB]:
+    """Get models by a list of IDs."""
+    return db.query(ModelDB).filter(ModelDB.id.in_(model_ids)).all()
+
+
 # Dataset operations
 def create_dataset(
     db: Session,
     name: str,
     file_path: str,
-    row_count: int
+    row_count: int,
+    content_hash: Optional[str] = None
 ) -> DatasetDB:
     """Create a new dataset record."""
     dataset = DatasetDB(
         name=name,
         file_path=file_path,
-        row_count=row_count
+        row_count=row_count,
+        content_hash=content_hash
     )
     db.add(dataset)
-    db.commit()
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     db.refresh(dataset)
+    invalidate_dashboard_summary()
+    return dataset
+
+
+def update_dataset(db: Session, dataset_id: int, **fields: Any) -> Optional[DatasetDB]:
+    """Update a dataset's name, file or row count."""
+    dataset = db.query(DatasetDB).filter(DatasetDB.id == dataset_id).first()
+    if dataset:
+        for key, value in fields.items():
+            setattr(dataset, key, value)
+        db.commit()
+        db.refresh(dataset)
     return dataset
 
 
@@ -159,24 +640,159 @@ def get_dataset(db: Session, dataset_id: int) -> Optional[DatasetDB]:
     return db.query(DatasetDB).filter(DatasetDB.id == dataset_id).first()
 
 
-def get_all_datasets(db: Session) -> List[DatasetDB]:
-    """Get all datasets."""
-    return db.query(DatasetDB).order_by(DatasetDB.uploaded_at.desc()).all()
+def get_dataset_by_hash(db: Session, content_hash: str) -> Optional[DatasetDB]:
+    """Get the oldest dataset with the given content hash."""
+    return (
+        db.query(DatasetDB)
+        .filter(DatasetDB.content_hash == content_hash)
+        .order_by(DatasetDB.id)
+        .first()
+    )
+
+
+def get_datasets_page(
+    db: Session,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
+) -> Tuple[List[DatasetDB], Optional[str]]:
+    """Get one page of datasets, newest first, and the cursor for the next page."""
+    return _keyset_page(
+        db.query(DatasetDB), DatasetDB.uploaded_at, DatasetDB.id, limit, cursor, created_from, created_to
+    )
 
 
 def delete_dataset(db: Session, dataset_id: int) -> bool:
-    """Delete a dataset by ID."""
+    """
+    Delete a dataset by ID.
+    
+    Models and training jobs keep their dataset_path but lose the link.
+    This is done here rather than left to ON DELETE SET NULL, which
+    databases upgraded by add_missing_columns do not have.
+    """
     dataset = db.query(DatasetDB).filter(DatasetDB.id == dataset_id).first()
     if dataset:
-        if dataset.file_path and os.path.exists(dataset.file_path):
-            os.remove(dataset.file_path)
+        if dataset.file_path:
+            if os.path.exists(dataset.file_path):
+                os.remove(dataset.file_path)
+            remove_dataset_cache(dataset.file_path)
+        for table in (ModelDB, TrainingJobDB):
+            db.query(table).filter(table.dataset_id == dataset_id).update(
+                {table.dataset_id: None}, synchronize_session=False
+            )
         db.delete(dataset)
         db.commit()
+        invalidate_dashboard_summary()
         return True
     return False
 
 
 # Prediction operations
+def _add_to_prediction_summary(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Add newly inserted predictions to the summary counters.
+    
+    Runs in the caller's transaction, so counts and rows commit together.
+    """
+    totals: Dict[tuple, List[float]] = {}
+    for row in rows:
+        key = (row["model_id"] or 0, row["created_at"].date(), row["prediction"] or "")
+        total = totals.setdefault(key, [0, 0.0, 0])
+        total[0] += 1
+        if row.get("confidence") is not None:
+            total[1] += row["confidence"]
+            total[2] += 1
+    _merge_into_prediction_summary(db, [
+        {
+            "model_id": model_id, "day": day, "label": label, "count": count,
+            "probability_sum": probability_sum, "probability_count": probability_count
+        }
+        for (model_id, day, label), (count, probability_sum, probability_count) in totals.items()
+    ])
+
+
+def _merge_into_prediction_summary(db: Session, values: List[Dict[str, Any]]) -> None:
+    """
+    Add counters to their summary rows, creating rows that do not exist yet.
+    
+    Uses the dialect's native upsert where there is one.
+    """
+    if not values:
+        return
+    
+    table = PredictionSummaryDB.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        db.execute(
+            stmt.on_duplicate_key_update(
+                count=table.c.count + stmt.inserted["count"],
+                probability_sum=table.c.probability_sum + stmt.inserted["probability_sum"],
+                probability_count=table.c.probability_count + stmt.inserted["probability_count"]
+            ),
+            values
+        )
+    elif dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["model_id", "day", "label"],
+                set_={
+                    "count": table.c.count + stmt.excluded["count"],
+                    "probability_sum": table.c.probability_sum + stmt.excluded["probability_sum"],
+                    "probability_count": table.c.probability_count + stmt.excluded["probability_count"]
+                }
+            ),
+            values
+        )
+    else:
+        for value in values:
+            updated = db.execute(
+                table.update()
+                .where(table.c.model_id == value["model_id"])
+                .where(table.c.day == value["day"])
+                .where(table.c.label == value["label"])
+                .values(
+                    count=table.c.count + value["count"],
+                    probability_sum=table.c.probability_sum + value["probability_sum"],
+                    probability_count=table.c.probability_count + value["probability_count"]
+                )
+            )
+            if updated.rowcount == 0:
+                db.execute(table.insert().values(**value))
+
+
+def _prediction_row(
+    model_id: Optional[int],
+    input_data: Dict[str, Any],
+    prediction: str,
+    probability: Dict[str, float],
+    created_at: datetime
+) -> Dict[str, Any]:
+    """Build the column values for a prediction, with inputs in the feature columns."""
+    row = {
+        "model_id": model_id,
+        "prediction": prediction,
+        "probability": json.dumps(probability),
+        "confidence": probability.get(prediction),
+        "created_at": created_at
+    }
+    for column in FEATURE_COLUMNS:
+        value = input_data.get(column)
+        row[column] = float(value) if value is not None else None
+    return row
+
+
+def prediction_input(pred: Any) -> Optional[Dict[str, Any]]:
+    """Get the inputs of a saved prediction, from legacy JSON if not yet migrated."""
+    if pred.input_data:
+        return json.loads(pred.input_data)
+    if all(getattr(pred, column) is None for column in FEATURE_COLUMNS):
+        return None
+    return {column: getattr(pred, column) for column in FEATURE_COLUMNS}
+
+
 def create_prediction(
     db: Session,
     model_id: int,
@@ -185,44 +801,500 @@ def create_prediction(
     probability: Dict[str, float]
 ) -> PredictionDB:
     """Create a new prediction record."""
-    pred = PredictionDB(
-        model_id=model_id,
-        input_data=json.dumps(input_data),
-        prediction=prediction,
-        probability=json.dumps(probability)
-    )
+    pred = PredictionDB(**_prediction_row(
+        model_id, input_data, prediction, probability, datetime.utcnow()
+    ))
     db.add(pred)
+    _add_to_prediction_summary(db, [{
+        "model_id": model_id, "created_at": pred.created_at,
+        "prediction": prediction, "confidence": pred.confidence
+    }])
     db.commit()
     db.refresh(pred)
+    invalidate_dashboard_summary()
     return pred
 
 
-def get_all_predictions(db: Session) -> List[PredictionDB]:
-    """Get all predictions."""
-    return db.query(PredictionDB).order_by(PredictionDB.created_at.desc()).all()
+def create_predictions_bulk(
+    db: Session,
+    model_id: Optional[int],
+    results: Iterable[Dict[str, Any]],
+    chunk_size: int = PREDICTION_INSERT_CHUNK
+) -> int:
+    """
+    Insert many prediction records in a single transaction.
+    
+    Rows are sent with executemany in chunks instead of one add/commit/refresh
+    per row, and no ORM objects are built or refreshed.
+    
+    Args:
+        db: Database session
+        model_id: Model ID for records that do not carry their own
+        results: Dicts with input_data, prediction and probability, and
+            optionally model_id and created_at
+        chunk_size: Rows per INSERT batch
+        
+    Returns:
+        Number of records inserted
+    """
+    created_at = datetime.utcnow()
+    count = 0
+    rows = []
+    try:
+        for result in results:
+            rows.append(_prediction_row(
+                result.get("model_id", model_id),
+                result["input_data"],
+                result["prediction"],
+                result["probability"],
+                result.get("created_at", created_at)
+            ))
+            if len(rows) >= chunk_size:
+                db.execute(insert(PredictionDB), rows)
+                _add_to_prediction_summary(db, rows)
+                count += len(rows)
+                rows = []
+        if rows:
+            db.execute(insert(PredictionDB), rows)
+            _add_to_prediction_summary(db, rows)
+            count += len(rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if count:
+        invalidate_dashboard_summary()
+    return count
+
+
+def get_predictions_page(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    model_id: Optional[int] = None,
+    label: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    include_input: bool = True
+) -> Tuple[List[PredictionDB], Optional[str]]:
+    """Get one page of predictions, newest first, and the cursor for the next page."""
+    query = db.query(PredictionDB)
+    if model_id is not None:
+        query = query.filter(PredictionDB.model_id == model_id)
+    if label is not None:
+        query = query.filter(PredictionDB.prediction == label)
+    if not include_input:
+        query = query.options(
+            defer(PredictionDB.input_data),
+            *(defer(getattr(PredictionDB, column)) for column in FEATURE_COLUMNS)
+        )
+    return _keyset_page(
+        query, PredictionDB.created_at, PredictionDB.id, limit, cursor, created_from, created_to
+    )
+
+
+def migrate_prediction_inputs(chunk_size: int = PREDICTION_INSERT_CHUNK) -> int:
+    """
+    Move legacy JSON inputs of saved predictions into the feature columns.
+    
+    Rows are migrated in id order, one committed chunk at a time, so the
+    migration can be interrupted and resumed. Migrated rows get their
+    input_data set to NULL and their confidence filled in.
+    
+    Args:
+        chunk_size: Rows per transaction
+        
+    Returns:
+        Number of rows migrated
+    """
+    table = PredictionDB.__table__
+    count = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.input_data, table.c.prediction, table.c.probability)
+                .where(table.c.input_data.is_not(None), table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                return count
+            
+            updates = []
+            for row in rows:
+                probability = json.loads(row.probability) if row.probability else {}
+                values = _prediction_row(
+                    None, json.loads(row.input_data), row.prediction, probability, None
+                )
+                values = {column: values[column] for column in ["confidence", *FEATURE_COLUMNS]}
+                values["input_data"] = None
+                values["row_id"] = row.id
+                updates.append(values)
+            conn.execute(table.update().where(table.c.id == bindparam("row_id")), updates)
+        count += len(rows)
+        last_id = rows[-1].id
+
+
+def get_prediction_label_counts(db: Session) -> Dict[str, int]:
+    """Get the number of predictions per label from the summary counters."""
+    rows = (
+        db.query(PredictionSummaryDB.label, func.sum(PredictionSummaryDB.count))
+        .group_by(PredictionSummaryDB.label)
+        .all()
+    )
+    return {label: int(count or 0) for label, count in rows}
 
 
 def get_prediction_stats(db: Session) -> Dict[str, Any]:
     """Get prediction statistics."""
-    total = db.query(PredictionDB).count()
-    berprestasi = db.query(PredictionDB).filter(PredictionDB.prediction == "berprestasi").count()
-    tidak_berprestasi = db.query(PredictionDB).filter(PredictionDB.prediction == "tidak_berprestasi").count()
+    counts = get_prediction_label_counts(db)
     
     return {
-        "total_predictions": total,
-        "berprestasi_count": berprestasi,
-        "tidak_berprestasi_count": tidak_berprestasi
+        "total_predictions": sum(counts.values()),
+        "berprestasi_count": counts.get("berprestasi", 0),
+        "tidak_berprestasi_count": counts.get("tidak_berprestasi", 0)
     }
 
 
 def get_status_distribution(db: Session) -> Dict[str, int]:
     """Get status distribution from predictions."""
-    predictions = db.query(PredictionDB).all()
+    counts = get_prediction_label_counts(db)
     distribution = {"berprestasi": 0, "tidak_berprestasi": 0}
     
-    for pred in predictions:
-        if pred.prediction in distribution:
-            distribution[pred.prediction] += 1
+    for label in distribution:
+        distribution[label] = counts.get(label, 0)
     
     return distribution
 
+
+ANALYTICS_BUCKETS = ("day", "week", "month")
+
+
+def _bucket_start(day: Any, bucket: str, dialect: str) -> Any:
+    """SQL expression for the first day of the day/week/month containing a date."""
+    if bucket == "day":
+        return day
+    if dialect == "mysql":
+        if bucket == "week":
+            return func.subdate(day, func.weekday(day))
+        return func.date_format(day, literal_column("'%Y-%m-01'"))
+    if dialect == "postgresql":
+        return cast(func.date_trunc(literal_column(f"'{bucket}'"), day), Date)
+    # SQLite: weeks start on Monday, like MySQL WEEKDAY() and ISO weeks
+    if bucket == "week":
+        return func.date(day, literal_column("'weekday 0'"), literal_column("'-6 days'"))
+    return func.date(day, literal_column("'start of month'"))
+
+
+def get_prediction_analytics(
+    db: Session,
+    bucket: str = "week",
+    model_id: Optional[int] = None,
+    date_from: Optional[Any] = None,
+    date_to: Optional[Any] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get prediction counts and mean confidence per model, period and label.
+    
+    Aggregated in SQL over the per-day summary table, so the cost depends
+    on the number of days and models rather than on the number of predictions.
+    The mean covers only predictions saved with a confidence; legacy rows
+    without one count towards count but not towards mean_probability.
+    
+    Args:
+        db: Database session
+        bucket: Period length, one of ANALYTICS_BUCKETS
+        model_id: Only this model
+        date_from: First day to include
+        date_to: Last day to include
+        
+    Returns:
+        Rows with model_id, period, label, count and mean_probability
+    """
+    if bucket not in ANALYTICS_BUCKETS:
+        raise ValueError(f"Unknown analytics bucket: {bucket}")
+    
+    table = PredictionSummaryDB.__table__
+    period = _bucket_start(table.c.day, bucket, db.get_bind().dialect.name)
+    query = (
+        select(
+            table.c.model_id,
+            period.label("period"),
+            table.c.label,
+            func.sum(table.c.count).label("count"),
+            func.sum(table.c.probability_sum).label("probability_sum"),
+            func.sum(table.c.probability_count).label("probability_count")
+        )
+        .group_by(table.c.model_id, period, table.c.label)
+        .order_by(period, table.c.model_id, table.c.label)
+    )
+    if model_id is not None:
+        query = query.where(table.c.model_id == model_id)
+    if date_from is not None:
+        query = query.where(table.c.day >= date_from)
+    if date_to is not None:
+        query = query.where(table.c.day <= date_to)
+    
+    result = []
+    for row in db.execute(query):
+        covered = int(row.probability_count or 0)
+        result.append({
+            "model_id": row.model_id or None,
+            "period": str(row.period)[:10],
+            "label": row.label,
+            "count": int(row.count or 0),
+            "mean_probability": round(float(row.probability_sum or 0) / covered, 6) if covered else None
+        })
+    return result
+
+
+# Training job operations
+TRAINING_JOB_FINISHED = ("succeeded", "failed", "cancelled")
+
+
+def create_training_job(
+    db: Session,
+    name: str,
+    dataset_file: str,
+    dataset_id: Optional[int] = None,
+    dataset_path: Optional[str] = None,
+    target_column: str = "status",
+    tune: bool = False
+) -> TrainingJobDB:
+    """Create a queued training job."""
+    job = TrainingJobDB(
+        name=name,
+        status="queued",
+        progress=0.0,
+        stage="queued",
+        dataset_id=dataset_id,
+        dataset_file=dataset_file,
+        dataset_path=dataset_path,
+        target_column=target_column,
+        tune=tune
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_training_job(db: Session, job_id: int) -> Optional[TrainingJobDB]:
+    """Get a training job by ID."""
+    return db.query(TrainingJobDB).filter(TrainingJobDB.id == job_id).first()
+
+
+def get_training_jobs_page(
+    db: Session,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None
+) -> Tuple[List[TrainingJobDB], Optional[str]]:
+    """Get one page of training jobs, newest first, and the cursor for the next page."""
+    query = db.query(TrainingJobDB)
+    if status is not None:
+        query = query.filter(TrainingJobDB.status == status)
+    return _keyset_page(query, TrainingJobDB.created_at, TrainingJobDB.id, limit, cursor, None, None)
+
+
+def get_training_jobs_by_status(db: Session, statuses: Iterable[str]) -> List[TrainingJobDB]:
+    """Get training jobs in any of the given states, oldest first."""
+    return (
+        db.query(TrainingJobDB)
+        .filter(TrainingJobDB.status.in_(list(statuses)))
+        .order_by(TrainingJobDB.id)
+        .all()
+    )
+
+
+def update_training_job(
+    db: Session,
+    job_id: int,
+    only_if_status: Optional[Iterable[str]] = None,
+    only_if_owner: Optional[str] = None,
+    only_if_heartbeat_before: Optional[datetime] = None,
+    **fields: Any
+) -> Optional[TrainingJobDB]:
+    """
+    Update fields of a training job.
+    
+    Args:
+        db: Database session
+        job_id: Job ID
+        only_if_status: Only update a job currently in one of these states
+        only_if_owner: Only update a job run by this owner
+        only_if_heartbeat_before: Only update a job whose owner has not
+            reported since this time
+        **fields: Column values to set
+        
+    Returns:
+        The updated job, or None if it does not exist or a condition failed
+    """
+    query = db.query(TrainingJobDB).filter(TrainingJobDB.id == job_id)
+    if only_if_status is not None:
+        query = query.filter(TrainingJobDB.status.in_(list(only_if_status)))
+    if only_if_owner is not None:
+        query = query.filter(TrainingJobDB.owner == only_if_owner)
+    if only_if_heartbeat_before is not None:
+        query = query.filter(or_(
+            TrainingJobDB.heartbeat_at.is_(None),
+            TrainingJobDB.heartbeat_at < only_if_heartbeat_before
+        ))
+    # A conditional UPDATE, so a cancel and a state change cannot both win
+    if query.update(fields, synchronize_session=False) == 0:
+        db.rollback()
+        return None
+    db.commit()
+    return get_training_job(db, job_id)
+
+
+def claim_training_job(
+    db: Session,
+    job_id: int,
+    owner: str,
+    max_running: int,
+    **fields: Any
+) -> Optional[TrainingJobDB]:
+    """
+    Start a queued job for an owner, unless max_running jobs already run.
+    
+    The cap holds across every API worker sharing the database: running
+    jobs are counted inside the conditional UPDATE that claims the job,
+    after locking the queued and running rows, so claims made at the same
+    time from different workers are decided one after the other.
+    
+    Args:
+        db: Database session
+        job_id: Job ID
+        owner: "host:pid" of the claiming API process
+        max_running: Maximum running jobs across all workers
+        **fields: Further column values to set, e.g. started_at
+        
+    Returns:
+        The claimed job, or None if it is no longer queued, every slot is
+        taken, or the claim lost a lock race (the job stays queued)
+    """
+    # Serializes concurrent claims on MySQL; SQLite runs one writer at a time
+    active = TrainingJobDB.status.in_(["queued", "running"])
+    # The aggregate makes MySQL materialize the count, so it accepts the
+    # same table in the UPDATE
+    running = (
+        select(func.count().label("n"))
+        .select_from(TrainingJobDB)
+        .where(TrainingJobDB.status == "running")
+        .correlate(None)
+        .subquery()
+    )
+    try:
+        db.query(TrainingJobDB.id).filter(active).with_for_update().all()
+        claimed = (
+            db.query(TrainingJobDB)
+            .filter(
+                TrainingJobDB.id == job_id,
+                TrainingJobDB.status == "queued",
+                select(running.c.n).scalar_subquery() < max_running
+            )
+            .update({"status": "running", "owner": owner, **fields}, synchronize_session=False)
+        )
+    except OperationalError:
+        db.rollback()
+        return None
+    if claimed == 0:
+        db.rollback()
+        return None
+    db.commit()
+    return get_training_job(db, job_id)
+
+
+def heartbeat_training_jobs(db: Session, job_ids: Iterable[int], owner: str) -> List[int]:
+    """
+    Mark an owner's running jobs as alive.
+    
+    Returns:
+        IDs among them whose cancellation has been requested
+    """
+    job_ids = list(job_ids)
+    if not job_ids:
+        return []
+    query = db.query(TrainingJobDB).filter(
+        TrainingJobDB.id.in_(job_ids),
+        TrainingJobDB.status == "running",
+        TrainingJobDB.owner == owner
+    )
+    query.update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    return [row[0] for row in query.filter(TrainingJobDB.cancel_requested.is_(True)).with_entities(TrainingJobDB.id)]
+
+
+# Dashboard operations
+_dashboard_lock = threading.Lock()
+_dashboard_cache: Optional[Dict[str, Any]] = None
+_dashboard_cached_at = 0.0
+_dashboard_generation = 0
+
+
+def invalidate_dashboard_summary() -> None:
+    """Drop the cached dashboard summary after a create or delete."""
+    global _dashboard_cache, _dashboard_generation
+    with _dashboard_lock:
+        _dashboard_cache = None
+        _dashboard_generation += 1
+
+
+def get_cached_dashboard_summary() -> Optional[Dict[str, Any]]:
+    """Get the cached dashboard summary if it is still fresh, without touching the database."""
+    with _dashboard_lock:
+        if _dashboard_cache is not None and time.monotonic() - _dashboard_cached_at < DASHBOARD_CACHE_TTL:
+            return _dashboard_cache
+    return None
+
+
+def get_dashboard_summary(db: Session) -> Dict[str, Any]:
+    """
+    Get the dashboard summary, computing it on a cache miss.
+    
+    Counts come from COUNT queries and the prediction summary table,
+    two round trips in total.
+    """
+    global _dashboard_cache, _dashboard_cached_at
+    cached = get_cached_dashboard_summary()
+    if cached is not None:
+        return cached
+    
+    with _dashboard_lock:
+        generation = _dashboard_generation
+    
+    latest_accuracy = (
+        select(ModelDB.accuracy).order_by(ModelDB.created_at.desc()).limit(1).scalar_subquery()
+    )
+    total_models, total_datasets, latest_model_accuracy = db.execute(
+        select(
+            select(func.count()).select_from(ModelDB).scalar_subquery(),
+            select(func.count()).select_from(DatasetDB).scalar_subquery(),
+            latest_accuracy
+        )
+    ).one()
+    counts = get_prediction_label_counts(db)
+    
+    summary = {
+        "total_models": total_models,
+        "total_datasets": total_datasets,
+        "latest_model_accuracy": latest_model_accuracy,
+        "status_distribution": {
+            "berprestasi": counts.get("berprestasi", 0),
+            "tidak_berprestasi": counts.get("tidak_berprestasi", 0)
+        },
+        "prediction_stats": {
+            "total_predictions": sum(counts.values()),
+            "berprestasi_count": counts.get("berprestasi", 0),
+            "tidak_berprestasi_count": counts.get("tidak_berprestasi", 0)
+        }
+    }
+    
+    # Only cache if nothing was created or deleted while the queries ran
+    with _dashboard_lock:
+        if generation == _dashboard_generation:
+            _dashboard_cache = summary
+            _dashboard_cached_at = time.monotonic()
+    return summary
@@ -0,0 +1,86 @@
+"""
+Bounded executors that keep blocking work off the asyncio event loop.
+"""
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Optional, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+# Executor configuration
+IO_POOL_SIZE = int(os.getenv("IO_POOL_SIZE", "16"))
+CPU_POOL_SIZE = int(os.getenv("CPU_POOL_SIZE", str(max(1, (os.cpu_count() or 2) - 1))))
+# Batch predictions with at least this many rows are scored in the process pool
+CPU_OFFLOAD_MIN_ROWS = int(os.getenv("CPU_OFFLOAD_MIN_ROWS", "20000"))
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Get the I/O thread pool, starting it on first use."""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=IO_POOL_SIZE, thread_name_prefix="kkp-io")
+    return _io_executor
+
+
+def get_cpu_executor() -> ProcessPoolExecutor:
+    """Get the process pool, starting it on first use."""
+    global _cpu_executor
+    if _cpu_executor is None:
+        # spawn avoids forking a process that already runs threads
+        _cpu_executor = ProcessPoolExecutor(
+            max_workers=CPU_POOL_SIZE,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _cpu_executor
+
+
+async def run_io(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run blocking DB or file I/O in the I/O thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_db(db: Union[Session, AsyncSession], func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a db_service operation that takes the session as its first argument.
+
+    A sync session runs the operation in the I/O thread pool. An async
+    session runs it on the event loop with run_sync, which awaits the
+    driver wherever the operation would block, so no thread is held.
+    Pass only database work here: anything CPU-heavy in the operation
+    (password hashing, scoring) would run on the event loop, so do it
+    with run_io or run_cpu first.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(func, *args, **kwargs)
+    return await run_io(func, db, *args, **kwargs)
+
+
+async def run_cpu(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run CPU-bound work in the process pool.
+
+    The function and its arguments must be picklable, so pass module-level
+    functions rather than bound methods of service instances.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    """Stop the executors, waiting for running work to finish."""
+    global _io_executor, _cpu_executor
+    if _io_executor is not None:
+        _io_executor.shutdown(wait=True)
+        _io_executor = None
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=True)
+        _cpu_executor = None
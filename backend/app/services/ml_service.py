@@ -3,16 +3,94 @@ Machine Learning service for CART model training and prediction.
 """
 import os
 import json
-from typing import Dict, Any, List, Tuple, Optional
+import time
+import logging
+import tempfile
+from typing import Callable, Dict, Any, List, Tuple, Optional
 from datetime import datetime
 import pandas as pd
 import numpy as np
 import joblib
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, classification_report
 
 from app.api.models import FEATURE_COLUMNS, REQUIRED_COLUMNS
+from app.services.dataset_cache import load_dataset
+from app.services.model_artifact import artifact_path_for, save_artifact, load_artifact
+from app.services.model_cache import ModelCache
+from app.services.prediction_cache import PredictionCache, canonical_row
+from app.services.tree_engine import CompiledTree
+
+
+LABEL_MAP = {0: "tidak_berprestasi", 1: "berprestasi"}
+
+# Approximate heap cost of one node's label/probability payload plus list slots
+NODE_PAYLOAD_BYTES = 512
+
+# Rows per chunk when a CSV is scored as a stream
+PREDICT_CHUNK_ROWS = int(os.getenv("PREDICT_CHUNK_ROWS", "50000"))
+
+# Hyperparameter search, for training jobs only (opt-in per job, or for
+# every job with TRAINING_TUNE); its worker count is set by the job queue
+TRAINING_TUNE = os.getenv("TRAINING_TUNE", "false").lower() in ("1", "true", "yes")
+TRAINING_CV_FOLDS = int(os.getenv("TRAINING_CV_FOLDS", "5"))
+TRAINING_SEARCH_ALPHAS = int(os.getenv("TRAINING_SEARCH_ALPHAS", "8"))
+TRAINING_SEARCH_SCORING = os.getenv("TRAINING_SEARCH_SCORING", "accuracy")
+
+# Search grid besides ccp_alpha, which comes from the pruning path of the data
+SEARCH_MAX_DEPTHS = [4, 6, 8, 10, 12, 16, None]
+SEARCH_MIN_SAMPLES_LEAF = [1, 2, 5, 10, 20]
+SEARCH_CRITERIA = ["gini", "entropy"]
+
+# Candidates kept in the stored search report
+SEARCH_REPORT_TOP = 10
+
+logger = logging.getLogger(__name__)
+
+
+def class_label(cls: Any) -> str:
+    """Map a model class value to its prediction label."""
+    if isinstance(cls, (int, np.integer)):
+        return LABEL_MAP.get(int(cls), str(cls))
+    return str(cls)
+
+
+def _median_from_counts(counts: pd.Series) -> float:
+    """Median of the values a value_counts() Series was built from."""
+    if counts.empty:
+        return float("nan")
+    counts = counts.sort_index()
+    cumulative = counts.to_numpy().cumsum()
+    values = counts.index.to_numpy(dtype=np.float64)
+    total = int(cumulative[-1])
+    # Values at the two middle positions (the same one for an odd count)
+    low = values[np.searchsorted(cumulative, (total - 1) // 2, side="right")]
+    high = values[np.searchsorted(cumulative, total // 2, side="right")]
+    return float((low + high) / 2)
+
+
+def build_payloads(probabilities: np.ndarray, classes: List[Any]) -> List[Tuple[str, Dict[str, float]]]:
+    """
+    Build the (label, rounded probability dict) result for each probability row.
+    
+    Args:
+        probabilities: Probability matrix, one row per node or distinct result
+        classes: Class values in probability column order
+        
+    Returns:
+        List of (prediction label, probability dict) tuples
+    """
+    class_labels = [class_label(cls) for cls in classes]
+    
+    # Rows with the same probabilities (e.g. every pure leaf) share one payload
+    shared: Dict[Tuple[float, ...], Tuple[str, Dict[str, float]]] = {}
+    payloads = []
+    for idx, probs in zip(probabilities.argmax(axis=1).tolist(), probabilities.tolist()):
+        key = tuple(probs)
+        payload = shared.get(key)
+        if payload is None:
+            payload = (class_labels[idx], {cls: round(p, 4) for cls, p in zip(class_labels, probs)})
+            shared[key] = payload
+        payloads.append(payload)
+    return payloads
 
 
 class MLService:
@@ -22,7 +100,12 @@ class MLService:
         """Initialize ML service."""
         self.models_dir = models_dir
         os.makedirs(models_dir, exist_ok=True)
-        self._loaded_models: Dict[int, Any] = {}
+        self.prediction_cache = PredictionCache()
+        self.model_cache = ModelCache(
+            loader=self._load_model_file,
+            sizer=self._estimate_model_bytes,
+            on_invalidate=self.prediction_cache.invalidate_model
+        )
 
     def validate_csv_columns(self, df: pd.DataFrame, require_status: bool = True) -> Tuple[bool, str]:
         """
@@ -32,11 +115,25 @@ class MLService:
             df: DataFrame to validate
             require_status: Whether status column is required
             
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        return self.validate_columns(df.columns, require_status)
+
+    def validate_columns(self, columns: List[str], require_status: bool = True) -> Tuple[bool, str]:
+        """
+        Validate that a CSV header has the required columns.
+        
+        Args:
+            columns: Column names from the header
+            require_status: Whether status column is required
+            
         Returns:
             Tuple of (is_valid, error_message)
         """
         required = REQUIRED_COLUMNS if require_status else FEATURE_COLUMNS
-        missing_cols = [col for col in required if col not in df.columns]
+        present = set(columns)
+        missing_cols = [col for col in required if col not in present]
         
         if missing_cols:
             return False, f"Kolom tidak ditemukan: {', '.join(missing_cols)}"
@@ -65,7 +162,10 @@ class MLService:
         model_name: str,
         target_column: str = "status",
         test_size: float = 0.2,
-        random_state: int = 42
+        random_state: int = 42,
+        progress: Optional[Callable[[float, str], None]] = None,
+        tune: bool = False,
+        search_jobs: int = 1
     ) -> Dict[str, Any]:
         """
         Train a CART (Decision Tree) model.
@@ -76,16 +176,33 @@ class MLService:
             target_column: Target column name
             test_size: Test split ratio
             random_state: Random seed
+            progress: Called with (fraction done, stage name) as training advances
+            tune: Pick the hyperparameters by cross-validated search instead
+                of using the fixed defaults
+            search_jobs: Worker processes for the search
             
         Returns:
             Dictionary with model info and metrics
         """
+        report = progress or (lambda fraction, stage: None)
+        
+        # sklearn is only needed for training; inference runs on the side-car
+        # arrays, so API and pool workers that only predict never import it
+        import sklearn
+        from sklearn.tree import DecisionTreeClassifier
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+
         # Preprocess data
+        report(0.1, "preprocessing")
         df = self.preprocess_data(df)
         
         # Prepare features and target
         X = df[FEATURE_COLUMNS].values
         y = df[target_column].values
+        if tune:
+            # Trees split on float32; converting once spares every search fit a copy
+            X = np.ascontiguousarray(X, dtype=np.float32)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -93,16 +210,23 @@ class MLService:
         )
         
         # Train CART model (DecisionTreeClassifier)
-        model = DecisionTreeClassifier(
-            criterion="gini",
-            random_state=random_state,
-            max_depth=10,
-            min_samples_split=5,
-            min_samples_leaf=2
-        )
-        model.fit(X_train, y_train)
+        search = None
+        if tune:
+            report(0.2, "searching")
+            model, search = self._search_tree(X_train, y_train, random_state, search_jobs)
+        else:
+            report(0.2, "fitting")
+            model = DecisionTreeClassifier(
+                criterion="gini",
+                random_state=random_state,
+                max_depth=10,
+                min_samples_split=5,
+                min_samples_leaf=2
+            )
+            model.fit(X_train, y_train)
         
         # Evaluate
+        report(0.8, "evaluating")
         y_pred = model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         
@@ -119,8 +243,11 @@ class MLService:
             "training_samples": len(X_train),
             "test_samples": len(X_test)
         }
+        if search is not None:
+            metrics["search"] = search
         
         # Save model
+        report(0.9, "saving")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{model_name}_{timestamp}.joblib"
         file_path = os.path.join(self.models_dir, filename)
@@ -133,12 +260,116 @@ class MLService:
         }
         joblib.dump(model_data, file_path)
         
+        # Side-car array file used for inference instead of the pickle
+        compiled = self._compile(model_data)["compiled"]
+        if compiled is not None:
+            training = self._training_meta(model)
+            training.update({
+                "model_name": model_name,
+                "trained_at": datetime.now().isoformat(timespec="seconds"),
+                "sklearn_version": sklearn.__version__,
+                "accuracy": round(accuracy, 4),
+                "metrics": metrics
+            })
+            self._write_artifact(file_path, compiled, model.feature_importances_, training)
+        
         return {
             "file_path": file_path,
             "accuracy": round(accuracy, 4),
             "metrics": metrics
         }
 
+    def _search_tree(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        random_state: int = 42,
+        n_jobs: int = 1
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Pick tree hyperparameters by a parallel, cross-validated grid search.
+        
+        The grid covers max_depth, min_samples_leaf, criterion and ccp_alpha
+        values spread along the cost-complexity pruning path of a full tree
+        on this data. Every (candidate, fold) fit is a separate task for
+        joblib's process workers. The training matrix is written once to a
+        memory-mapped file, so the workers share its pages instead of each
+        receiving a pickled copy.
+        
+        Args:
+            X: Training features (float32, C-contiguous)
+            y: Training labels
+            random_state: Random seed for the trees and fold shuffling
+            n_jobs: Worker processes for the (candidate, fold) fits
+            
+        Returns:
+            Tuple of (best estimator refit on all of X, search report)
+        """
+        from sklearn.tree import DecisionTreeClassifier
+        from sklearn.model_selection import GridSearchCV, StratifiedKFold
+        
+        _, class_counts = np.unique(y, return_counts=True)
+        folds = min(TRAINING_CV_FOLDS, int(class_counts.min()))
+        if folds < 2:
+            raise ValueError("Setiap kelas membutuhkan minimal 2 data untuk validasi silang")
+        
+        # Candidate alphas: quantiles of the pruning path, without the last
+        # one, which prunes the tree down to its root
+        path = DecisionTreeClassifier(random_state=random_state).cost_complexity_pruning_path(X, y)
+        alphas = np.unique(path.ccp_alphas[:-1].clip(min=0))
+        if len(alphas) > TRAINING_SEARCH_ALPHAS:
+            alphas = np.unique(np.quantile(alphas, np.linspace(0, 1, TRAINING_SEARCH_ALPHAS)))
+        alphas = sorted({0.0, *(round(float(alpha), 8) for alpha in alphas)})
+        
+        param_grid = {
+            "max_depth": SEARCH_MAX_DEPTHS,
+            "min_samples_leaf": SEARCH_MIN_SAMPLES_LEAF,
+            "criterion": SEARCH_CRITERIA,
+            "ccp_alpha": alphas
+        }
+        search = GridSearchCV(
+            DecisionTreeClassifier(random_state=random_state),
+            param_grid,
+            scoring=TRAINING_SEARCH_SCORING,
+            cv=StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state),
+            n_jobs=n_jobs,
+            refit=True
+        )
+        
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="kkp-search-") as tmp_dir:
+            shared_path = os.path.join(tmp_dir, "X.npy")
+            np.save(shared_path, X, allow_pickle=False)
+            shared_X = np.load(shared_path, mmap_mode="r")
+            search.fit(shared_X, y)
+            # The refit tree holds no reference to the mapped file
+            model = search.best_estimator_
+        elapsed = time.perf_counter() - start
+        
+        results = search.cv_results_
+        top = np.argsort(results["rank_test_score"], kind="stable")[:SEARCH_REPORT_TOP]
+        report = {
+            "scoring": TRAINING_SEARCH_SCORING,
+            "cv_folds": folds,
+            "candidates": len(results["params"]),
+            "fits": len(results["params"]) * folds,
+            "n_jobs": n_jobs,
+            "seconds": round(elapsed, 3),
+            "ccp_alphas": alphas,
+            "best_params": search.best_params_,
+            "best_cv_score": round(float(search.best_score_), 4),
+            "top": [
+                {
+                    "params": results["params"][i],
+                    "mean_score": round(float(results["mean_test_score"][i]), 4),
+                    "std_score": round(float(results["std_test_score"][i]), 4),
+                    "mean_fit_seconds": round(float(results["mean_fit_time"][i]), 4)
+                }
+                for i in top
+            ]
+        }
+        return model, report
+
     def load_model(self, model_id: int, file_path: str) -> Any:
         """
         Load a model from file.
@@ -150,11 +381,187 @@ class MLService:
         Returns:
             Loaded model data
         """
-        if model_id not in self._loaded_models:
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"Model file not found: {file_path}")
-            self._loaded_models[model_id] = joblib.load(file_path)
-        return self._loaded_models[model_id]
+        return self.model_cache.get(model_id, file_path)
+
+    def invalidate_model(self, model_id: int) -> bool:
+        """Drop a model from the cache after it is deleted or updated."""
+        return self.model_cache.invalidate(model_id)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get model cache statistics."""
+        return self.model_cache.stats()
+
+    def get_prediction_cache_stats(self) -> Dict[str, Any]:
+        """Get prediction cache statistics."""
+        return self.prediction_cache.stats()
+
+    def _load_model_file(self, file_path: str) -> Dict[str, Any]:
+        """
+        Load a model, preferring its memory-mapped side-car array file.
+        
+        Models saved before side-cars existed, or whose side-car no longer
+        matches the .joblib file or cannot be read, are unpickled and
+        compiled; a fresh side-car is then written so later loads can map it.
+        """
+        artifact_path = artifact_path_for(file_path)
+        if os.path.exists(artifact_path):
+            try:
+                model_data = self._load_artifact(artifact_path, file_path)
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                logger.warning("Rebuilding unreadable model artifact %s: %s", artifact_path, e)
+                model_data = None
+            if model_data is not None:
+                return model_data
+        
+        model_data = joblib.load(file_path)
+        model_data.update(self._compile(model_data))
+        model_data["feature_importances"] = model_data["model"].feature_importances_
+        model_data["training"] = self._training_meta(model_data["model"])
+        model_data["mapped"] = False
+        if model_data["compiled"] is not None:
+            try:
+                self._write_artifact(
+                    file_path, model_data["compiled"],
+                    model_data["feature_importances"], model_data["training"]
+                )
+            except OSError as e:
+                logger.warning("Could not write model artifact for %s: %s", file_path, e)
+        return model_data
+
+    def convert_model(self, file_path: str) -> Optional[str]:
+        """
+        Write the side-car artifact for an existing .joblib model.
+        
+        Args:
+            file_path: Path to model file
+            
+        Returns:
+            Path of the written artifact, or None if the model could not
+            be compiled and must keep using sklearn
+        """
+        model_data = joblib.load(file_path)
+        compiled = self._compile(model_data)["compiled"]
+        if compiled is None:
+            return None
+        
+        model = model_data["model"]
+        training = self._training_meta(model)
+        training["trained_at"] = datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(timespec="seconds")
+        self._write_artifact(file_path, compiled, model.feature_importances_, training)
+        return artifact_path_for(file_path)
+
+    def _training_meta(self, model: Any) -> Dict[str, Any]:
+        """Describe a fitted estimator for the artifact metadata."""
+        params = {
+            key: value for key, value in model.get_params().items()
+            if value is None or isinstance(value, (str, int, float, bool))
+        }
+        return {
+            "estimator": type(model).__name__,
+            "params": params,
+            "n_nodes": int(model.tree_.node_count),
+            "max_depth": int(model.tree_.max_depth)
+        }
+
+    def _write_artifact(
+        self,
+        file_path: str,
+        compiled: CompiledTree,
+        feature_importances: np.ndarray,
+        training: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Write the side-car array file for a model."""
+        arrays = compiled.arrays()
+        arrays["feature_importances"] = np.asarray(feature_importances, dtype=np.float64)
+        save_artifact(artifact_path_for(file_path), arrays, {
+            "feature_columns": FEATURE_COLUMNS,
+            "classes": compiled.classes,
+            "training": training or {},
+            "source": self._artifact_source(file_path)
+        })
+
+    def _artifact_source(self, file_path: str) -> Dict[str, int]:
+        """Identify the .joblib file a side-car was written from."""
+        stat = os.stat(file_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def has_current_artifact(self, file_path: str) -> bool:
+        """Check whether a model has a side-car that matches its .joblib file."""
+        artifact_path = artifact_path_for(file_path)
+        if not os.path.exists(artifact_path):
+            return False
+        try:
+            _, meta = load_artifact(artifact_path)
+        except (OSError, ValueError):
+            return False
+        return isinstance(meta, dict) and meta.get("source") == self._artifact_source(file_path)
+
+    def _load_artifact(self, artifact_path: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """Map a side-car array file; returns None if it is stale."""
+        arrays, meta = load_artifact(artifact_path)
+        if meta.get("source") != self._artifact_source(file_path):
+            return None
+        
+        compiled = CompiledTree(
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            children_left=arrays["children_left"],
+            children_right=arrays["children_right"],
+            proba=arrays["proba"],
+            classes=meta["classes"]
+        )
+        return {
+            "model": None,
+            "feature_columns": meta["feature_columns"],
+            "classes": meta["classes"],
+            "feature_importances": arrays["feature_importances"],
+            "training": meta.get("training", {}),
+            "compiled": compiled,
+            "node_payloads": build_payloads(compiled.proba, compiled.classes),
+            "mapped": True
+        }
+
+    def _estimate_model_bytes(self, model_data: Dict[str, Any], file_path: str) -> int:
+        """
+        Estimate the private (per-worker) memory of a loaded model.
+        
+        An unpickled estimator is roughly the size of its file. Compiled
+        arrays count only when they were built in memory; mapped arrays
+        live in the shared page cache. Each node also carries a small
+        payload dict and list slots in this worker's heap.
+        """
+        nbytes = 0
+        if model_data.get("model") is not None:
+            nbytes += os.path.getsize(file_path)
+        compiled = model_data.get("compiled")
+        if compiled is not None:
+            if not model_data.get("mapped"):
+                nbytes += sum(arr.nbytes for arr in compiled.arrays().values())
+            nbytes += compiled.n_nodes * NODE_PAYLOAD_BYTES
+        return nbytes
+
+    def _compile(self, model_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compile the estimator into the fast inference engine.
+        
+        The engine is checked against sklearn on probe rows covering every
+        split; if anything differs the model keeps using sklearn.
+        
+        Args:
+            model_data: Loaded model data with the fitted estimator
+            
+        Returns:
+            Compiled engine and per-node result payloads
+        """
+        model = model_data["model"]
+        compiled = CompiledTree.from_estimator(model)
+        if not compiled.verify(model, compiled.probe_rows(len(FEATURE_COLUMNS))):
+            return {"compiled": None, "node_payloads": None}
+        
+        return {
+            "compiled": compiled,
+            "node_payloads": build_payloads(compiled.proba, compiled.classes)
+        }
 
     def predict(
         self,
@@ -174,41 +581,40 @@ class MLService:
             Prediction result with probabilities
         """
         model_data = self.load_model(model_id, file_path)
-        model = model_data["model"]
         
         # Prepare features in correct order
         feature_values = [features[col] for col in FEATURE_COLUMNS]
-        X = np.array([feature_values])
         
-        # Predict
-        prediction = model.predict(X)[0]
-        probabilities = model.predict_proba(X)[0]
-        
-        # Map prediction to label
-        classes = model_data.get("classes", [0, 1])
-        label_map = {0: "tidak_berprestasi", 1: "berprestasi"}
-        
-        if isinstance(prediction, (int, np.integer)):
-            prediction_label = label_map.get(prediction, str(prediction))
+        row = None
+        if self.prediction_cache.enabled:
+            row = canonical_row(feature_values)
+            cached = self.prediction_cache.get(model_id, row)
+            if cached is not None:
+                return {"prediction": cached[0], "probability": dict(cached[1])}
+        
+        compiled = model_data.get("compiled")
+        if compiled is not None:
+            # Label and probabilities come from the same leaf in one walk
+            payload = model_data["node_payloads"][compiled.leaf(feature_values)]
         else:
-            prediction_label = str(prediction)
+            model = model_data["model"]
+            probabilities = model.predict_proba(np.array([feature_values]))
+            payload = build_payloads(probabilities, model_data.get("classes", [0, 1]))[0]
         
-        # Build probability dict
-        prob_dict = {}
-        for i, cls in enumerate(classes):
-            cls_label = label_map.get(cls, str(cls)) if isinstance(cls, (int, np.integer)) else str(cls)
-            prob_dict[cls_label] = round(float(probabilities[i]), 4)
+        if row is not None:
+            self.prediction_cache.put(model_id, row, payload)
         
         return {
-            "prediction": prediction_label,
-            "probability": prob_dict
+            "prediction": payload[0],
+            "probability": dict(payload[1])
         }
 
     def predict_batch(
         self,
         model_id: int,
         file_path: str,
-        df: pd.DataFrame
+        df: pd.DataFrame,
+        medians: Optional[Dict[str, float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Make batch predictions from DataFrame.
@@ -217,57 +623,206 @@ class MLService:
             model_id: Model ID
             file_path: Path to model file
             df: DataFrame with features
+            medians: Fill values per column, e.g. from feature_medians when
+                df is one chunk of a file; defaults to the medians of df itself
             
         Returns:
             List of prediction results
         """
         model_data = self.load_model(model_id, file_path)
-        model = model_data["model"]
         
         # Preprocess (without requiring status)
-        for col in FEATURE_COLUMNS:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-                df[col] = df[col].fillna(df[col].median())
+        self._fill_features(df, medians)
         
         # Prepare features
         X = df[FEATURE_COLUMNS].values
         
-        # Predict
-        predictions = model.predict(X)
-        probabilities = model.predict_proba(X)
+        payloads, payload_index = self._score_matrix(model_data, X)
         
-        # Map results
-        classes = model_data.get("classes", [0, 1])
-        label_map = {0: "tidak_berprestasi", 1: "berprestasi"}
+        inputs = df[FEATURE_COLUMNS].to_dict(orient="records")
         
         results = []
-        for i, (pred, probs) in enumerate(zip(predictions, probabilities)):
-            if isinstance(pred, (int, np.integer)):
-                pred_label = label_map.get(pred, str(pred))
-            else:
-                pred_label = str(pred)
-            
-            prob_dict = {}
-            for j, cls in enumerate(classes):
-                cls_label = label_map.get(cls, str(cls)) if isinstance(cls, (int, np.integer)) else str(cls)
-                prob_dict[cls_label] = round(float(probs[j]), 4)
-            
+        for i, idx in enumerate(payload_index.ravel().tolist()):
+            pred_label, prob_dict = payloads[idx]
             results.append({
                 "row_index": i,
-                "input_data": df.iloc[i][FEATURE_COLUMNS].to_dict(),
+                "input_data": inputs[i],
                 "prediction": pred_label,
-                "probability": prob_dict
+                "probability": dict(prob_dict)
             })
         
         return results
 
+    def score_frame(
+        self,
+        model_id: int,
+        file_path: str,
+        df: pd.DataFrame,
+        medians: Optional[Dict[str, float]] = None
+    ) -> Tuple[List[str], List[Dict[str, float]]]:
+        """
+        Score a DataFrame without building a result dict per row.
+        
+        Feature columns are coerced and median-filled in place, the same
+        as in predict_batch. Used for streamed CSV output, one chunk at a time.
+        
+        Args:
+            model_id: Model ID
+            file_path: Path to model file
+            df: DataFrame with features
+            medians: Fill values per column, e.g. from feature_medians for
+                the whole file; defaults to the medians of df itself
+            
+        Returns:
+            Tuple of (prediction labels, probability dicts) per row; the
+            probability dicts are shared between rows and must not be modified
+        """
+        model_data = self.load_model(model_id, file_path)
+        self._fill_features(df, medians)
+        payloads, payload_index = self._score_matrix(model_data, df[FEATURE_COLUMNS].values)
+        
+        rows = [payloads[idx] for idx in payload_index.ravel().tolist()]
+        return [label for label, _ in rows], [probs for _, probs in rows]
+
+    def _fill_features(self, df: pd.DataFrame, medians: Optional[Dict[str, float]] = None) -> None:
+        """Coerce feature columns to numbers and fill gaps with the column median."""
+        for col in FEATURE_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+                fill = medians[col] if medians is not None and col in medians else df[col].median()
+                df[col] = df[col].fillna(fill)
+
+    def has_feature_gaps(self, df: pd.DataFrame) -> bool:
+        """Whether any feature value is missing or not a number, i.e. would be median-filled."""
+        return any(
+            pd.to_numeric(df[col], errors="coerce").isna().any()
+            for col in FEATURE_COLUMNS if col in df.columns
+        )
+
+    def feature_medians(self, csv_path: str, chunksize: int = PREDICT_CHUNK_ROWS) -> Dict[str, float]:
+        """
+        Get the median of every feature column of a CSV in one chunked pass.
+        
+        Chunks are reduced to value counts, so memory grows with the number
+        of distinct grades rather than rows. The result matches the median
+        of the whole column, letting chunked scoring fill gaps exactly as
+        scoring the file in one piece would.
+        
+        Args:
+            csv_path: Path to CSV file
+            chunksize: Rows parsed at a time
+            
+        Returns:
+            Median per feature column present in the file (NaN if the
+            column has no numeric values)
+        """
+        counts: Dict[str, pd.Series] = {}
+        reader = pd.read_csv(csv_path, usecols=lambda c: c in FEATURE_COLUMNS, chunksize=chunksize)
+        with reader:
+            for chunk in reader:
+                for col in chunk.columns:
+                    chunk_counts = pd.to_numeric(chunk[col], errors="coerce").value_counts()
+                    counts[col] = chunk_counts if col not in counts else counts[col].add(chunk_counts, fill_value=0)
+        return {col: _median_from_counts(col_counts) for col, col_counts in counts.items()}
+
+    def predict_many(
+        self,
+        model_id: int,
+        file_path: str,
+        features_list: List[Dict[str, float]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Score several single-prediction requests in one vectorized call.
+        
+        Rows are looked up in the prediction cache first, as in predict;
+        only the misses are scored, and their results are cached.
+        
+        Args:
+            model_id: Model ID
+            file_path: Path to model file
+            features_list: Feature dictionaries, one per request
+            
+        Returns:
+            Prediction results in request order
+        """
+        model_data = self.load_model(model_id, file_path)
+        rows = [[features[col] for col in FEATURE_COLUMNS] for features in features_list]
+        
+        keys = None
+        found: List[Optional[Tuple[str, Dict[str, float]]]] = [None] * len(rows)
+        if self.prediction_cache.enabled:
+            keys = [canonical_row(row) for row in rows]
+            found = [self.prediction_cache.get(model_id, key) for key in keys]
+        
+        misses = [i for i, payload in enumerate(found) if payload is None]
+        if misses:
+            payloads, payload_index = self._score_matrix(model_data, np.array([rows[i] for i in misses]))
+            for i, idx in zip(misses, payload_index.ravel().tolist()):
+                found[i] = payloads[idx]
+                if keys is not None:
+                    self.prediction_cache.put(model_id, keys[i], payloads[idx])
+        
+        return [
+            {"prediction": pred_label, "probability": dict(prob_dict)}
+            for pred_label, prob_dict in found
+        ]
+
+    def _score_matrix(
+        self,
+        model_data: Dict[str, Any],
+        X: np.ndarray
+    ) -> Tuple[List[Tuple[str, Dict[str, float]]], np.ndarray]:
+        """
+        Score a feature matrix.
+        
+        Args:
+            model_data: Loaded model data
+            X: Feature matrix in FEATURE_COLUMNS order
+            
+        Returns:
+            Tuple of (result payloads, payload index per row)
+        """
+        # Score each distinct feature vector once and scatter back to its rows
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        row_keys = X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+        _, first_index, row_inverse = np.unique(row_keys, return_index=True, return_inverse=True)
+        X_unique = X[first_index]
+        
+        compiled = model_data.get("compiled")
+        if compiled is not None:
+            # Rows landing in the same leaf share its precomputed payload
+            return model_data["node_payloads"], compiled.apply(X_unique)[row_inverse]
+        
+        # Labels come from the same probability matrix, one payload per distinct row
+        probabilities = model_data["model"].predict_proba(X_unique)
+        unique_probs, payload_index = np.unique(probabilities, axis=0, return_inverse=True)
+        return (
+            build_payloads(unique_probs, model_data.get("classes", [0, 1])),
+            payload_index.ravel()[row_inverse]
+        )
+
+    def warm_up(self, model_id: int, file_path: str) -> float:
+        """
+        Load a model and run synthetic predictions through it.
+        
+        Args:
+            model_id: Model ID
+            file_path: Path to model file
+            
+        Returns:
+            Seconds spent warming the model
+        """
+        start = time.perf_counter()
+        features = {col: 50.0 for col in FEATURE_COLUMNS}
+        self.predict(model_id, file_path, features)
+        self.predict_batch(model_id, file_path, pd.DataFrame([features, features]))
+        return time.perf_counter() - start
+
     def get_feature_importance(self, model_id: int, file_path: str) -> Dict[str, float]:
         """Get feature importance from model."""
         model_data = self.load_model(model_id, file_path)
-        model = model_data["model"]
         
-        importances = model.feature_importances_
+        importances = model_data["feature_importances"]
         feature_importance = {}
         
         for i, col in enumerate(FEATURE_COLUMNS):
@@ -279,3 +834,39 @@ class MLService:
 # Global ML service instance
 ml_service = MLService()
 
+
+def train_model_task(
+    csv_path: str,
+    model_name: str,
+    target_column: str = "status",
+    progress: Optional[Callable[[float, str], None]] = None,
+    tune: bool = False,
+    search_jobs: int = 1
+) -> Dict[str, Any]:
+    """
+    Train a model from a CSV file; module-level so it can run in the process pool.
+    
+    The worker reads the file itself, so the DataFrame is never pickled
+    across the process boundary. The status target is read from the
+    dataset's columnar cache; other targets are not cached, so the CSV
+    is parsed instead.
+    """
+    if progress is not None:
+        progress(0.0, "loading")
+    if target_column == "status":
+        df = load_dataset(csv_path, PREDICT_CHUNK_ROWS)
+    else:
+        df = pd.read_csv(csv_path)
+    return ml_service.train_model(
+        df, model_name, target_column, progress=progress, tune=tune, search_jobs=search_jobs
+    )
+
+
+def predict_batch_task(
+    model_id: int,
+    file_path: str,
+    df: pd.DataFrame,
+    medians: Optional[Dict[str, float]] = None
+) -> List[Dict[str, Any]]:
+    """Score a batch; module-level so it can run in the process pool."""
+    return ml_service.predict_batch(model_id, file_path, df, medians)
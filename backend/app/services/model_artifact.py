@@ -0,0 +1,124 @@
+"""
+Side-car array file for compiled models, memory-mapped on load.
+
+Layout (little-endian):
+    8 bytes   magic b"KKPTREE\\0"
+    4 bytes   format version (uint32)
+    4 bytes   header length in bytes (uint32)
+    N bytes   JSON header: metadata plus dtype/shape/offset of every array
+    ...       raw array data, each array starting on a 64-byte boundary
+
+Because the arrays are stored raw, every worker process that opens the
+same file maps the same page-cache pages instead of holding its own copy.
+"""
+import os
+import json
+import mmap
+import struct
+import tempfile
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+
+ARTIFACT_MAGIC = b"KKPTREE\0"
+ARTIFACT_VERSION = 1
+ARTIFACT_SUFFIX = ".tree"
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGNMENT = 64
+
+
+def artifact_path_for(model_path: str) -> str:
+    """Get the side-car artifact path for a .joblib model file."""
+    root, _ = os.path.splitext(model_path)
+    return root + ARTIFACT_SUFFIX
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the array alignment."""
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def save_artifact(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+    """
+    Write arrays and metadata to an artifact file.
+
+    The file is written to a temporary name and renamed into place, so
+    readers never see a partially written artifact.
+
+    Args:
+        path: Destination path
+        arrays: Named arrays to store
+        meta: JSON-serializable metadata
+    """
+    arrays = {name: np.ascontiguousarray(arr) for name, arr in arrays.items()}
+
+    # Offsets are relative to the start of the data section
+    layout = {}
+    offset = 0
+    for name, arr in arrays.items():
+        offset = _align(offset)
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes
+
+    header = json.dumps({"meta": meta, "arrays": layout}).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header))
+
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, len(header)))
+            f.write(header)
+            for name, arr in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(arr.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_artifact(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Open an artifact with its arrays memory-mapped read-only.
+
+    Args:
+        path: Artifact path
+
+    Returns:
+        Tuple of (arrays, metadata)
+
+    Raises:
+        ValueError: If the file is empty, truncated or otherwise corrupt
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        magic, version, header_len = _PREAMBLE.unpack_from(buffer, 0)
+        if magic != ARTIFACT_MAGIC:
+            raise ValueError(f"Not a model artifact: {path}")
+        if version > ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported model artifact version {version}: {path}")
+        if _PREAMBLE.size + header_len > len(buffer):
+            raise ValueError(f"Truncated model artifact header: {path}")
+
+        header = json.loads(bytes(buffer[_PREAMBLE.size:_PREAMBLE.size + header_len]).decode("utf-8"))
+        data_start = _align(_PREAMBLE.size + header_len)
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            end = data_start + spec["offset"] + count * dtype.itemsize
+            if count < 0 or spec["offset"] < 0 or end > len(buffer):
+                raise ValueError(f"Truncated model artifact array {name!r}: {path}")
+            # The arrays keep the mapping alive; it is unmapped when they are freed
+            arrays[name] = np.frombuffer(
+                buffer, dtype=dtype, count=count, offset=data_start + spec["offset"]
+            ).reshape(spec["shape"])
+        return arrays, header["meta"]
+    except (struct.error, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Corrupt model artifact {path}: {e!r}") from e
@@ -0,0 +1,210 @@
+"""
+Bounded, memory-accounted cache for loaded models.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+# Cache configuration
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", "32"))
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "256"))
+
+
+def file_signature(file_path: str) -> Tuple[int, int, int]:
+    """
+    Identify the current contents of a file without reading it.
+
+    Raises FileNotFoundError if the file does not exist.
+    """
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class _CacheEntry:
+    """A cached value with the file state it was loaded from."""
+
+    __slots__ = ("value", "file_path", "signature", "nbytes")
+
+    def __init__(self, value: Any, file_path: str, signature: Tuple[int, int, int], nbytes: int):
+        self.value = value
+        self.file_path = file_path
+        self.signature = signature
+        self.nbytes = nbytes
+
+
+class ModelCache:
+    """
+    LRU cache of loaded models bounded by entry count and estimated memory.
+
+    Entries are revalidated against the model file on every lookup, so a
+    replaced or reused file path is reloaded and a removed file is purged.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        sizer: Callable[[Any, str], int],
+        max_entries: int = MODEL_CACHE_MAX_ENTRIES,
+        max_bytes: int = int(MODEL_CACHE_MAX_MB * 1024 * 1024),
+        on_invalidate: Optional[Callable[[Hashable], Any]] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            loader: Loads a model from a file path
+            sizer: Estimates the memory footprint of a loaded model in bytes
+            max_entries: Maximum number of cached models
+            max_bytes: Memory budget for all cached models
+            on_invalidate: Called with the key when an entry is dropped because
+                its file changed or it was explicitly invalidated
+        """
+        self.loader = loader
+        self.sizer = sizer
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_invalidate = on_invalidate
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._loads = 0
+        self._load_seconds = 0.0
+
+    def get(self, key: Hashable, file_path: str) -> Any:
+        """
+        Return the cached model, loading it on a miss or stale entry.
+
+        Args:
+            key: Cache key (model ID)
+            file_path: Path to the model file
+
+        Returns:
+            Loaded model
+        """
+        try:
+            signature = file_signature(file_path)
+        except FileNotFoundError:
+            self.invalidate(key)
+            raise FileNotFoundError(f"Model file not found: {file_path}") from None
+
+        entry = self._lookup(key, file_path, signature)
+        if entry is not None:
+            return entry.value
+
+        # Only one thread loads a given model; the others wait and reuse it
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._lookup(key, file_path, signature, count=False)
+            if entry is not None:
+                return entry.value
+
+            start = time.perf_counter()
+            value = self.loader(file_path)
+            elapsed = time.perf_counter() - start
+            nbytes = self.sizer(value, file_path)
+
+            with self._lock:
+                self._loads += 1
+                self._load_seconds += elapsed
+                self._remove(key)
+                self._entries[key] = _CacheEntry(value, file_path, signature, nbytes)
+                self._bytes += nbytes
+                self._evict()
+            return value
+
+    def _lookup(
+        self,
+        key: Hashable,
+        file_path: str,
+        signature: Tuple[int, int, int],
+        count: bool = True
+    ) -> Optional[_CacheEntry]:
+        """Return a fresh entry, dropping it if the file has changed."""
+        stale = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.file_path != file_path or entry.signature != signature):
+                self._remove(key)
+                self._invalidations += 1
+                entry = None
+                stale = True
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if count:
+                if entry is not None:
+                    self._hits += 1
+                else:
+                    self._misses += 1
+        if stale and self.on_invalidate is not None:
+            self.on_invalidate(key)
+        return entry
+
+    def _remove(self, key: Hashable) -> Optional[_CacheEntry]:
+        """Remove an entry; caller must hold the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+        return entry
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until within budget; caller must hold the lock."""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+            self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Drop a cached model.
+
+        Args:
+            key: Cache key (model ID)
+
+        Returns:
+            True if an entry was removed
+        """
+        with self._lock:
+            removed = self._remove(key) is not None
+            if removed:
+                self._invalidations += 1
+            self._key_locks.pop(key, None)
+        if self.on_invalidate is not None:
+            self.on_invalidate(key)
+        return removed
+
+    def clear(self) -> None:
+        """Drop all cached models."""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters for sizing."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "loads": self._loads,
+                "load_seconds_total": round(self._load_seconds, 6),
+                "load_seconds_avg": round(self._load_seconds / self._loads, 6) if self._loads else 0.0
+            }
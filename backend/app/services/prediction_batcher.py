@@ -0,0 +1,143 @@
+"""
+Micro-batching coalescer for single prediction requests.
+"""
+import os
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.services.ml_service import MLService, ml_service
+from app.services.executor_service import run_io
+
+
+# Batching configuration (a window of 0 disables coalescing)
+PREDICT_BATCH_WINDOW_MS = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "0"))
+PREDICT_BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "64"))
+
+
+class _PendingBatch:
+    """Requests collected for one model during the current window."""
+
+    __slots__ = ("file_path", "items", "timer")
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.items: List[Tuple[Dict[str, float], asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single predictions per model into one vectorized call.
+
+    The first request for a model opens a window; requests arriving within
+    it join the same batch, which is scored when the window closes or the
+    batch reaches its maximum size. Each caller gets its own result back.
+    """
+
+    def __init__(
+        self,
+        service: MLService,
+        window_ms: float = PREDICT_BATCH_WINDOW_MS,
+        max_batch_size: int = PREDICT_BATCH_MAX_SIZE
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            service: ML service used for scoring
+            window_ms: How long to collect requests before scoring
+            max_batch_size: Score immediately once this many requests are waiting
+        """
+        self.service = service
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Dict[int, _PendingBatch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._requests = 0
+        self._batches = 0
+        self._largest_batch = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether requests are coalesced at all."""
+        return self.window > 0 and self.max_batch_size > 1
+
+    async def predict(
+        self,
+        model_id: int,
+        file_path: str,
+        features: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """
+        Make a single prediction, batched with concurrent requests for the same model.
+
+        Args:
+            model_id: Model ID
+            file_path: Path to model file
+            features: Feature dictionary
+
+        Returns:
+            Prediction result with probabilities
+        """
+        if not self.enabled:
+            return await run_io(self.service.predict, model_id, file_path, features)
+
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(model_id)
+        if batch is None:
+            batch = _PendingBatch(file_path)
+            batch.timer = loop.call_later(self.window, self._flush, model_id)
+            self._pending[model_id] = batch
+
+        future = loop.create_future()
+        batch.items.append((features, future))
+        if len(batch.items) >= self.max_batch_size:
+            self._flush(model_id)
+        return await future
+
+    def _flush(self, model_id: int) -> None:
+        """Close the pending batch for a model and schedule its scoring."""
+        batch = self._pending.pop(model_id, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+
+        self._requests += len(batch.items)
+        self._batches += 1
+        self._largest_batch = max(self._largest_batch, len(batch.items))
+        task = asyncio.get_running_loop().create_task(self._score(model_id, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, model_id: int, batch: _PendingBatch) -> None:
+        """Score a closed batch off the event loop and resolve its waiters."""
+        try:
+            results = await run_io(
+                self.service.predict_many,
+                model_id, batch.file_path, [features for features, _ in batch.items]
+            )
+        except Exception as e:
+            for _, future in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch.items, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batching counters."""
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "requests": self._requests,
+            "batches": self._batches,
+            "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else 0.0,
+            "largest_batch": self._largest_batch
+        }
+
+
+# Global batcher instance
+prediction_batcher = PredictionBatcher(ml_service)
@@ -0,0 +1,96 @@
+"""
+Bounded memo cache of prediction results keyed by model and feature vector.
+"""
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+
+# Cache configuration (0 disables the cache)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "100000"))
+
+
+def canonical_row(values: Sequence[float]) -> Tuple[float, ...]:
+    """
+    Canonicalize a feature vector for use as a cache key.
+
+    Values are rounded to float32, the precision the tree compares at,
+    so 90, 90.0 and numpy scalars of the same grade share one key.
+    """
+    return tuple(array("f", values).tolist())
+
+
+class PredictionCache:
+    """LRU cache of (label, probability) payloads per (model_id, feature tuple)."""
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Hashable, Tuple[float, ...]], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are cached at all."""
+        return self.max_entries > 0
+
+    def get(self, model_id: Hashable, row: Tuple[float, ...]) -> Optional[Any]:
+        """Return the cached payload for a feature vector, if any."""
+        key = (model_id, row)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return payload
+
+    def put(self, model_id: Hashable, row: Tuple[float, ...], payload: Any) -> None:
+        """Cache the payload for a feature vector."""
+        key = (model_id, row)
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate_model(self, model_id: Hashable) -> int:
+        """
+        Drop every cached result for a model.
+
+        Args:
+            model_id: Model ID
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == model_id]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions
+            }
@@ -0,0 +1,275 @@
+"""
+Write-behind log that saves single predictions off the response path.
+"""
+import os
+import time
+import asyncio
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from app.services.db_service import SessionLocal, create_predictions_bulk, get_existing_model_ids
+from app.services.executor_service import run_io
+
+
+# Write-behind configuration (a queue size of 0 writes synchronously)
+PREDICTION_LOG_QUEUE_SIZE = int(os.getenv("PREDICTION_LOG_QUEUE_SIZE", "10000"))
+PREDICTION_LOG_BATCH_SIZE = int(os.getenv("PREDICTION_LOG_BATCH_SIZE", "500"))
+PREDICTION_LOG_FLUSH_MS = float(os.getenv("PREDICTION_LOG_FLUSH_MS", "200"))
+# What to do when the queue is full: "block" waits up to PREDICTION_LOG_BLOCK_MS
+# for room (on the event loop, holding no pool thread) and then drops, "drop"
+# drops right away; drops are counted in stats
+PREDICTION_LOG_FULL_POLICY = os.getenv("PREDICTION_LOG_FULL_POLICY", "block")
+PREDICTION_LOG_BLOCK_MS = float(os.getenv("PREDICTION_LOG_BLOCK_MS", "1000"))
+PREDICTION_LOG_MAX_RETRIES = int(os.getenv("PREDICTION_LOG_MAX_RETRIES", "3"))
+PREDICTION_LOG_SHUTDOWN_S = float(os.getenv("PREDICTION_LOG_SHUTDOWN_S", "30"))
+
+
+def write_predictions(records: List[Dict[str, Any]]) -> int:
+    """
+    Save a batch of prediction records in one transaction.
+    
+    A model deleted while its predictions were queued makes the batch
+    violate the model_id foreign key. Those records are then saved without
+    a model, as ON DELETE SET NULL left the model's older predictions, and
+    the batch is written again; the records of other models are kept.
+    """
+    db = SessionLocal()
+    try:
+        try:
+            return create_predictions_bulk(db, None, records)
+        except IntegrityError:
+            model_ids = {record["model_id"] for record in records if record["model_id"] is not None}
+            deleted = model_ids - get_existing_model_ids(db, model_ids)
+            if not deleted:
+                raise
+            repaired = [
+                dict(record, model_id=None) if record["model_id"] in deleted else record
+                for record in records
+            ]
+            return create_predictions_bulk(db, None, repaired)
+    finally:
+        db.close()
+
+
+class PredictionLog:
+    """
+    Bounded in-process queue of predictions flushed to the database in batches.
+
+    A background thread writes a batch once it reaches batch_size records
+    or flush_ms after its first record, whichever comes first. Failed
+    writes are retried with backoff; a batch that still fails is counted
+    as lost. stop() drains and flushes everything still queued.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[Dict[str, Any]]], int] = write_predictions,
+        max_queue: int = PREDICTION_LOG_QUEUE_SIZE,
+        batch_size: int = PREDICTION_LOG_BATCH_SIZE,
+        flush_ms: float = PREDICTION_LOG_FLUSH_MS,
+        full_policy: str = PREDICTION_LOG_FULL_POLICY,
+        block_ms: float = PREDICTION_LOG_BLOCK_MS,
+        max_retries: int = PREDICTION_LOG_MAX_RETRIES
+    ):
+        """
+        Initialize the log.
+
+        Args:
+            writer: Saves a batch of records and returns how many were written
+            max_queue: Maximum queued records (0 writes synchronously)
+            batch_size: Flush once this many records are waiting
+            flush_ms: Flush at most this long after the first waiting record
+            full_policy: "block" or "drop" when the queue is full
+            block_ms: How long "block" waits for room before dropping
+            max_retries: Write attempts after the first before a batch is lost
+        """
+        if full_policy not in ("block", "drop"):
+            raise ValueError(f"Unknown prediction log policy: {full_policy}")
+        self.writer = writer
+        self.max_queue = max(0, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_ms / 1000.0
+        self.full_policy = full_policy
+        self.block_timeout = block_ms / 1000.0
+        self.max_retries = max(0, max_retries)
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=self.max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._lost = 0
+        self._blocked = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._flush_seconds_total = 0.0
+        self._flush_seconds_max = 0.0
+        self._max_depth = 0
+        self._last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background writer is accepting records."""
+        return self._thread is not None and not self._stopping.is_set()
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        if self.max_queue == 0 or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="kkp-prediction-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = PREDICTION_LOG_SHUTDOWN_S) -> None:
+        """Stop accepting records and flush everything still queued."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+        # Records that raced in while the writer was exiting
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._flush(leftover)
+
+    async def submit(
+        self,
+        model_id: int,
+        input_data: Dict[str, Any],
+        prediction: str,
+        probability: Dict[str, float]
+    ) -> None:
+        """
+        Queue a prediction for saving without waiting on the database.
+
+        When the writer is not running (queue size 0, or outside the app
+        lifecycle) the record is written synchronously instead.
+        """
+        record = {
+            "model_id": model_id,
+            "input_data": input_data,
+            "prediction": prediction,
+            "probability": probability,
+            "created_at": datetime.utcnow()
+        }
+        if not self.running:
+            await run_io(self.writer, [record])
+            return
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            if self.full_policy == "drop" or not await self._wait_for_room(record):
+                with self._lock:
+                    self._dropped += 1
+                return
+
+        with self._lock:
+            self._enqueued += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+
+    async def _wait_for_room(self, record: Dict[str, Any]) -> bool:
+        """
+        Wait until the record fits or the wait times out.
+        
+        Polls with asyncio.sleep rather than a blocking put in the I/O pool,
+        so a full queue cannot tie up the threads that database work needs.
+        """
+        with self._lock:
+            self._blocked += 1
+        deadline = time.monotonic() + self.block_timeout
+        delay = 0.005
+        while True:
+            try:
+                self._queue.put_nowait(record)
+                return True
+            except queue.Full:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.05)
+
+    def _run(self) -> None:
+        """Collect records into batches and flush them until stopped and drained."""
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+
+            # Fill the batch until it is full or the flush interval has passed
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0 and not self._stopping.is_set():
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """Write one batch, retrying with backoff before counting it as lost."""
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                written = self.writer(batch)
+            except Exception as e:
+                with self._lock:
+                    self._failed_flushes += 1
+                    self._last_error = str(e)
+                if attempt < self.max_retries:
+                    time.sleep(min(0.5 * 2 ** attempt, 5.0))
+                continue
+
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._flushes += 1
+                self._written += written
+                self._flush_seconds_total += elapsed
+                self._flush_seconds_max = max(self._flush_seconds_max, elapsed)
+            return
+
+        with self._lock:
+            self._lost += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, throughput and flush latency counters."""
+        with self._lock:
+            return {
+                "running": self.running,
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "max_depth_seen": self._max_depth,
+                "full_policy": self.full_policy,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "dropped": self._dropped,
+                "lost": self._lost,
+                "blocked": self._blocked,
+                "flushes": self._flushes,
+                "failed_flushes": self._failed_flushes,
+                "flush_seconds_avg": round(self._flush_seconds_total / self._flushes, 6) if self._flushes else 0.0,
+                "flush_seconds_max": round(self._flush_seconds_max, 6),
+                "last_error": self._last_error
+            }
+
+
+# Global prediction log instance
+prediction_log = PredictionLog()
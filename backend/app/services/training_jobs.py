@@ -0,0 +1,494 @@
+"""
+Background training jobs, each run in its own process under a concurrency cap.
+"""
+import os
+import signal
+import socket
+import asyncio
+import logging
+import multiprocessing
+from datetime import datetime, timedelta
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.services.db_service import (
+    SessionLocal, TrainingJobDB, TRAINING_JOB_FINISHED, create_model, delete_model, get_training_job,
+    get_training_jobs_by_status, update_training_job, claim_training_job, heartbeat_training_jobs
+)
+from app.services.ml_service import train_model_task
+from app.services.dataset_cache import remove_dataset_cache
+from app.services.model_artifact import artifact_path_for
+from app.services.executor_service import run_io
+
+
+# Training job configuration; the cap counts running jobs across every
+# API worker sharing the database
+TRAINING_MAX_CONCURRENT = int(os.getenv("TRAINING_MAX_CONCURRENT", "2"))
+# Worker processes per hyperparameter search; 0 shares the cores between
+# the TRAINING_MAX_CONCURRENT jobs that may search at once
+TRAINING_SEARCH_JOBS = int(os.getenv("TRAINING_SEARCH_JOBS", "0"))
+# How long a cancelled job's process gets to exit before it is killed
+TRAINING_CANCEL_GRACE_S = float(os.getenv("TRAINING_CANCEL_GRACE_S", "5"))
+# How often a worker refreshes its running jobs' heartbeat and picks up cancel requests
+TRAINING_HEARTBEAT_S = float(os.getenv("TRAINING_HEARTBEAT_S", "2"))
+# A running job whose owner has not reported for this long is failed as orphaned,
+# and a job queued this long is picked up by any worker with a free slot
+TRAINING_STALE_S = float(os.getenv("TRAINING_STALE_S", "60"))
+# How long /models/train waits for its job before answering with the job to poll
+TRAINING_SYNC_WAIT_S = float(os.getenv("TRAINING_SYNC_WAIT_S", "300"))
+
+_mp_context = multiprocessing.get_context("spawn")
+
+logger = logging.getLogger(__name__)
+
+
+def _train_in_process(
+    conn: Connection,
+    csv_path: str,
+    model_name: str,
+    target_column: str,
+    tune: bool,
+    search_jobs: int
+) -> None:
+    """Child process entry point: train, reporting progress and the result over a pipe."""
+    if hasattr(os, "setpgrp"):
+        # Lead a process group, so stopping the job also stops the worker
+        # processes a hyperparameter search starts
+        os.setpgrp()
+    try:
+        result = train_model_task(
+            csv_path, model_name, target_column,
+            progress=lambda fraction, stage: conn.send(("progress", fraction, stage)),
+            tune=tune,
+            search_jobs=search_jobs
+        )
+        conn.send(("done", result))
+    except BaseException as e:
+        conn.send(("error", str(e) or e.__class__.__name__))
+    finally:
+        conn.close()
+
+
+def _signal_job(process: Any, sig: int) -> None:
+    """Send a signal to a job process and every process in its group."""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, sig)
+            return
+        except (ProcessLookupError, PermissionError):
+            # The child has not set up its group yet, or the group is gone
+            pass
+    if process.is_alive():
+        if sig == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+
+
+def _owner_id() -> str:
+    """Identify this API process as the owner of the jobs it runs."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_gone(owner: Optional[str]) -> bool:
+    """Whether a job owner on this host has exited; owners elsewhere are judged by heartbeat."""
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        # Left by an earlier process that had the same pid; the caller
+        # skips jobs this process is running
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def _with_session(func: Any, *args: Any, **kwargs: Any) -> Any:
+    """Run a db_service operation in a short-lived session of its own."""
+    db = SessionLocal()
+    try:
+        return func(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+class TrainingJobQueue:
+    """
+    Runs training jobs in separate processes, at most max_concurrent at a time
+    across all API workers.
+
+    A process per job, rather than a shared pool, means a running fit can
+    be cancelled by terminating its process. Job state lives in the
+    training_jobs table, so any API worker can report or cancel a job:
+    the worker running it (the owner) refreshes a heartbeat on the row and
+    stops the job once cancel_requested is set. Every state change is a
+    conditional update, so a job finishes exactly once, and a job whose
+    owner died is failed by whichever worker notices first.
+    """
+
+    def __init__(self, max_concurrent: int = TRAINING_MAX_CONCURRENT):
+        """
+        Initialize the queue.
+
+        Args:
+            max_concurrent: Maximum number of jobs training at once, in
+                this worker and in total across workers
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.search_jobs = TRAINING_SEARCH_JOBS or max(1, (os.cpu_count() or 1) // self.max_concurrent)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._scheduled: Set[int] = set()
+        self._claimed: Set[int] = set()
+        self._processes: Dict[int, Any] = {}
+        # Job ID -> loop time its process was told to stop for a cancel
+        self._cancelled: Dict[int, float] = {}
+        # Job ID -> event set when its task here ends, and a file to delete then
+        self._done: Dict[int, asyncio.Event] = {}
+        self._remove_files: Dict[int, str] = {}
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        """Fail jobs whose owner has exited, resume queued ones and start the heartbeat."""
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._stopping = False
+        await run_io(self._fail_orphaned)
+        for job in await run_io(_with_session, get_training_jobs_by_status, ["queued"]):
+            self.submit(job.id)
+        self._monitor_task = asyncio.get_running_loop().create_task(self._monitor())
+
+    async def stop(self) -> None:
+        """Terminate running jobs and mark them failed; queued jobs resume on the next start."""
+        self._stopping = True
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            await asyncio.gather(self._monitor_task, return_exceptions=True)
+            self._monitor_task = None
+        for process in list(self._processes.values()):
+            _signal_job(process, signal.SIGTERM)
+        if self._tasks:
+            _, pending = await asyncio.wait(list(self._tasks), timeout=TRAINING_CANCEL_GRACE_S)
+            if pending:
+                for process in list(self._processes.values()):
+                    _signal_job(process, signal.SIGKILL)
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def submit(self, job_id: int, remove_file: Optional[str] = None) -> None:
+        """
+        Schedule a queued job; it starts once a slot is free.
+
+        Args:
+            job_id: Training job ID
+            remove_file: File to delete once the job is finished, such as
+                an upload that is not kept as a dataset
+        """
+        if job_id in self._scheduled:
+            return
+        self._scheduled.add(job_id)
+        self._done[job_id] = asyncio.Event()
+        if remove_file:
+            self._remove_files[job_id] = remove_file
+        task = asyncio.get_running_loop().create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._scheduled.discard(job_id))
+
+    async def cancel(self, job_id: int) -> Optional[TrainingJobDB]:
+        """
+        Cancel a queued or running job.
+
+        A queued job is cancelled at once. For a running job the request is
+        recorded on its row; the owning worker stops it on its next
+        heartbeat, and this waits briefly for that to happen.
+
+        Returns:
+            The job after the cancel (still "running" with cancel_requested
+            set if its owner has not stopped it yet), or None if it was
+            already finished
+        """
+        job = await run_io(
+            _with_session, update_training_job, job_id, only_if_status=["queued"],
+            status="cancelled", stage="cancelled", finished_at=datetime.utcnow()
+        )
+        if job is not None:
+            return job
+
+        job = await run_io(
+            _with_session, update_training_job, job_id, only_if_status=["running"], cancel_requested=True
+        )
+        if job is None:
+            return None
+        if job_id in self._claimed:
+            self._terminate(job_id)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + TRAINING_HEARTBEAT_S + TRAINING_CANCEL_GRACE_S + 1
+        while job is not None and job.status == "running" and loop.time() < deadline:
+            await asyncio.sleep(0.2)
+            job = await run_io(_with_session, get_training_job, job_id)
+        return job
+
+    async def wait(self, job_id: int, timeout: float) -> Optional[TrainingJobDB]:
+        """
+        Wait up to timeout seconds for a job to finish.
+
+        A job run by this worker ends the wait as soon as it is recorded;
+        one claimed by another worker is polled on the heartbeat interval.
+
+        Returns:
+            The job, finished or not, or None if it does not exist
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            job = await run_io(_with_session, get_training_job, job_id)
+            remaining = deadline - loop.time()
+            if job is None or job.status in TRAINING_JOB_FINISHED or remaining <= 0:
+                return job
+            done = self._done.get(job_id)
+            try:
+                if done is None:
+                    await asyncio.sleep(min(remaining, TRAINING_HEARTBEAT_S))
+                else:
+                    await asyncio.wait_for(done.wait(), min(remaining, TRAINING_HEARTBEAT_S))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue counters for this worker."""
+        return {
+            "owner": _owner_id(),
+            "max_concurrent": self.max_concurrent,
+            "search_jobs": self.search_jobs,
+            "running": len(self._processes),
+            "scheduled": len(self._tasks)
+        }
+
+    def _terminate(self, job_id: int) -> None:
+        """Stop a job's process for a cancel; it is killed if still alive after the grace period."""
+        if job_id in self._cancelled:
+            return
+        self._cancelled[job_id] = asyncio.get_running_loop().time()
+        process = self._processes.get(job_id)
+        if process is not None:
+            _signal_job(process, signal.SIGTERM)
+
+    async def _monitor(self) -> None:
+        """Heartbeat running jobs, act on cancel requests and pick up orphaned jobs."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(TRAINING_HEARTBEAT_S)
+            try:
+                cancel_ids = await run_io(
+                    _with_session, heartbeat_training_jobs, list(self._claimed), _owner_id()
+                )
+                for job_id in cancel_ids:
+                    self._terminate(job_id)
+                for job_id, requested_at in list(self._cancelled.items()):
+                    process = self._processes.get(job_id)
+                    if process is not None and loop.time() - requested_at > TRAINING_CANCEL_GRACE_S:
+                        _signal_job(process, signal.SIGKILL)
+
+                await run_io(self._fail_orphaned)
+                stale_before = datetime.utcnow() - timedelta(seconds=TRAINING_STALE_S)
+                for job in await run_io(_with_session, get_training_jobs_by_status, ["queued"]):
+                    if job.created_at and job.created_at < stale_before:
+                        self.submit(job.id)
+            except Exception:
+                logger.exception("Training job heartbeat failed")
+
+    def _fail_orphaned(self) -> None:
+        """Fail running jobs whose owner has exited or stopped sending heartbeats."""
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=TRAINING_STALE_S)
+        for job in _with_session(get_training_jobs_by_status, ["running"]):
+            if job.id in self._claimed:
+                continue
+            conditions: Dict[str, Any] = {}
+            if job.owner:
+                conditions["only_if_owner"] = job.owner
+            if not _owner_gone(job.owner):
+                last_seen = job.heartbeat_at or job.started_at
+                if last_seen is not None and last_seen >= stale_before:
+                    continue
+                conditions["only_if_heartbeat_before"] = stale_before
+            _with_session(
+                update_training_job, job.id, only_if_status=["running"], **conditions,
+                status="failed", error="Pelatihan terhenti karena proses server berhenti", finished_at=now
+            )
+
+    async def _run(self, job_id: int) -> None:
+        """Wait for a slot, then train the job in a fresh process."""
+        try:
+            async with self._semaphore:
+                if self._stopping:
+                    return
+                self._claimed.add(job_id)
+                try:
+                    await self._run_claimed(job_id)
+                finally:
+                    self._claimed.discard(job_id)
+                    self._cancelled.pop(job_id, None)
+        finally:
+            remove_file = self._remove_files.pop(job_id, None)
+            if remove_file is not None:
+                await run_io(self._remove_job_file, job_id, remove_file)
+            done = self._done.pop(job_id, None)
+            if done is not None:
+                done.set()
+
+    async def _run_claimed(self, job_id: int) -> None:
+        """Claim a queued job for this worker once a slot is free, and train it."""
+        while True:
+            now = datetime.utcnow()
+            job = await run_io(
+                _with_session, claim_training_job, job_id, _owner_id(), self.max_concurrent,
+                stage="starting", started_at=now, heartbeat_at=now
+            )
+            if job is not None:
+                break
+            current = await run_io(_with_session, get_training_job, job_id)
+            if current is None or current.status != "queued" or self._stopping:
+                # Cancelled while queued, or claimed by another worker
+                return
+            # Other workers' jobs hold every slot; wait for one to finish
+            await asyncio.sleep(TRAINING_HEARTBEAT_S)
+
+        receiver, sender = _mp_context.Pipe(duplex=False)
+        # Not a daemon, so a hyperparameter search can start its own workers
+        process = _mp_context.Process(
+            target=_train_in_process,
+            args=(sender, job.dataset_file, job.name, job.target_column, bool(job.tune), self.search_jobs),
+            name=f"kkp-train-{job_id}"
+        )
+        process.start()
+        sender.close()
+        self._processes[job_id] = process
+        if job_id in self._cancelled:
+            _signal_job(process, signal.SIGTERM)
+        try:
+            outcome = await self._watch(job_id, process, receiver)
+        finally:
+            receiver.close()
+            await run_io(process.join)
+            # Search workers outlive a stopped job process; end them with it
+            _signal_job(process, signal.SIGKILL)
+            self._processes.pop(job_id, None)
+
+        await run_io(self._finish, job, outcome)
+
+    async def _watch(self, job_id: int, process: Any, receiver: Connection) -> Tuple[str, Any]:
+        """
+        Relay progress from the child to the job row until it reports its outcome.
+
+        The event loop watches the pipe, so no pool thread waits on it for
+        the length of the training.
+        """
+        loop = asyncio.get_running_loop()
+        messages: "asyncio.Queue[Optional[Tuple[Any, ...]]]" = asyncio.Queue()
+        fd = receiver.fileno()
+
+        def on_readable() -> None:
+            try:
+                messages.put_nowait(receiver.recv())
+            except (EOFError, OSError):
+                loop.remove_reader(fd)
+                messages.put_nowait(None)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            while True:
+                message = await messages.get()
+                if message is None:
+                    break
+                if message[0] != "progress":
+                    return message[0], message[1]
+                _, fraction, stage = message
+                await run_io(
+                    _with_session, update_training_job, job_id,
+                    only_if_status=["running"], only_if_owner=_owner_id(),
+                    progress=round(fraction, 4), stage=stage
+                )
+        finally:
+            loop.remove_reader(fd)
+
+        # The child closed the pipe without an outcome: it was stopped or crashed
+        await run_io(process.join)
+        return "exited", process.exitcode
+
+    def _finish(self, job: TrainingJobDB, outcome: Tuple[str, Any]) -> None:
+        """Record a job's outcome, creating the model row if it succeeded."""
+        kind, value = outcome
+        finished_at = datetime.utcnow()
+        current = _with_session(get_training_job, job.id)
+        cancelled = job.id in self._cancelled or bool(current is not None and current.cancel_requested)
+
+        def record(**fields: Any) -> Optional[TrainingJobDB]:
+            # Only the owner of a still-running job may finish it
+            return _with_session(
+                update_training_job, job.id, only_if_status=["running"], only_if_owner=_owner_id(),
+                finished_at=finished_at, **fields
+            )
+
+        if kind == "done" and not cancelled:
+            try:
+                model = _with_session(
+                    create_model,
+                    name=job.name,
+                    file_path=value["file_path"],
+                    accuracy=value["accuracy"],
+                    metrics=value["metrics"],
+                    dataset_path=job.dataset_path,
+                    dataset_id=job.dataset_id
+                )
+            except Exception as e:
+                self._remove_model_files(value["file_path"])
+                record(status="failed", error=f"Gagal menyimpan model: {str(e)}")
+                return
+            if record(status="succeeded", progress=1.0, stage="done", model_id=model.id) is None:
+                # The job was failed or cancelled in the meantime; drop its model
+                _with_session(delete_model, model.id)
+            return
+
+        if kind == "done":
+            # Finished just as it was cancelled
+            self._remove_model_files(value["file_path"])
+        if cancelled:
+            record(status="cancelled", stage="cancelled")
+        elif kind == "error":
+            record(status="failed", error=f"Gagal melatih model: {value}")
+        elif self._stopping:
+            record(status="failed", error="Pelatihan terhenti karena server dimatikan")
+        else:
+            record(status="failed", error=f"Proses pelatihan berhenti tiba-tiba (exit code {value})")
+
+    @staticmethod
+    def _remove_job_file(job_id: int, file_path: str) -> None:
+        """Delete a job's dataset file once the job is finished."""
+        job = _with_session(get_training_job, job_id)
+        if job is not None and job.status not in TRAINING_JOB_FINISHED:
+            # Claimed by another worker, or left queued by a shutdown; it
+            # still needs the file
+            return
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        remove_dataset_cache(file_path)
+
+    @staticmethod
+    def _remove_model_files(file_path: str) -> None:
+        """Delete a trained model and its side-car when its row could not be saved."""
+        for path in (file_path, artifact_path_for(file_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# Global training job queue instance
+training_jobs = TrainingJobQueue()
@@ -0,0 +1,219 @@
+"""
+Compiled inference engine for fitted CART (Decision Tree) models.
+"""
+from array import array
+from typing import Any, Dict, Sequence, Tuple
+import numpy as np
+
+
+TREE_LEAF = -1
+
+
+def _as_kind(arr: Any, kind: str, dtype: Any) -> np.ndarray:
+    """Use an array as-is when its dtype is already of the given kind."""
+    arr = np.asarray(arr)
+    return arr if arr.dtype.kind == kind else arr.astype(dtype)
+
+
+def _floor_float32(values: np.ndarray) -> np.ndarray:
+    """
+    Round float64 thresholds down to the nearest float32.
+
+    Inputs are compared as float32, and for a float32 x the test
+    x <= t holds exactly when x <= floor32(t), so the smaller dtype
+    gives the same splits.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    over = rounded.astype(np.float64) > values
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+class CompiledTree:
+    """Flattened decision tree that scores rows without calling sklearn."""
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children_left: np.ndarray,
+        children_right: np.ndarray,
+        proba: np.ndarray,
+        classes: Sequence[Any]
+    ):
+        """
+        Build the engine from flat tree arrays.
+
+        Arrays that already have an integer (indices) or float (thresholds,
+        probabilities) dtype are used as-is, so compact and memory-mapped
+        arrays stay shared instead of being widened into copies.
+
+        Args:
+            feature: Split feature index per node
+            threshold: Split threshold per node
+            children_left: Left child index per node (-1 for leaves)
+            children_right: Right child index per node (-1 for leaves)
+            proba: Class probabilities per node, shape (n_nodes, n_classes)
+            classes: Class values in the same order as the proba columns
+        """
+        self.feature = _as_kind(feature, "i", np.intp)
+        self.threshold = _as_kind(threshold, "f", np.float64)
+        self.children_left = _as_kind(children_left, "i", np.intp)
+        self.children_right = _as_kind(children_right, "i", np.intp)
+        self.proba = _as_kind(proba, "f", np.float64)
+        self.classes = list(classes)
+        self.class_index = self.proba.argmax(axis=1)
+
+        # Memoryviews index to plain Python scalars far cheaper than NumPy
+        # scalar indexing, and unlike lists they do not copy mapped arrays
+        self._feature = memoryview(np.ascontiguousarray(self.feature))
+        self._threshold = memoryview(np.ascontiguousarray(self.threshold))
+        self._left = memoryview(np.ascontiguousarray(self.children_left))
+        self._right = memoryview(np.ascontiguousarray(self.children_right))
+
+    @classmethod
+    def from_estimator(cls, model: Any) -> "CompiledTree":
+        """
+        Compile a fitted sklearn DecisionTreeClassifier into compact arrays.
+
+        Feature indices fit in int16 and node indices in int32, and
+        thresholds are stored as float32. Probabilities stay float64 so
+        they match predict_proba bit for bit.
+        """
+        tree = model.tree_
+        feature_dtype = np.int16 if tree.n_features < np.iinfo(np.int16).max else np.int32
+
+        # Normalize once so every node holds the same vector predict_proba returns
+        value = np.asarray(tree.value[:, 0, :], dtype=np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0.0] = 1.0
+
+        return cls(
+            feature=tree.feature.astype(feature_dtype),
+            threshold=_floor_float32(tree.threshold),
+            children_left=tree.children_left.astype(np.int32),
+            children_right=tree.children_right.astype(np.int32),
+            proba=value / totals,
+            classes=model.classes_.tolist()
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Get the flat arrays that fully describe the tree."""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children_left": self.children_left,
+            "children_right": self.children_right,
+            "proba": self.proba
+        }
+
+    @property
+    def n_nodes(self) -> int:
+        """Number of nodes in the tree."""
+        return len(self._feature)
+
+    def leaf(self, row: Sequence[float]) -> int:
+        """
+        Walk a single row down the tree.
+
+        Args:
+            row: Feature values in training column order
+
+        Returns:
+            Index of the leaf node reached
+        """
+        # sklearn compares float32 inputs against the thresholds
+        x = array("f", row).tolist()
+        feature = self._feature
+        threshold = self._threshold
+        left = self._left
+        right = self._right
+
+        node = 0
+        while left[node] != TREE_LEAF:
+            if x[feature[node]] <= threshold[node]:
+                node = left[node]
+            else:
+                node = right[node]
+        return node
+
+    def predict_one(self, row: Sequence[float]) -> Tuple[Any, np.ndarray]:
+        """
+        Score a single row in one pass.
+
+        Args:
+            row: Feature values in training column order
+
+        Returns:
+            Tuple of (predicted class, probability vector)
+        """
+        node = self.leaf(row)
+        return self.classes[self.class_index[node]], self.proba[node]
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Vectorized traversal returning the leaf index of every row.
+
+        Args:
+            X: Feature matrix, shape (n_samples, n_features)
+
+        Returns:
+            Leaf node index per row
+        """
+        X = np.asarray(X, dtype=np.float32)
+        nodes = np.zeros(X.shape[0], dtype=np.intp)
+        active = np.flatnonzero(self.children_left[nodes] != TREE_LEAF)
+
+        # One step per tree level over the rows that have not reached a leaf
+        while active.size:
+            current = nodes[active]
+            go_left = X[active, self.feature[current]] <= self.threshold[current]
+            nodes[active] = np.where(go_left, self.children_left[current], self.children_right[current])
+            active = active[self.children_left[nodes[active]] != TREE_LEAF]
+
+        return nodes
+
+    def verify(self, model: Any, X: np.ndarray) -> bool:
+        """
+        Check the compiled engine against sklearn on sample rows.
+
+        Args:
+            model: The fitted estimator this engine was compiled from
+            X: Rows to compare on
+
+        Returns:
+            True when labels and probabilities match sklearn exactly
+        """
+        leaves = self.apply(X)
+        expected_proba = model.predict_proba(X)
+        expected_labels = model.predict(X)
+        labels = np.asarray(self.classes, dtype=object)[self.class_index[leaves]]
+        return (
+            np.allclose(self.proba[leaves], expected_proba, rtol=0, atol=1e-12)
+            and np.array_equal(labels, np.asarray(expected_labels, dtype=object))
+        )
+
+    def probe_rows(self, n_features: int, n_random: int = 256, seed: int = 0) -> np.ndarray:
+        """
+        Build rows that land on both sides of every split.
+
+        Args:
+            n_features: Width of the feature matrix
+            n_random: Number of extra random rows in the 0-100 grade range
+            seed: Random seed for the extra rows
+
+        Returns:
+            Matrix of probe rows
+        """
+        rng = np.random.default_rng(seed)
+        base = rng.uniform(0, 100, size=(n_random, n_features))
+        rows = [base]
+        for f, t in zip(self._feature, self._threshold):
+            if f < 0:
+                continue
+            edge = base[: max(1, n_random // 8)].copy()
+            for value in (t, np.nextafter(np.float32(t), np.float32(np.inf))):
+                edge[:, f] = value
+                rows.append(edge.copy())
+        return np.vstack(rows)
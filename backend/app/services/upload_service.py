@@ -0,0 +1,318 @@
+"""
+Disk-spooled streaming of CSV uploads with incremental validation.
+"""
+import os
+import csv
+import hashlib
+import tempfile
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+from python_multipart.exceptions import MultipartParseError
+
+from app.services.executor_service import run_io
+
+
+UPLOADS_DIR = "app/uploads"
+
+# Upload configuration
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+UPLOAD_MAX_MB = float(os.getenv("UPLOAD_MAX_MB", "100"))
+PREDICT_UPLOAD_MAX_MB = float(os.getenv("PREDICT_UPLOAD_MAX_MB", "500"))
+
+# Longest CSV header line and total size of the plain form fields
+_MAX_HEADER_BYTES = 64 * 1024
+_MAX_FIELD_BYTES = 64 * 1024
+
+
+class SpooledUpload:
+    """A CSV upload written to disk, plus the form fields sent with it."""
+
+    def __init__(
+        self,
+        path: str,
+        filename: str,
+        size: int,
+        sha256: str,
+        columns: List[str],
+        fields: Dict[str, str]
+    ):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.columns = columns
+        self.fields = fields
+
+    def field(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Get a form field, treating an empty value as missing."""
+        value = self.fields.get(name)
+        return value if value else default
+
+    def bool_field(self, name: str, default: bool = False) -> bool:
+        """Get an optional true/false form field."""
+        value = self.field(name)
+        if value is None:
+            return default
+        if value.lower() in ("1", "true", "yes", "on"):
+            return True
+        if value.lower() in ("0", "false", "no", "off"):
+            return False
+        raise HTTPException(status_code=422, detail=f"Field '{name}' harus berupa true atau false")
+
+    def int_field(self, name: str) -> int:
+        """Get a required integer form field."""
+        value = self.field(name)
+        if value is None:
+            raise HTTPException(status_code=422, detail=f"Field '{name}' wajib diisi")
+        try:
+            return int(value)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Field '{name}' harus berupa angka")
+
+    def keep(self, path: str) -> str:
+        """Move the spooled file to its final location."""
+        os.replace(self.path, path)
+        self.path = path
+        return path
+
+    def remove(self) -> None:
+        """Delete the spooled file if it still exists."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _MultipartState:
+    """Collects parser callbacks for one request: form fields and file bytes."""
+
+    def __init__(self, file_field: str):
+        self.file_field = file_field
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.file_seen = False
+        self.complete = False
+        self.buffer = bytearray()
+        self.size = 0
+        self.error: Optional[HTTPException] = None
+        self._field_bytes = 0
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._name = ""
+        self._is_file = False
+        self._data = bytearray()
+
+    def callbacks(self) -> Dict[str, Callable]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_end": self.on_end
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._name = ""
+        self._is_file = False
+        self._data = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in options:
+            return
+
+        if self._name != self.file_field or self.file_seen:
+            self.error = HTTPException(status_code=400, detail="Hanya satu file CSV yang dapat diunggah")
+            return
+        self._is_file = True
+        self.file_seen = True
+        self.filename = options[b"filename"].decode("utf-8", "replace")
+        if not self.filename.endswith(".csv"):
+            self.error = HTTPException(status_code=400, detail="File harus berformat CSV")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._is_file:
+            self.buffer += data[start:end]
+            self.size += end - start
+            return
+
+        self._field_bytes += end - start
+        if self._field_bytes > _MAX_FIELD_BYTES:
+            self.error = HTTPException(status_code=413, detail="Field form terlalu besar")
+            return
+        self._data += data[start:end]
+
+    def on_part_end(self) -> None:
+        if not self._is_file:
+            self.fields[self._name] = self._data.decode("utf-8", "replace")
+
+    def on_end(self) -> None:
+        self.complete = True
+
+
+def _parse_header(head: bytes) -> List[str]:
+    """Parse the column names from the first line of a CSV."""
+    line = head.split(b"\n", 1)[0].decode("utf-8-sig").rstrip("\r")
+    return next(csv.reader([line]), [])
+
+
+def _write_chunk(sink: BinaryIO, digest: Any, data: bytes) -> None:
+    """Append a chunk to the spooled file and the running hash."""
+    sink.write(data)
+    digest.update(data)
+
+
+async def receive_csv_upload(
+    request: Request,
+    validate_columns: Callable[[List[str]], Tuple[bool, str]],
+    max_mb: float = UPLOAD_MAX_MB,
+    file_field: str = "file"
+) -> SpooledUpload:
+    """
+    Stream a multipart CSV upload to a temp file in the uploads directory.
+
+    The body is read in chunks and written to disk as it arrives, with the
+    SHA-256 computed along the way, so memory use does not grow with the
+    file size. The CSV header is validated as soon as its first line has
+    arrived and the size limit is enforced during the stream, so bad or
+    oversized files are rejected before the rest of the body is received.
+
+    Args:
+        request: Incoming multipart/form-data request
+        validate_columns: Returns (is_valid, error_message) for the header columns
+        max_mb: Maximum file size in megabytes
+        file_field: Name of the form field carrying the file
+
+    Returns:
+        The spooled upload; the caller must keep() or remove() it
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Request harus berupa multipart/form-data")
+
+    max_bytes = int(max_mb * 1024 * 1024)
+    too_large = HTTPException(status_code=413, detail=f"Ukuran file melebihi batas {max_mb:g} MB")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes + _MAX_FIELD_BYTES:
+        raise too_large
+
+    state = _MultipartState(file_field)
+    parser = MultipartParser(params[b"boundary"], state.callbacks())
+    digest = hashlib.sha256()
+    columns: Optional[List[str]] = None
+
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=UPLOADS_DIR, prefix="upload_", suffix=".part")
+    sink = os.fdopen(fd, "wb")
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise HTTPException(status_code=400, detail=f"Gagal membaca form upload: {str(e)}")
+            if state.error is not None:
+                raise state.error
+            if state.size > max_bytes:
+                raise too_large
+
+            # Validate the header once its line is complete, before the rest arrives
+            if columns is None and (b"\n" in state.buffer or len(state.buffer) > _MAX_HEADER_BYTES):
+                try:
+                    columns = _parse_header(bytes(state.buffer[:_MAX_HEADER_BYTES]))
+                except (UnicodeDecodeError, csv.Error) as e:
+                    raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
+                is_valid, error_msg = validate_columns(columns)
+                if not is_valid:
+                    raise HTTPException(status_code=400, detail=error_msg)
+
+            if columns is not None and len(state.buffer) >= UPLOAD_CHUNK_BYTES:
+                await run_io(_write_chunk, sink, digest, bytes(state.buffer))
+                state.buffer.clear()
+        parser.finalize()
+
+        # A body cut off before the closing boundary would store a truncated file
+        if not state.complete:
+            raise HTTPException(status_code=400, detail="Gagal membaca form upload: body tidak lengkap")
+        if not state.file_seen:
+            raise HTTPException(status_code=400, detail=f"Field '{file_field}' berisi file CSV wajib diisi")
+        if columns is None:
+            # The whole file is a single line (or empty)
+            if not state.buffer.strip():
+                raise HTTPException(status_code=400, detail="Gagal membaca file CSV: file kosong")
+            try:
+                columns = _parse_header(bytes(state.buffer))
+            except (UnicodeDecodeError, csv.Error) as e:
+                raise HTTPException(status_code=400, detail=f"Gagal membaca file CSV: {str(e)}")
+            is_valid, error_msg = validate_columns(columns)
+            if not is_valid:
+                raise HTTPException(status_code=400, detail=error_msg)
+
+        if state.buffer:
+            await run_io(_write_chunk, sink, digest, bytes(state.buffer))
+            state.buffer.clear()
+        sink.close()
+    except BaseException:
+        sink.close()
+        os.remove(path)
+        raise
+
+    return SpooledUpload(
+        path=path,
+        filename=state.filename,
+        size=state.size,
+        sha256=digest.hexdigest(),
+        columns=columns,
+        fields=state.fields
+    )
+
+
+def upload_openapi(fields: Dict[str, str], required: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """
+    Describe a streamed CSV upload form for the OpenAPI docs.
+
+    Routes that read the body themselves have no File/Form parameters,
+    so the form is declared here to keep /docs usable.
+
+    Args:
+        fields: Form field names and their JSON schema types
+        required: Required fields besides the file
+
+    Returns:
+        Value for the route's openapi_extra
+    """
+    properties = {"file": {"type": "string", "format": "binary"}}
+    properties.update({name: {"type": kind} for name, kind in fields.items()})
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": properties,
+                        "required": ["file", *required]
+                    }
+                }
+            }
+        }
+    }
@@ -0,0 +1,99 @@
+"""
+Startup warm-up of models so the first predictions after a restart are fast.
+"""
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List
+
+from app.services.db_service import SessionLocal, get_latest_models, get_models_by_ids
+from app.services.ml_service import ml_service
+
+
+# Warm-up configuration
+MODEL_WARMUP_COUNT = int(os.getenv("MODEL_WARMUP_COUNT", "5"))
+MODEL_WARMUP_IDS = [int(x) for x in os.getenv("MODEL_WARMUP_IDS", "").split(",") if x.strip()]
+
+
+class WarmupState:
+    """Tracks whether the service has finished warming its models."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.status = "cold"
+        self.started_at = None
+        self.finished_at = None
+        self.models: List[Dict[str, Any]] = []
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether warm-up has finished."""
+        return self.status == "warm"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a snapshot of the warm-up state."""
+        with self._lock:
+            return {
+                "status": self.status,
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "models": list(self.models)
+            }
+
+    def start(self) -> None:
+        """Mark warm-up as in progress."""
+        with self._lock:
+            self.status = "warming"
+            self.started_at = datetime.utcnow()
+            self.models = []
+
+    def record(self, result: Dict[str, Any]) -> None:
+        """Record the outcome for one model."""
+        with self._lock:
+            self.models.append(result)
+
+    def finish(self) -> None:
+        """Mark warm-up as complete."""
+        with self._lock:
+            self.status = "warm"
+            self.finished_at = datetime.utcnow()
+
+
+warmup_state = WarmupState()
+
+
+def warm_up_models() -> Dict[str, Any]:
+    """
+    Preload and warm the pinned models, or the latest N models.
+
+    A model that fails to load is recorded and skipped so one broken file
+    never keeps the service from becoming ready.
+
+    Returns:
+        Final warm-up state
+    """
+    warmup_state.start()
+    targets = []
+    db = SessionLocal()
+    try:
+        if MODEL_WARMUP_IDS:
+            models = get_models_by_ids(db, MODEL_WARMUP_IDS)
+        elif MODEL_WARMUP_COUNT > 0:
+            models = get_latest_models(db, MODEL_WARMUP_COUNT)
+        else:
+            models = []
+        targets = [(m.id, m.file_path) for m in models]
+    except Exception as e:
+        warmup_state.record({"model_id": None, "ok": False, "error": str(e)})
+    finally:
+        db.close()
+
+    for model_id, file_path in targets:
+        try:
+            seconds = ml_service.warm_up(model_id, file_path)
+            warmup_state.record({"model_id": model_id, "ok": True, "seconds": round(seconds, 4)})
+        except Exception as e:
+            warmup_state.record({"model_id": model_id, "ok": False, "error": str(e)})
+
+    warmup_state.finish()
+    return warmup_state.to_dict()
@@ -0,0 +1,101 @@
+"""
+Measure the latency/throughput trade-off of coalescing single predictions.
+
+Concurrent callers send single predictions with varied feature rows
+through PredictionBatcher, once without coalescing (window 0) and once per
+window/max-size setting, with the prediction cache off so every row is
+scored. Prints throughput, p50/p99 latency and the mean batch size:
+
+    python -m benchmarks.bench_coalescer
+    python -m benchmarks.bench_coalescer --concurrency 256 --settings 0:1 1:32 2:64 5:128
+"""
+import os
+import time
+import asyncio
+import argparse
+import statistics
+import tempfile
+from typing import Dict, List, Tuple
+
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+from app.api.models import FEATURE_COLUMNS
+from app.services.ml_service import MLService
+from app.services.prediction_batcher import PredictionBatcher
+from app.services.executor_service import shutdown_executors
+
+
+def _setting(value: str) -> Tuple[float, int]:
+    """Parse a window_ms:max_batch_size pair."""
+    window, _, size = value.partition(":")
+    return float(window), int(size or 1)
+
+
+def _rows(count: int, seed: int) -> List[Dict[str, float]]:
+    """Distinct grades-like feature rows."""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(80, 8, size=(count, len(FEATURE_COLUMNS))).clip(0, 100).round(1)
+    return [dict(zip(FEATURE_COLUMNS, row.tolist())) for row in values]
+
+
+async def _run(batcher: PredictionBatcher, file_path: str, rows: List[Dict[str, float]], concurrency: int) -> Tuple[float, List[float]]:
+    """Send every row once from concurrency closed-loop callers."""
+    latencies: List[float] = []
+    next_row = iter(rows)
+
+    async def caller() -> None:
+        for features in next_row:
+            start = time.perf_counter()
+            await batcher.predict(1, file_path, features)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the single-prediction coalescer.")
+    parser.add_argument("--requests", type=int, default=20000, help="Predictions per setting")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight")
+    parser.add_argument("--train-rows", type=int, default=20000, help="Training rows (controls tree size)")
+    parser.add_argument(
+        "--settings", type=_setting, nargs="+", default=[(0, 1), (1, 16), (2, 32), (5, 64), (10, 128)],
+        help="window_ms:max_batch_size pairs; 0:1 is no coalescing"
+    )
+    args = parser.parse_args()
+
+    train = _rows(args.train_rows, seed=0)
+    X = np.array([[row[col] for col in FEATURE_COLUMNS] for row in train])
+    y = np.where(X[:, :4].mean(axis=1) > 80, "berprestasi", "tidak_berprestasi")
+    model = DecisionTreeClassifier(random_state=0).fit(X, y)
+    rows = _rows(args.requests, seed=1)
+
+    with tempfile.TemporaryDirectory() as models_dir:
+        service = MLService(models_dir)
+        # Score every request rather than measuring cache hits
+        service.prediction_cache.max_entries = 0
+        file_path = os.path.join(models_dir, "bench.joblib")
+        joblib.dump({"model": model, "feature_columns": FEATURE_COLUMNS, "classes": model.classes_.tolist()}, file_path)
+        service.convert_model(file_path)
+        service.load_model(1, file_path)
+
+        print(f"{model.tree_.node_count} nodes, {args.requests} requests, concurrency {args.concurrency}")
+        for window_ms, max_size in args.settings:
+            batcher = PredictionBatcher(service, window_ms=window_ms, max_batch_size=max_size)
+            elapsed, latencies = asyncio.run(_run(batcher, file_path, rows, args.concurrency))
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            mean_batch = batcher.stats()["avg_batch_size"] if batcher.enabled else 1.0
+            print(
+                f"window={window_ms:5g} ms  max={max_size:4}  {len(latencies) / elapsed:8.0f} req/s  "
+                f"p50={statistics.median(latencies) * 1e3:7.2f} ms  p99={p99 * 1e3:7.2f} ms  "
+                f"mean batch={mean_batch:6.1f}"
+            )
+    shutdown_executors()
+
+
+if __name__ == "__main__":
+    main()
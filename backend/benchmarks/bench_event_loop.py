@@ -0,0 +1,74 @@
+"""
+Check that training does not stall other requests on the same worker.
+
+Uploads a synthetic dataset to /models/train on a running server and polls
+/health while it trains. With blocking work kept off the event loop the
+health latency stays flat; a stalled loop shows up as a max close to the
+training time:
+
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.bench_event_loop --url http://127.0.0.1:8000 --rows 200000
+"""
+import io
+import time
+import asyncio
+import argparse
+from typing import List
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from app.api.models import FEATURE_COLUMNS
+
+
+def synthetic_csv(rows: int, seed: int = 0) -> bytes:
+    """A labelled grades dataset of the given size."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.integers(50, 101, size=(rows, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    df["absen"] = rng.integers(0, 20, size=rows)
+    df["status"] = np.where(df.iloc[:, :4].mean(axis=1) > 75, "berprestasi", "tidak_berprestasi")
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def run(url: str, rows: int, interval: float) -> None:
+    content = synthetic_csv(rows)
+    async with httpx.AsyncClient(base_url=url, timeout=600) as client:
+        async def train() -> float:
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/v1/models/train",
+                files={"file": ("bench.csv", content, "text/csv")},
+                data={"name": "bench-event-loop"}
+            )
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+        task = asyncio.create_task(train())
+        latencies: List[float] = []
+        while not task.done():
+            start = time.perf_counter()
+            await client.get("/health")
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(interval)
+
+        print(f"trained {rows} rows ({len(content) / 1e6:.1f} MB) in {await task:.2f} s")
+        print(
+            f"/health n={len(latencies)}  p50={np.percentile(latencies, 50) * 1e3:.1f} ms  "
+            f"p99={np.percentile(latencies, 99) * 1e3:.1f} ms  max={max(latencies) * 1e3:.1f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark event loop responsiveness during training.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows in the training upload")
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between /health polls")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.rows, args.interval))
+
+
+if __name__ == "__main__":
+    main()
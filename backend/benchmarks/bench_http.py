@@ -0,0 +1,83 @@
+"""
+Load-test the hot request paths of a running server.
+
+Trains a model on the sample dataset, then fires concurrent requests at
+single prediction, model detail and the prediction list, and prints
+throughput and latency for each:
+
+    uvicorn app.main:app --port 8000 --workers 4 &
+    python -m benchmarks.bench_http --url http://127.0.0.1:8000 --requests 5000 --concurrency 64
+
+Run it against a scratch database: it adds a model and predictions.
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from app.api.models import FEATURE_COLUMNS
+
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "assets" / "sample_data.csv"
+
+
+async def _load(client: httpx.AsyncClient, method: str, path: str, count: int, concurrency: int, **kwargs: Any) -> None:
+    """Send count requests, at most concurrency at a time, and print the results."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one() -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{method} {path:34} {count / elapsed:8.0f} req/s  "
+        f"p50={statistics.median(latencies) * 1e3:7.1f} ms  p99={p99 * 1e3:7.1f} ms  errors={errors}"
+    )
+
+
+async def run(url: str, count: int, concurrency: int) -> None:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=300, limits=limits) as client:
+        response = await client.post(
+            "/api/v1/models/train",
+            files={"file": ("sample.csv", SAMPLE_CSV.read_bytes(), "text/csv")},
+            data={"name": "bench-http"}
+        )
+        response.raise_for_status()
+        model_id = response.json()["id"]
+
+        features: Dict[str, Any] = {col: 85 for col in FEATURE_COLUMNS}
+        features["absen"] = 1
+        await _load(client, "POST", "/api/v1/predict", count, concurrency, json={"model_id": model_id, **features})
+        await _load(client, "GET", f"/api/v1/models/{model_id}", count, concurrency)
+        await _load(client, "GET", "/api/v1/predictions?limit=50", count, concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark request throughput of a running server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL")
+    parser.add_argument("--requests", type=int, default=3000, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Compare model load paths: memory-mapped side-car vs unpickling the .joblib.
+
+Fits and converts a set of models the way training saves them, then
+starts several worker processes that each load every model and keep it
+resident, as uvicorn workers do. Each worker reports its load time and
+the RSS and PSS (RSS with shared pages split between the processes that
+map them, from /proc/self/smaps_rollup) it gained, once through joblib
+and once through the side-cars:
+
+    python -m benchmarks.bench_model_load
+    python -m benchmarks.bench_model_load --models 80 --workers 8 --rows 100000
+"""
+import os
+import time
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+from typing import Any, Dict, List
+
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+from app.api.models import FEATURE_COLUMNS
+from app.services.ml_service import MLService
+from app.services.model_artifact import artifact_path_for
+
+
+def _memory_kb() -> Dict[str, int]:
+    """Current RSS and PSS of this process in kB."""
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss"):
+                usage[name.lower()] = int(value.split()[0])
+    return usage
+
+
+def _worker(models_dir: str, paths: List[str], mapped: bool, loaded: Any, done: Any, results: Any) -> None:
+    """Load every model, hold them while all workers measure, then report."""
+    service = MLService(models_dir)
+    before = _memory_kb()
+    start = time.perf_counter()
+    resident = []
+    for path in paths:
+        if mapped:
+            model_data = service._load_model_file(path)
+            assert model_data["mapped"]
+        else:
+            model_data = joblib.load(path)
+            model_data.update(service._compile(model_data))
+        resident.append(model_data)
+    elapsed = time.perf_counter() - start
+
+    # PSS splits shared pages between the workers mapping them, so measure
+    # only once every worker holds its models
+    loaded.wait()
+    after = _memory_kb()
+    results.put({
+        "load_ms": elapsed * 1e3,
+        "rss_mb": (after["rss"] - before["rss"]) / 1024,
+        "pss_mb": (after["pss"] - before["pss"]) / 1024
+    })
+    done.wait()
+
+
+def _measure(models_dir: str, paths: List[str], workers: int, mapped: bool) -> List[Dict[str, float]]:
+    """Run the workers for one load path and collect their reports."""
+    ctx = multiprocessing.get_context("spawn")
+    loaded = ctx.Barrier(workers)
+    done = ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_worker, args=(models_dir, paths, mapped, loaded, done, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    done.wait()
+    for process in processes:
+        process.join()
+    return reports
+
+
+def _summary(name: str, reports: List[Dict[str, float]]) -> None:
+    rss = [r["rss_mb"] for r in reports]
+    pss = [r["pss_mb"] for r in reports]
+    load = [r["load_ms"] for r in reports]
+    print(
+        f"{name:16} load {statistics.median(load):8.1f} ms/worker  "
+        f"RSS +{statistics.mean(rss):7.1f} MB/worker  PSS +{statistics.mean(pss):7.1f} MB/worker  "
+        f"(PSS total {sum(pss):7.1f} MB)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark model loading across worker processes.")
+    parser.add_argument("--models", type=int, default=60, help="Models resident in every worker")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    parser.add_argument("--rows", type=int, default=50000, help="Training rows per model (controls tree size)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as models_dir:
+        service = MLService(models_dir)
+        paths = []
+        nodes = 0
+        for i in range(args.models):
+            rng = np.random.default_rng(i)
+            X = rng.normal(80, 8, size=(args.rows, len(FEATURE_COLUMNS)))
+            y = (X[:, :4].mean(axis=1) + rng.normal(0, 4, size=args.rows) > 80).astype(np.int64)
+            model = DecisionTreeClassifier(random_state=i).fit(X, y)
+            nodes += model.tree_.node_count
+
+            file_path = os.path.join(models_dir, f"model_{i}.joblib")
+            joblib.dump({"model": model, "feature_columns": FEATURE_COLUMNS, "classes": model.classes_.tolist()}, file_path)
+            service.convert_model(file_path)
+            paths.append(file_path)
+
+        joblib_mb = sum(os.path.getsize(p) for p in paths) / 1e6
+        tree_mb = sum(os.path.getsize(artifact_path_for(p)) for p in paths) / 1e6
+        print(
+            f"{args.models} models, {nodes / args.models:.0f} nodes each, {args.workers} workers; "
+            f"joblib {joblib_mb:.1f} MB, side-cars {tree_mb:.1f} MB in total"
+        )
+        _summary("joblib + compile", _measure(models_dir, paths, args.workers, mapped=False))
+        _summary("mapped side-car", _measure(models_dir, paths, args.workers, mapped=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare batch scoring paths on the same rows.
+
+Trains a tree on synthetic grades, then scores a synthetic batch one row at
+a time (predict), as result dicts (predict_batch) and as label/probability
+lists (score_frame):
+
+    python -m benchmarks.bench_predict_batch
+    python -m benchmarks.bench_predict_batch --rows 200000 --train-rows 50000
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+
+from app.api.models import FEATURE_COLUMNS
+from app.services.ml_service import MLService
+
+
+def _grades(rows: int, seed: int) -> pd.DataFrame:
+    """Grades-like feature columns."""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(80, 8, size=(rows, len(FEATURE_COLUMNS))).clip(0, 100).round()
+    return pd.DataFrame(values, columns=FEATURE_COLUMNS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark batch prediction.")
+    parser.add_argument("--rows", type=int, default=50000, help="Rows to score")
+    parser.add_argument("--train-rows", type=int, default=20000, help="Training rows (controls tree size)")
+    parser.add_argument("--single-rows", type=int, default=5000, help="Rows scored one at a time")
+    args = parser.parse_args()
+
+    train = _grades(args.train_rows, seed=0)
+    labels = np.where(train.iloc[:, :4].mean(axis=1) > 80, "berprestasi", "tidak_berprestasi")
+    model = DecisionTreeClassifier(random_state=0).fit(train.values, labels)
+    batch = _grades(args.rows, seed=1)
+
+    with tempfile.TemporaryDirectory() as models_dir:
+        service = MLService(models_dir)
+        file_path = os.path.join(models_dir, "bench.joblib")
+        joblib.dump({"model": model, "feature_columns": FEATURE_COLUMNS, "classes": model.classes_.tolist()}, file_path)
+        service.convert_model(file_path)
+        service.load_model(1, file_path)
+        # Score every row rather than measuring cache hits
+        service.prediction_cache.max_entries = 0
+
+        single = batch.head(args.single_rows).to_dict(orient="records")
+        start = time.perf_counter()
+        for features in single:
+            service.predict(1, file_path, features)
+        single_rate = len(single) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        service.predict_batch(1, file_path, batch.copy())
+        batch_rate = args.rows / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        service.score_frame(1, file_path, batch.copy())
+        frame_rate = args.rows / (time.perf_counter() - start)
+
+    print(f"{model.tree_.node_count} nodes, {args.rows} rows")
+    print(f"predict (per row)  {single_rate:12.0f} rows/s")
+    print(f"predict_batch      {batch_rate:12.0f} rows/s  ({batch_rate / single_rate:.1f}x)")
+    print(f"score_frame        {frame_rate:12.0f} rows/s  ({frame_rate / single_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
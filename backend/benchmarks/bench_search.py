@@ -0,0 +1,55 @@
+"""
+Measure how the hyperparameter search scales with worker processes.
+
+Runs the same search on a synthetic dataset with 1, 2, 4, ... workers up
+to the core count and prints wall time and speedup over one worker:
+
+    python -m benchmarks.bench_search --rows 20000
+    python -m benchmarks.bench_search --rows 200000 --jobs 1 8 16 32
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+
+from app.api.models import FEATURE_COLUMNS
+from app.services.ml_service import ml_service
+
+
+def synthetic_dataset(rows: int, seed: int = 0):
+    """Grades-like features with a noisy label that depends on a few of them."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(80, 8, size=(rows, len(FEATURE_COLUMNS))).clip(0, 100).astype(np.float32)
+    score = X[:, :4].mean(axis=1) - 0.5 * X[:, -1] + rng.normal(0, 3, size=rows)
+    y = (score > np.median(score)).astype(np.int64)
+    return np.ascontiguousarray(X), y
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    default_jobs = [1]
+    while default_jobs[-1] * 2 <= cores:
+        default_jobs.append(default_jobs[-1] * 2)
+
+    parser = argparse.ArgumentParser(description="Benchmark the hyperparameter search.")
+    parser.add_argument("--rows", type=int, default=20000, help="Training rows")
+    parser.add_argument("--jobs", type=int, nargs="+", default=default_jobs, help="Worker counts to try")
+    args = parser.parse_args()
+
+    X, y = synthetic_dataset(args.rows)
+    print(f"{args.rows} rows, {cores} cores")
+    baseline = None
+    for n_jobs in args.jobs:
+        start = time.perf_counter()
+        _, report = ml_service._search_tree(X, y, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(
+            f"n_jobs={n_jobs:3}  {report['fits']} fits  {elapsed:8.2f} s  "
+            f"speedup {baseline / elapsed:5.2f}x  efficiency {baseline / elapsed / n_jobs:5.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Shared fixtures for the backend tests.
+
+The app runs on a throwaway SQLite database inside a temporary working
+directory, so trained models and uploads never land in the checkout.
+Run from the backend directory:
+
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ASSETS_DIR = Path(__file__).resolve().parents[2] / "assets"
+
+# Configure the app before anything imports it
+_WORKDIR = tempfile.mkdtemp(prefix="kkp-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORKDIR, 'test.db')}"
+os.environ["JWT_SECRET_KEY"] = "test-secret"
+os.environ["SUPER_ADMIN_PASSWORD"] = "secret123"
+os.environ["DASHBOARD_CACHE_TTL"] = "0"
+os.environ["PREDICTION_LOG_QUEUE_SIZE"] = "0"
+os.environ["TRAINING_HEARTBEAT_S"] = "0.2"
+os.chdir(_WORKDIR)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Test client with the app started (database created, pools running)."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(client):
+    """A database session on the app's (already created) database."""
+    from app.services.db_service import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def sample_csv() -> bytes:
+    """The labelled sample dataset shipped with the repository."""
+    return (ASSETS_DIR / "sample_data.csv").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def batch_csv() -> bytes:
+    """The unlabelled batch-prediction sample shipped with the repository."""
+    return (ASSETS_DIR / "batch-prediction.csv").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def trained_model(client, sample_csv) -> dict:
+    """A model trained once on the sample dataset."""
+    response = client.post(
+        "/api/v1/models/train",
+        files={"file": ("sample.csv", sample_csv, "text/csv")},
+        data={"name": "test-model"}
+    )
+    assert response.status_code == 200, response.text
+    model = response.json()
+    
+    # The API does not expose where the model file lives
+    from app.services.db_service import SessionLocal, get_model
+    session = SessionLocal()
+    try:
+        model["file_path"] = get_model(session, model["id"]).file_path
+    finally:
+        session.close()
+    return model
@@ -0,0 +1,66 @@
+"""
+Columnar dataset cache: loads the same values pd.read_csv would, and never
+serves a cache older than its CSV.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.api.models import FEATURE_COLUMNS
+from app.services.dataset_cache import (
+    build_dataset_cache, cache_path_for, has_current_cache, load_dataset, remove_dataset_cache
+)
+
+
+def _write_dataset(path, rows: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({col: rng.integers(0, 101, size=rows) for col in FEATURE_COLUMNS})
+    df["absen"] = rng.integers(0, 40, size=rows)
+    df["matematika"] = rng.uniform(0, 100, size=rows).round(2)
+    df["status"] = rng.choice(["berprestasi", "tidak_berprestasi"], size=rows)
+    df = df.astype(object)
+    df.loc[rng.choice(rows, 10, replace=False), "ipa"] = np.nan
+    df.loc[rng.choice(rows, 5, replace=False), "status"] = np.nan
+    df.to_csv(path, index=False)
+    return df
+
+
+@pytest.mark.parametrize("chunk_rows", [7, 50000])
+def test_cache_matches_read_csv(tmp_path, chunk_rows):
+    csv_path = str(tmp_path / "grades.csv")
+    _write_dataset(csv_path)
+    assert build_dataset_cache(csv_path, chunk_rows=chunk_rows) == 300
+    assert has_current_cache(csv_path)
+
+    expected = pd.read_csv(csv_path)
+    loaded = load_dataset(csv_path)
+    for col in FEATURE_COLUMNS:
+        np.testing.assert_array_equal(loaded[col].astype(np.float64), expected[col].astype(np.float64))
+    assert loaded["status"].tolist() == pytest.approx(expected["status"].tolist(), nan_ok=True)
+
+
+def test_stale_cache_is_rebuilt(tmp_path):
+    csv_path = str(tmp_path / "grades.csv")
+    _write_dataset(csv_path, rows=50, seed=1)
+    build_dataset_cache(csv_path)
+
+    _write_dataset(csv_path, rows=80, seed=2)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert not has_current_cache(csv_path)
+
+    loaded = load_dataset(csv_path)
+    assert len(loaded) == 80
+    np.testing.assert_array_equal(loaded["pai"].astype(np.float64), pd.read_csv(csv_path)["pai"].astype(np.float64))
+    assert has_current_cache(csv_path)
+
+
+def test_remove_cache(tmp_path):
+    csv_path = str(tmp_path / "grades.csv")
+    _write_dataset(csv_path, rows=10)
+    build_dataset_cache(csv_path)
+    remove_dataset_cache(csv_path)
+    assert not os.path.exists(cache_path_for(csv_path))
+    remove_dataset_cache(csv_path)
@@ -0,0 +1,130 @@
+"""
+Scoring paths agree: single, batch and chunked predictions of the same rows
+give the same labels, probabilities and gap filling.
+"""
+import io
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.api.models import FEATURE_COLUMNS
+from app.api.routes import predict_routes
+from app.services.ml_service import _median_from_counts, ml_service
+
+
+@pytest.fixture
+def batch_frame(batch_csv) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(batch_csv))
+
+
+def test_batch_matches_single_predictions(trained_model, batch_frame):
+    model_id, file_path = trained_model["id"], trained_model["file_path"]
+    results = ml_service.predict_batch(model_id, file_path, batch_frame.copy())
+
+    assert len(results) == len(batch_frame)
+    for result in results:
+        single = ml_service.predict(model_id, file_path, result["input_data"])
+        assert single["prediction"] == result["prediction"]
+        assert single["probability"] == pytest.approx(result["probability"], abs=1e-12)
+
+
+def test_score_frame_matches_predict_batch(trained_model, batch_frame):
+    model_id, file_path = trained_model["id"], trained_model["file_path"]
+    results = ml_service.predict_batch(model_id, file_path, batch_frame.copy())
+    labels, probabilities = ml_service.score_frame(model_id, file_path, batch_frame.copy())
+    assert labels == [r["prediction"] for r in results]
+    assert probabilities == [r["probability"] for r in results]
+
+
+def test_compiled_scoring_matches_sklearn(trained_model, batch_frame):
+    model_data = ml_service.load_model(trained_model["id"], trained_model["file_path"])
+    X = batch_frame[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    model = joblib.load(trained_model["file_path"])["model"]
+    assert model_data["compiled"].verify(model, X)
+
+
+@pytest.mark.parametrize("chunksize", [1, 3, 100000])
+def test_feature_medians_match_whole_column(tmp_path, chunksize):
+    rng = np.random.default_rng(chunksize)
+    df = pd.DataFrame({col: rng.integers(60, 100, size=41).astype(float) for col in FEATURE_COLUMNS})
+    df = df.astype(object)
+    df.loc[rng.choice(41, 6, replace=False), "matematika"] = np.nan
+    df.loc[rng.choice(41, 3, replace=False), "ipa"] = "x"
+    df["nama"] = "siswa"
+    path = tmp_path / "batch.csv"
+    df.to_csv(path, index=False)
+
+    medians = ml_service.feature_medians(str(path), chunksize=chunksize)
+    expected = pd.read_csv(path)
+    for col in FEATURE_COLUMNS:
+        assert medians[col] == pd.to_numeric(expected[col], errors="coerce").median()
+
+
+def test_median_from_counts():
+    assert _median_from_counts(pd.Series({1.0: 1, 3.0: 1})) == 2.0
+    assert _median_from_counts(pd.Series({5.0: 3, 1.0: 1})) == 5.0
+    assert np.isnan(_median_from_counts(pd.Series(dtype=float)))
+
+
+def test_chunked_fill_uses_file_medians(trained_model, batch_frame):
+    model_id, file_path = trained_model["id"], trained_model["file_path"]
+    frame = batch_frame.copy().astype(object)
+    frame.loc[0, "matematika"] = np.nan
+    medians = {col: float(pd.to_numeric(frame[col]).median()) for col in FEATURE_COLUMNS}
+
+    whole = ml_service.predict_batch(model_id, file_path, frame.copy())
+    chunked = []
+    for start in range(0, len(frame), 3):
+        chunked.extend(ml_service.predict_batch(model_id, file_path, frame.iloc[start:start + 3].copy(), medians))
+    assert [r["input_data"] for r in chunked] == [r["input_data"] for r in whole]
+    assert [r["prediction"] for r in chunked] == [r["prediction"] for r in whole]
+
+
+def _download(client, model_id: int, frame: pd.DataFrame) -> pd.DataFrame:
+    response = client.post(
+        "/api/v1/predict/batch/download",
+        files={"file": ("batch.csv", frame.to_csv(index=False).encode(), "text/csv")},
+        data={"model_id": str(model_id)}
+    )
+    assert response.status_code == 200, response.text
+    return pd.read_csv(io.BytesIO(response.content))
+
+
+def test_download_fills_later_gaps_with_file_medians(client, trained_model, batch_frame, monkeypatch):
+    monkeypatch.setattr(predict_routes, "PREDICT_CHUNK_ROWS", 3)
+    frame = batch_frame.copy().astype(object)
+    frame.loc[len(frame) - 1, "matematika"] = np.nan
+
+    output = _download(client, trained_model["id"], frame)
+    assert output.loc[len(frame) - 1, "matematika"] == pd.to_numeric(frame["matematika"]).median()
+    assert len(output) == len(frame)
+
+
+def test_download_without_gaps_skips_medians_pass(client, trained_model, batch_frame, monkeypatch):
+    def no_pass(*args, **kwargs):
+        raise AssertionError("medians pass ran on a file without gaps")
+
+    monkeypatch.setattr(predict_routes, "PREDICT_CHUNK_ROWS", 3)
+    monkeypatch.setattr(ml_service, "feature_medians", no_pass)
+    output = _download(client, trained_model["id"], batch_frame)
+    assert output["prediksi"].notna().all() and len(output) == len(batch_frame)
+
+
+def test_ndjson_fills_later_gaps_with_file_medians(client, trained_model, batch_frame, monkeypatch):
+    monkeypatch.setattr(predict_routes, "PREDICT_CHUNK_ROWS", 3)
+    frame = batch_frame.copy().astype(object)
+    frame.loc[len(frame) - 1, "matematika"] = np.nan
+    response = client.post(
+        "/api/v1/predict/batch",
+        params={"format": "ndjson"},
+        files={"file": ("batch.csv", frame.to_csv(index=False).encode(), "text/csv")},
+        data={"model_id": str(trained_model["id"])}
+    )
+    assert response.status_code == 200, response.text
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["type"] == "summary" and lines[-1]["total_count"] == len(frame)
+    assert lines[-2]["input_data"]["matematika"] == pd.to_numeric(frame["matematika"]).median()
@@ -0,0 +1,89 @@
+"""
+Side-car model artifacts: exact round trip, and corrupt files are rebuilt
+from the .joblib model instead of failing the load.
+"""
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from app.api.models import FEATURE_COLUMNS
+from app.services.ml_service import MLService
+from app.services.model_artifact import artifact_path_for, load_artifact, save_artifact
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    """A small model saved the way training saves it, with its side-car."""
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 100, size=(500, len(FEATURE_COLUMNS)))
+    y = np.where(X[:, :4].mean(axis=1) > 50, "berprestasi", "tidak_berprestasi")
+    model = DecisionTreeClassifier(random_state=0).fit(X, y)
+
+    service = MLService(str(tmp_path))
+    file_path = str(tmp_path / "model.joblib")
+    joblib.dump({"model": model, "feature_columns": FEATURE_COLUMNS, "classes": model.classes_.tolist()}, file_path)
+    assert service.convert_model(file_path) == artifact_path_for(file_path)
+    return service, file_path, model, X
+
+
+def test_save_and_load_round_trip(tmp_path):
+    arrays = {
+        "a": np.arange(10, dtype=np.int16),
+        "b": np.linspace(0, 1, 7, dtype=np.float32),
+        "c": np.random.default_rng(1).random((5, 3))
+    }
+    path = str(tmp_path / "x.tree")
+    save_artifact(path, arrays, {"classes": ["x", "y"]})
+
+    loaded, meta = load_artifact(path)
+    assert meta == {"classes": ["x", "y"]}
+    for name, array in arrays.items():
+        assert loaded[name].dtype == array.dtype
+        np.testing.assert_array_equal(loaded[name], array)
+
+
+def test_mapped_model_scores_like_sklearn(model_file):
+    service, file_path, model, X = model_file
+    model_data = service._load_model_file(file_path)
+    assert model_data["mapped"]
+    assert model_data["compiled"].verify(model, X)
+    assert service.has_current_artifact(file_path)
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:20],
+    lambda data: data[: len(data) // 2],
+    lambda data: b"NOTATREE" + data[8:],
+    lambda data: data[:16] + b"{" * (len(data) - 16)
+])
+def test_corrupt_artifact_is_rebuilt(model_file, corrupt):
+    service, file_path, model, X = model_file
+    artifact_path = artifact_path_for(file_path)
+    with open(artifact_path, "rb") as f:
+        data = f.read()
+    with open(artifact_path, "wb") as f:
+        f.write(corrupt(data))
+
+    with pytest.raises(ValueError):
+        load_artifact(artifact_path)
+    assert not service.has_current_artifact(file_path)
+
+    model_data = service._load_model_file(file_path)
+    assert not model_data["mapped"]
+    assert model_data["compiled"].verify(model, X)
+    # The fallback wrote a fresh side-car for the next load
+    assert service.has_current_artifact(file_path)
+    assert service._load_model_file(file_path)["mapped"]
+
+
+def test_stale_artifact_is_ignored(model_file):
+    service, file_path, model, X = model_file
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert not service.has_current_artifact(file_path)
+    assert not service._load_model_file(file_path)["mapped"]
+    assert service.has_current_artifact(file_path)
@@ -0,0 +1,73 @@
+"""
+Keyset pagination: cursors round-trip and following them visits every row
+exactly once.
+"""
+from datetime import datetime
+
+import pytest
+
+from app.services.db_service import ModelDB, create_model, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("timestamp, row_id", [
+    (datetime(2024, 1, 31, 23, 59, 59, 999999), 1),
+    (datetime(2000, 1, 1), 2 ** 40),
+    (datetime(2025, 6, 15, 8, 30), 0)
+])
+def test_cursor_round_trip(timestamp, row_id):
+    cursor = encode_cursor(timestamp, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (timestamp, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "!!!", encode_cursor(datetime(2024, 1, 1), 1)[:-3]])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.fixture
+def tied_models(db):
+    """Models sharing created_at values, so only the id breaks the tie."""
+    models = [
+        create_model(db, name=f"page-{i}", file_path=f"page-{i}.joblib", accuracy=0.5, metrics={})
+        for i in range(7)
+    ]
+    ids = [model.id for model in models]
+    db.query(ModelDB).filter(ModelDB.id.in_(ids[:4])).update(
+        {"created_at": datetime(2030, 1, 1)}, synchronize_session=False
+    )
+    db.query(ModelDB).filter(ModelDB.id.in_(ids[4:])).update(
+        {"created_at": datetime(2030, 1, 2)}, synchronize_session=False
+    )
+    db.commit()
+    yield ids
+    db.query(ModelDB).filter(ModelDB.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 100])
+def test_following_cursors_lists_every_model_once(client, tied_models, limit):
+    everything = [model["id"] for model in client.get("/api/v1/models").json()]
+    assert set(tied_models) <= set(everything)
+
+    paged = []
+    params = {"limit": limit}
+    while True:
+        response = client.get("/api/v1/models", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        paged.extend(model["id"] for model in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": limit, "cursor": cursor}
+
+    assert paged == everything
+
+
+def test_bad_cursor_is_rejected(client):
+    for path in ("/api/v1/models", "/api/v1/predictions", "/api/v1/datasets", "/api/v1/models/train/jobs"):
+        response = client.get(path, params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400, path
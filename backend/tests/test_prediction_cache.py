@@ -0,0 +1,80 @@
+"""
+Prediction memo cache: single and coalesced predictions read and fill the
+same cache, and cached results equal freshly scored ones.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.api.models import FEATURE_COLUMNS
+from app.services.ml_service import MLService
+from app.services.prediction_batcher import PredictionBatcher
+
+
+@pytest.fixture
+def service(trained_model):
+    """A fresh service (empty caches) that can load the trained model."""
+    return MLService()
+
+
+def _rows(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [
+        {col: float(value) for col, value in zip(FEATURE_COLUMNS, row)}
+        for row in rng.integers(60, 101, size=(count, len(FEATURE_COLUMNS)))
+    ]
+
+
+def test_predict_many_fills_and_reads_the_cache(service, trained_model):
+    model_id, file_path = trained_model["id"], trained_model["file_path"]
+    rows = _rows(20)
+
+    first = service.predict_many(model_id, file_path, rows)
+    assert service.prediction_cache.stats()["misses"] == 20
+    assert service.prediction_cache.stats()["entries"] == len({tuple(r.values()) for r in rows})
+
+    # Repeats are served from the cache, and predict sees the same entries
+    assert service.predict_many(model_id, file_path, rows) == first
+    assert service.prediction_cache.stats()["hits"] == 20
+    assert [service.predict(model_id, file_path, row) for row in rows] == first
+    assert service.prediction_cache.stats()["hits"] == 40
+
+
+def test_predict_many_scores_only_misses(service, trained_model):
+    model_id, file_path = trained_model["id"], trained_model["file_path"]
+    rows = _rows(10, seed=1)
+    for row in rows[:5]:
+        service.predict(model_id, file_path, row)
+
+    mixed = service.predict_many(model_id, file_path, rows)
+    stats = service.prediction_cache.stats()
+    assert stats["hits"] == 5 and stats["misses"] == 10
+
+    uncached = MLService()
+    uncached.prediction_cache.max_entries = 0
+    assert mixed == uncached.predict_many(model_id, file_path, rows)
+    assert uncached.prediction_cache.stats()["entries"] == 0
+
+
+def test_cached_results_are_not_shared(service, trained_model):
+    model_id, file_path = trained_model["id"], trained_model["file_path"]
+    row = _rows(1, seed=2)
+    result = service.predict_many(model_id, file_path, row)[0]
+    result["probability"]["berprestasi"] = -1.0
+    assert service.predict_many(model_id, file_path, row)[0]["probability"]["berprestasi"] >= 0.0
+
+
+def test_coalesced_predictions_use_the_cache(service, trained_model):
+    model_id, file_path = trained_model["id"], trained_model["file_path"]
+    batcher = PredictionBatcher(service, window_ms=5, max_batch_size=8)
+    rows = _rows(16, seed=3)
+
+    async def burst():
+        return await asyncio.gather(*(batcher.predict(model_id, file_path, row) for row in rows))
+
+    first = asyncio.run(burst())
+    assert service.prediction_cache.stats()["misses"] == 16
+    assert asyncio.run(burst()) == first
+    assert service.prediction_cache.stats()["hits"] == 16
+    assert batcher.stats()["batches"] >= 4
@@ -0,0 +1,114 @@
+"""
+Write-behind prediction log: everything queued is written by stop(), a full
+queue drops instead of stalling, and a deleted model does not lose a batch.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, List
+
+from app.api.models import FEATURE_COLUMNS
+from app.services.db_service import PredictionDB, create_model, delete_model
+from app.services.prediction_log import PredictionLog, write_predictions
+
+
+class FakeWriter:
+    """Records batches instead of writing them; can be held shut or made to fail."""
+
+    def __init__(self, failures: int = 0):
+        self.batches: List[List[Dict[str, Any]]] = []
+        self.failures = failures
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, batch: List[Dict[str, Any]]) -> int:
+        self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        self.batches.append(batch)
+        return len(batch)
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        return [record for batch in self.batches for record in batch]
+
+
+async def _submit(log: PredictionLog, count: int) -> None:
+    for i in range(count):
+        await log.submit(1, {"i": i}, "berprestasi", {"berprestasi": 1.0})
+
+
+def test_stop_flushes_every_record_in_batches():
+    writer = FakeWriter()
+    log = PredictionLog(writer, max_queue=1000, batch_size=50, flush_ms=50)
+    log.start()
+    asyncio.run(_submit(log, 230))
+    log.stop()
+
+    assert [record["input_data"]["i"] for record in writer.records] == list(range(230))
+    assert all(len(batch) <= 50 for batch in writer.batches)
+    stats = log.stats()
+    assert (stats["enqueued"], stats["written"], stats["dropped"], stats["lost"]) == (230, 230, 0, 0)
+    assert not stats["running"]
+
+
+def test_writes_synchronously_when_not_running():
+    writer = FakeWriter()
+    log = PredictionLog(writer, max_queue=0)
+    log.start()
+    asyncio.run(_submit(log, 3))
+    assert len(writer.batches) == 3
+
+
+def test_full_queue_blocks_then_drops():
+    writer = FakeWriter()
+    writer.gate.clear()
+    log = PredictionLog(writer, max_queue=2, batch_size=1, flush_ms=1, full_policy="block", block_ms=50)
+    log.start()
+    # At most the writer's one record and the queue's two fit; the rest wait 50 ms and drop
+    asyncio.run(_submit(log, 6))
+    writer.gate.set()
+    log.stop()
+
+    stats = log.stats()
+    assert stats["dropped"] >= 3 and stats["blocked"] >= stats["dropped"]
+    assert stats["written"] == stats["enqueued"] == 6 - stats["dropped"]
+
+
+def test_drop_policy_does_not_wait():
+    writer = FakeWriter()
+    writer.gate.clear()
+    log = PredictionLog(writer, max_queue=1, batch_size=1, flush_ms=1, full_policy="drop")
+    log.start()
+    asyncio.run(_submit(log, 5))
+    writer.gate.set()
+    log.stop()
+    assert log.stats()["blocked"] == 0
+    assert log.stats()["dropped"] + log.stats()["written"] == 5
+
+
+def test_failed_flush_is_retried():
+    writer = FakeWriter(failures=2)
+    log = PredictionLog(writer, max_queue=10, batch_size=10, flush_ms=1, max_retries=2)
+    log._flush([{"i": 0}])
+    stats = log.stats()
+    assert (stats["failed_flushes"], stats["written"], stats["lost"]) == (2, 1, 0)
+    assert stats["last_error"] == "database unavailable"
+
+
+def test_deleted_model_keeps_its_queued_predictions(db):
+    kept = create_model(db, name="kept", file_path="kept.joblib", accuracy=1.0, metrics={})
+    deleted = create_model(db, name="deleted", file_path="deleted.joblib", accuracy=1.0, metrics={})
+    delete_model(db, deleted.id)
+    inputs = {col: 80.0 for col in FEATURE_COLUMNS}
+    records = [
+        {"model_id": model_id, "input_data": inputs, "prediction": "berprestasi", "probability": {"berprestasi": 1.0}}
+        for model_id in (kept.id, deleted.id, kept.id)
+    ]
+
+    before = db.query(PredictionDB).count()
+    assert write_predictions(records) == 3
+    saved = db.query(PredictionDB).order_by(PredictionDB.id.desc()).limit(3).all()
+    assert db.query(PredictionDB).count() == before + 3
+    assert sorted(p.model_id or 0 for p in saved) == [0, kept.id, kept.id]
+    delete_model(db, kept.id)
@@ -0,0 +1,206 @@
+"""
+Training job state transitions: conditional updates decide races, and jobs
+submitted through the API run to a final state.
+"""
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.db_service import (
+    TRAINING_JOB_FINISHED, TrainingJobDB, claim_training_job, create_training_job, get_training_job,
+    heartbeat_training_jobs, update_training_job
+)
+from app.api.routes import model_routes
+from app.services.training_jobs import training_jobs
+
+FAKE_DATASET = "missing.csv"
+
+
+@pytest.fixture(autouse=True)
+def _finish_fake_jobs(db):
+    """Fail the rows tests left queued or running, so they hold no slot."""
+    yield
+    db.query(TrainingJobDB).filter(
+        TrainingJobDB.dataset_file == FAKE_DATASET,
+        TrainingJobDB.status.in_(["queued", "running"])
+    ).update({"status": "failed"}, synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def job(db):
+    return create_training_job(db, "state-test", FAKE_DATASET)
+
+
+def _wait_finished(client, job_id: int, timeout: float = 60.0) -> dict:
+    """Poll a job until it reaches a final state."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(f"/api/v1/models/train/jobs/{job_id}").json()
+        if body["status"] in TRAINING_JOB_FINISHED:
+            return body
+        time.sleep(0.2)
+    raise AssertionError(f"Job {job_id} did not finish: {body}")
+
+
+def test_new_job_is_queued(job):
+    assert (job.status, job.stage, job.progress) == ("queued", "queued", 0.0)
+    assert not job.cancel_requested and job.owner is None
+
+
+def test_status_condition_lets_one_claim_win(db, job):
+    claimed = update_training_job(db, job.id, only_if_status=["queued"], status="running", owner="a:1")
+    assert claimed.status == "running" and claimed.owner == "a:1"
+    # A second worker, or a cancel of the queued job, loses the race
+    assert update_training_job(db, job.id, only_if_status=["queued"], status="running", owner="b:2") is None
+    assert update_training_job(db, job.id, only_if_status=["queued"], status="cancelled") is None
+    assert get_training_job(db, job.id).owner == "a:1"
+
+
+def test_owner_condition(db, job):
+    update_training_job(db, job.id, status="running", owner="a:1")
+    assert update_training_job(db, job.id, only_if_owner="b:2", status="failed") is None
+    assert update_training_job(db, job.id, only_if_owner="a:1", status="succeeded").status == "succeeded"
+
+
+def test_heartbeat_condition(db, job):
+    beat = datetime.utcnow()
+    update_training_job(db, job.id, status="running", owner="a:1", heartbeat_at=beat)
+    assert update_training_job(db, job.id, only_if_heartbeat_before=beat - timedelta(seconds=1), status="failed") is None
+    failed = update_training_job(db, job.id, only_if_heartbeat_before=beat + timedelta(seconds=1), status="failed")
+    assert failed.status == "failed"
+
+
+def test_missing_job_is_not_updated(db):
+    assert update_training_job(db, 10 ** 9, status="failed") is None
+
+
+def test_heartbeat_reports_cancels_for_owner_only(db):
+    mine = create_training_job(db, "mine", FAKE_DATASET)
+    theirs = create_training_job(db, "theirs", FAKE_DATASET)
+    update_training_job(db, mine.id, status="running", owner="a:1", cancel_requested=True)
+    update_training_job(db, theirs.id, status="running", owner="b:2", cancel_requested=True)
+
+    assert heartbeat_training_jobs(db, [mine.id, theirs.id], "a:1") == [mine.id]
+    db.expire_all()
+    assert get_training_job(db, mine.id).heartbeat_at is not None
+    assert get_training_job(db, theirs.id).heartbeat_at is None
+    assert heartbeat_training_jobs(db, [], "a:1") == []
+
+
+def test_job_of_exited_owner_is_failed(db, job):
+    # Nothing on this host runs as pid 2**22 + 1 (above the kernel's pid_max)
+    owner = f"{socket.gethostname()}:{2 ** 22 + 1}"
+    update_training_job(db, job.id, status="running", owner=owner, heartbeat_at=datetime.utcnow())
+    training_jobs._fail_orphaned()
+    db.expire_all()
+    assert get_training_job(db, job.id).status == "failed"
+
+
+def test_cancel_queued_job(client, job):
+    response = client.post(f"/api/v1/models/train/jobs/{job.id}/cancel")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert client.post(f"/api/v1/models/train/jobs/{job.id}/cancel").status_code == 409
+
+
+def test_claim_respects_the_global_cap(db):
+    jobs = [create_training_job(db, f"cap-{i}", FAKE_DATASET) for i in range(3)]
+    first = claim_training_job(db, jobs[0].id, "a:1", 2, stage="starting")
+    assert (first.status, first.owner, first.stage) == ("running", "a:1", "starting")
+    # The cap counts every owner's running jobs
+    assert claim_training_job(db, jobs[1].id, "b:2", 2) is not None
+    assert claim_training_job(db, jobs[2].id, "c:3", 2) is None
+    assert get_training_job(db, jobs[2].id).status == "queued"
+
+    update_training_job(db, jobs[0].id, status="succeeded")
+    assert claim_training_job(db, jobs[2].id, "c:3", 2).owner == "c:3"
+    # A claimed job is never claimed twice
+    update_training_job(db, jobs[1].id, status="succeeded")
+    assert claim_training_job(db, jobs[2].id, "a:1", 2) is None
+
+
+def test_job_waits_for_other_workers_to_free_a_slot(client, db, sample_csv):
+    # Another worker's jobs hold every slot
+    others = [create_training_job(db, f"other-{i}", FAKE_DATASET) for i in range(training_jobs.max_concurrent)]
+    for other in others:
+        update_training_job(db, other.id, status="running", owner="elsewhere:1", heartbeat_at=datetime.utcnow())
+
+    response = client.post(
+        "/api/v1/models/train/jobs",
+        files={"file": ("waiting.csv", sample_csv, "text/csv")},
+        data={"name": "waiting-model"}
+    )
+    job_id = response.json()["id"]
+    time.sleep(1.0)
+    assert client.get(f"/api/v1/models/train/jobs/{job_id}").json()["status"] == "queued"
+
+    update_training_job(db, others[0].id, status="succeeded")
+    assert _wait_finished(client, job_id)["status"] == "succeeded"
+
+
+def test_submitted_job_succeeds(client, sample_csv):
+    response = client.post(
+        "/api/v1/models/train/jobs",
+        files={"file": ("jobs.csv", sample_csv, "text/csv")},
+        data={"name": "job-model"}
+    )
+    assert response.status_code == 202, response.text
+    assert response.json()["status"] in ("queued", "running")
+
+    body = _wait_finished(client, response.json()["id"])
+    assert body["status"] == "succeeded", body
+    assert body["progress"] == 1.0
+    assert body["finished_at"] is not None and body["duration_seconds"] is not None
+    assert client.get(f"/api/v1/models/{body['model_id']}").json()["name"] == "job-model"
+    assert client.post(f"/api/v1/models/train/jobs/{body['id']}/cancel").status_code == 409
+
+
+def test_job_on_missing_dataset(client):
+    response = client.post("/api/v1/models/train/jobs/dataset", json={"dataset_id": 10 ** 9})
+    assert response.status_code == 404
+
+
+def _job_named(db, name: str) -> TrainingJobDB:
+    return db.query(TrainingJobDB).filter(TrainingJobDB.name == name).one()
+
+
+def _unstored_csv(sample_csv: bytes, shift: int) -> bytes:
+    """The sample rows in another order, so no stored dataset matches the upload."""
+    header, *rows = sample_csv.decode("utf-8").strip().splitlines()
+    return "\n".join([header] + rows[shift:] + rows[:shift]).encode("utf-8") + b"\n"
+
+
+def test_sync_training_runs_as_a_job(client, db, sample_csv):
+    response = client.post(
+        "/api/v1/models/train",
+        files={"file": ("sync.csv", _unstored_csv(sample_csv, 1), "text/csv")},
+        data={"name": "sync-model"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["name"] == "sync-model" and response.json()["metrics"]
+
+    job = _job_named(db, "sync-model")
+    assert (job.status, job.model_id) == ("succeeded", response.json()["id"])
+    # The upload was not kept as a dataset, so it is gone with the job
+    assert job.dataset_id is None and not os.path.exists(job.dataset_file)
+
+
+def test_slow_sync_training_returns_the_job(client, db, sample_csv, monkeypatch):
+    monkeypatch.setattr(model_routes, "TRAINING_SYNC_WAIT_S", 0)
+    response = client.post(
+        "/api/v1/models/train",
+        files={"file": ("slow.csv", _unstored_csv(sample_csv, 2), "text/csv")},
+        data={"name": "slow-model"}
+    )
+    assert response.status_code == 202, response.text
+    assert response.json()["status"] in ("queued", "running")
+
+    assert _wait_finished(client, response.json()["id"])["status"] == "succeeded"
+    deadline = time.monotonic() + 5
+    while os.path.exists(_job_named(db, "slow-model").dataset_file) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not os.path.exists(_job_named(db, "slow-model").dataset_file)
@@ -0,0 +1,65 @@
+"""
+The compiled tree engine must score exactly like the sklearn estimator it
+was compiled from.
+"""
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from app.services.tree_engine import CompiledTree
+
+
+def _random_tree(seed: int):
+    """Fit a tree of random shape on random data, with grade-like values."""
+    rng = np.random.default_rng(seed)
+    n_features = int(rng.integers(2, 15))
+    n_classes = int(rng.integers(2, 4))
+    X = rng.uniform(0, 100, size=(800, n_features)).round(int(rng.integers(0, 3)))
+    y = rng.integers(0, n_classes, size=800)
+    if seed % 2:
+        y = np.array(["berprestasi", "tidak_berprestasi", "lainnya"])[y]
+    model = DecisionTreeClassifier(
+        max_depth=[None, 3, 8][seed % 3],
+        min_samples_leaf=int(rng.integers(1, 10)),
+        random_state=seed
+    ).fit(X, y)
+    return model, rng, n_features
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_apply_matches_predict_proba(seed):
+    model, rng, n_features = _random_tree(seed)
+    compiled = CompiledTree.from_estimator(model)
+    # Random rows, out-of-range rows, and rows exactly on every threshold
+    X = np.vstack([
+        rng.uniform(-10, 110, size=(500, n_features)),
+        compiled.probe_rows(n_features, n_random=64, seed=seed)
+    ])
+
+    leaves = compiled.apply(X)
+    np.testing.assert_allclose(compiled.proba[leaves], model.predict_proba(X), rtol=0, atol=1e-12)
+    labels = [compiled.classes[i] for i in compiled.class_index[leaves]]
+    assert labels == model.predict(X).tolist()
+    assert compiled.verify(model, X)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_single_row_walk_matches_vectorized(seed):
+    model, rng, n_features = _random_tree(seed)
+    compiled = CompiledTree.from_estimator(model)
+    X = compiled.probe_rows(n_features, n_random=32, seed=seed)
+
+    leaves = compiled.apply(X)
+    for row, leaf in zip(X.tolist(), leaves.tolist()):
+        assert compiled.leaf(row) == leaf
+        label, proba = compiled.predict_one(row)
+        assert label == compiled.classes[compiled.class_index[leaf]]
+        assert proba is compiled.proba[leaf] or np.array_equal(proba, compiled.proba[leaf])
+
+
+def test_rebuilt_from_arrays_scores_the_same():
+    model, rng, n_features = _random_tree(3)
+    compiled = CompiledTree.from_estimator(model)
+    rebuilt = CompiledTree(classes=compiled.classes, **compiled.arrays())
+    X = rng.uniform(0, 100, size=(300, n_features))
+    np.testing.assert_array_equal(rebuilt.apply(X), compiled.apply(X))
@@ -0,0 +1,101 @@
+"""
+Streaming multipart uploads: malformed requests are rejected with a clear
+status, and what is stored is byte-for-byte what was sent.
+"""
+import hashlib
+import uuid
+
+import pytest
+
+from app.api.routes import predict_routes
+
+
+DATASET_URL = "/api/v1/datasets/upload"
+
+
+def _unique_csv(sample_csv: bytes) -> bytes:
+    """The sample dataset plus one extra row, so the content hash is new."""
+    header, first_row = sample_csv.split(b"\n")[:2]
+    extra = first_row.replace(first_row.split(b",")[0], str(uuid.uuid4().int % 100).encode(), 1)
+    return sample_csv.rstrip(b"\r\n") + b"\n" + extra + b"\n"
+
+
+def _multipart(parts, boundary: str = "kkp-test-boundary"):
+    """Build a raw multipart body from (name, filename or None, bytes) parts."""
+    body = b""
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + data + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def test_dataset_upload_stores_exact_bytes(client, sample_csv):
+    content = _unique_csv(sample_csv)
+    response = client.post(DATASET_URL, files={"file": ("grades.csv", content, "text/csv")}, data={"name": "exact"})
+    assert response.status_code == 200, response.text
+    dataset = response.json()
+    assert dataset["content_hash"] == hashlib.sha256(content).hexdigest()
+    assert dataset["row_count"] == content.count(b"\n") - 1
+    with open(dataset["file_path"], "rb") as f:
+        assert f.read() == content
+
+
+def test_same_file_twice_returns_stored_dataset(client, sample_csv):
+    content = _unique_csv(sample_csv)
+    first = client.post(DATASET_URL, files={"file": ("a.csv", content, "text/csv")}).json()
+    second = client.post(DATASET_URL, files={"file": ("b.csv", content, "text/csv")}).json()
+    assert second["id"] == first["id"]
+    assert second["file_path"] == first["file_path"]
+
+
+def test_bom_and_crlf_header_is_accepted(client, sample_csv):
+    content = b"\xef\xbb\xbf" + _unique_csv(sample_csv).replace(b"\n", b"\r\n")
+    response = client.post(DATASET_URL, files={"file": ("windows.csv", content, "text/csv")})
+    assert response.status_code == 200, response.text
+
+
+def test_field_after_file_part_is_read(client, sample_csv):
+    body, headers = _multipart([
+        ("file", "late-field.csv", _unique_csv(sample_csv)),
+        ("name", None, b"named after the file")
+    ])
+    response = client.post(DATASET_URL, content=body, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["name"] == "named after the file"
+
+
+@pytest.mark.parametrize("make_request", [
+    pytest.param(lambda csv: {"json": {"file": "x"}}, id="not-multipart"),
+    pytest.param(lambda csv: {"data": {"name": "no file"}, "files": {"other": (None, b"x")}}, id="missing-file"),
+    pytest.param(lambda csv: {"files": {"file": ("grades.txt", csv, "text/plain")}}, id="not-csv"),
+    pytest.param(lambda csv: {"files": {"file": ("empty.csv", b"", "text/csv")}}, id="empty"),
+    pytest.param(lambda csv: {"files": {"file": ("cols.csv", b"nama,pai\nBudi,90\n", "text/csv")}}, id="missing-columns"),
+    pytest.param(lambda csv: {"files": [("file", ("a.csv", csv, "text/csv")), ("file", ("b.csv", csv, "text/csv"))]}, id="two-files")
+])
+def test_bad_dataset_upload_is_rejected(client, sample_csv, make_request):
+    response = client.post(DATASET_URL, **make_request(sample_csv))
+    assert response.status_code == 400, response.text
+
+
+def test_truncated_multipart_body_is_rejected(client, sample_csv):
+    body, headers = _multipart([("file", "cut.csv", sample_csv)])
+    response = client.post(DATASET_URL, content=body[: len(body) // 2], headers=headers)
+    assert response.status_code == 400
+
+
+def test_oversized_batch_upload_is_rejected(client, trained_model, batch_csv, monkeypatch):
+    monkeypatch.setattr(predict_routes, "PREDICT_UPLOAD_MAX_MB", len(batch_csv) / 2 / 1024 / 1024)
+    response = client.post(
+        "/api/v1/predict/batch",
+        files={"file": ("batch.csv", batch_csv, "text/csv")},
+        data={"model_id": str(trained_model["id"])}
+    )
+    assert response.status_code == 413
+
+
+def test_batch_upload_without_model_id(client, batch_csv):
+    response = client.post("/api/v1/predict/batch", files={"file": ("batch.csv", batch_csv, "text/csv")})
+    assert response.status_code == 422
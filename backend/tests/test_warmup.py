@@ -0,0 +1,36 @@
+"""
+Startup warm-up: the background task is kept and its failures are logged
+without keeping the service from becoming ready.
+"""
+import asyncio
+import logging
+import time
+
+from app.main import _warmup_done, app
+from app.services.warmup_service import warmup_state
+
+
+def test_warmup_task_is_kept_and_finishes(client):
+    task = app.state.warmup_task
+    deadline = time.monotonic() + 30
+    while not task.done() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert task.done() and task.exception() is None
+    assert client.get("/ready").status_code == 200
+
+
+def test_failed_warmup_is_logged_and_ready(caplog):
+    loop = asyncio.new_event_loop()
+    try:
+        future = loop.create_future()
+        future.set_exception(RuntimeError("database unavailable"))
+        warmup_state.start()
+        with caplog.at_level(logging.ERROR, logger="app.main"):
+            _warmup_done(future)
+    finally:
+        loop.close()
+
+    assert "Model warm-up failed" in caplog.text
+    state = warmup_state.to_dict()
+    assert state["status"] == "warm"
+    assert state["models"][-1] == {"model_id": None, "ok": False, "error": "database unavailable"}